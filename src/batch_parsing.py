@@ -0,0 +1,111 @@
+import json
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, TextIO
+
+from catalog import Catalog, load_catalog
+from logger_config import redirect_console_to_stderr
+from parsing_utils import DATA_DIR, parse_item
+
+# Строка, с которой начинается скопированный из игры тултип (англ. и рус. клиент).
+_ITEM_START_RE = re.compile(r"^(Item Class|Класс предмета)\s*:", re.IGNORECASE)
+
+DEFAULT_CHUNK_SIZE = 64
+
+# Каталог рабочего процесса пула: загружается один раз в initializer.
+_worker_catalog: Optional[Catalog] = None
+
+
+def iter_item_texts(stream: Iterable[str]) -> Iterator[str]:
+    """
+    Потоково разбивает входной текст на отдельные предметы.
+
+    Предметы разделяются пустыми строками; строка "Item Class:" также
+    начинает новый предмет, как в тултипах, скопированных из игры.
+    """
+    buffer: List[str] = []
+    for raw_line in stream:
+        line = raw_line.rstrip("\r\n")
+        if not line.strip() or (_ITEM_START_RE.match(line) and buffer):
+            if buffer:
+                yield "\n".join(buffer)
+                buffer = []
+            if not line.strip():
+                continue
+        buffer.append(line)
+    if buffer:
+        yield "\n".join(buffer)
+
+
+def _parse_to_json(index: int, text: str, catalog: Catalog) -> str:
+    parsed = parse_item(text, catalog.item_lookup, catalog.stat_lookup, catalog.tier_index)
+    if parsed is None:
+        record = {"index": index, "error": "Item not found"}
+    else:
+        record = {"index": index, "item": parsed.to_dict()}
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _init_worker(data_dir: str) -> None:
+    global _worker_catalog
+    redirect_console_to_stderr()
+    _worker_catalog = load_catalog(data_dir)
+
+
+def _parse_chunk(start: int, texts: List[str]) -> List[str]:
+    return [_parse_to_json(start + offset, text, _worker_catalog) for offset, text in enumerate(texts)]
+
+
+def _chunks(texts: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_batch(texts: Iterable[str], jobs: int = 1, data_dir: str = DATA_DIR,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Разбирает поток текстов предметов и возвращает NDJSON-строки в исходном порядке.
+
+    :param jobs: Количество процессов; при jobs > 1 каждый процесс загружает каталог один раз.
+    :param chunk_size: Сколько предметов передаётся процессу за одно задание.
+    """
+    if jobs <= 1:
+        catalog = load_catalog(data_dir)
+        for index, text in enumerate(texts):
+            yield _parse_to_json(index, text, catalog)
+        return
+
+    # Ограниченное окно заданий: вход читается потоково, а не целиком.
+    max_in_flight = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(data_dir,)) as executor:
+        pending = deque()
+        start = 0
+        for chunk in _chunks(texts, chunk_size):
+            pending.append(executor.submit(_parse_chunk, start, chunk))
+            start += len(chunk)
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_batch(input_stream: TextIO, output_stream: TextIO, jobs: int = 1, data_dir: str = DATA_DIR,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Читает предметы из input_stream и пишет по одной NDJSON-строке на предмет.
+
+    :return: Количество обработанных предметов.
+    """
+    count = 0
+    for line in parse_batch(iter_item_texts(input_stream), jobs, data_dir, chunk_size):
+        output_stream.write(line)
+        output_stream.write("\n")
+        count += 1
+    output_stream.flush()
+    return count
@@ -0,0 +1,5 @@
+"""
+Бенчмарки горячих путей PoE2 Price Checker.
+
+Запуск из каталога src, например: python -m benchmarks.bench_stat_matching
+"""
@@ -0,0 +1,32 @@
+"""
+Прежний порядок предобработки (до ScreenshotHandler.preprocess_frame):
+увеличение всего изображения бэкендом из настроек, затем один проход
+grayscale -> контраст -> MedianFilter -> threshold. Приложение его больше
+не использует; нужен бенчмаркам для сравнения и для бинаризации эталонов.
+"""
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from config import get_settings
+from frame import rgb_to_luma
+from screenshot_handler import _CONTRAST, _THRESHOLD_LUT, _contrast_lut
+from upscalers import resolve_upscaler
+
+
+def upscale(pixels: np.ndarray, scale: Optional[int] = None) -> np.ndarray:
+    """Увеличивает изображение (H, W[, C]) uint8 бэкендом из настроек (Settings.upscaler)."""
+    settings = get_settings()
+    return resolve_upscaler(settings.upscaler).upscale(pixels, scale or settings.upscale_factor)
+
+
+def preprocess_for_ocr(pixels: np.ndarray) -> Image.Image:
+    """
+    Grayscale (если передан RGB/RGBA), контраст, MedianFilter и бинаризация
+    уже увеличенного изображения. Возвращает PIL.Image "L" (0/255).
+    """
+    gray = pixels if pixels.ndim == 2 else rgb_to_luma(pixels)
+    high_contrast = _contrast_lut(gray, _CONTRAST)[gray]
+    filtered = Image.fromarray(high_contrast, "L").filter(ImageFilter.MedianFilter(size=3))
+    return filtered.point(_THRESHOLD_LUT)
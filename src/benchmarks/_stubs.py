@@ -0,0 +1,93 @@
+"""
+Заглушки платформенных модулей (Quartz, AppKit, PyQt5, ...) для запуска
+бенчмарков и импорта модулей приложения на Linux без macOS-зависимостей.
+"""
+import importlib.util
+import sys
+import types
+from typing import List
+
+# Модули, которые импортируются приложением, но недоступны на CI.
+PLATFORM_MODULES = (
+    "objc",
+    "Quartz",
+    "Quartz.CoreGraphics",
+    "AppKit",
+    "Foundation",
+    "PyQt5",
+    "PyQt5.QtCore",
+    "PyQt5.QtWidgets",
+    "rumps",
+    "psutil",
+    "pytesseract",
+)
+
+
+class _StubMeta(type):
+    # Обращение к атрибуту класса-заглушки (NSPanel.alloc, Qt.WindowStaysOnTopHint) даёт новую заглушку
+    def __getattr__(cls, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _stub_class(name)
+
+
+def _stub_init(self, *args, **kwargs) -> None:
+    pass
+
+
+def _stub_getattr(self, name: str):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return _stub_class(name)
+
+
+def _stub_call(self, *args, **kwargs):
+    return _stub_class("result")()
+
+
+def _stub_class(name: str) -> type:
+    """Класс, от которого можно наследоваться, который можно вызвать и использовать как декоратор."""
+    return _StubMeta(name, (), {"__init__": _stub_init, "__getattr__": _stub_getattr, "__call__": _stub_call})
+
+
+class StubModule(types.ModuleType):
+    """Модуль, любой атрибут которого — заглушка."""
+
+    __path__: List[str] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = _stub_class(name)
+        setattr(self, name, value)
+        return value
+
+
+def _is_available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def install_platform_stubs() -> List[str]:
+    """
+    Регистрирует в sys.modules заглушки для недоступных платформенных модулей.
+    Установленные пакеты не подменяются.
+
+    :return: Имена модулей, для которых установлены заглушки.
+    """
+    installed = []
+    for name in PLATFORM_MODULES:
+        if name in sys.modules:
+            continue
+        parent, _, child = name.rpartition(".")
+        # Подмодуль заглушки тоже заглушка; иначе подменяем только то, что не установлено
+        if not isinstance(sys.modules.get(parent), StubModule) and _is_available(name):
+            continue
+        module = StubModule(name)
+        sys.modules[name] = module
+        if parent:
+            setattr(sys.modules[parent], child, module)
+        installed.append(name)
+    return installed
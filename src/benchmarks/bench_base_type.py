@@ -0,0 +1,117 @@
+"""
+Поиск базы в заголовках обычных, магических ("Prefix Base of Suffix") и редких
+(случайное имя над базой) предметов.
+
+Сравниваются: линейный перебор всех названий с проверкой `name in line`
+(первое совпадение), прежний путь find_item_by_header без автомата (точное
+совпадение строки, затем нечёткий поиск по триграммам), один автомат Ахо — Корасик
+(NameAutomaton: самое длинное название за один проход) и нынешний
+find_item_by_header (автомат, а для искажённой OCR базы — нечёткий поиск).
+Доля NOISE заголовков — с OCR-ошибкой в базе; к ним добавлены TYPO_HEADERS —
+база с ошибкой, внутри которой есть точное короткое название ("Rubv Ring").
+Печатается время на заголовок и доля верно найденных баз.
+"""
+import random
+import time
+
+from benchmarks.synthetic import _RARE_PREFIXES, _RARE_SUFFIXES, ocr_noise
+from name_automaton import NameAutomaton
+from parsing_utils import (build_item_lookup, clean_item_name, find_base_type, find_item_by_header, load_ndjson,
+                           search_items_by_name)
+
+MAGIC_PREFIXES = ("Vile", "Glinting", "Heavy", "Honed", "Stalwart", "Sapphire", "Coral", "Seething")
+MAGIC_SUFFIXES = ("of the Whale", "of Skill", "of the Fox", "of Ease", "of the Lynx", "of Plunder")
+# Категории, которые бывают магическими и редкими
+NON_EQUIPMENT = ("Currency", "QuestItem", "MapFragment", "Active Skill Gem", "Support Skill Gem",
+                 "HeistObjective", "AtlasUpgradeItem", "Incubator", "PantheonSoul", "Omen")
+HEADERS = 500
+NOISE = 0.1
+# Ошибка OCR в базе оставляет точное короткое название: автомат находит "ring"
+TYPO_HEADERS = (
+    (["Rubv Ring"], "Normal", "Ruby Ring"),
+    (["Sapphlre Ring"], "Normal", "Sapphire Ring"),
+    (["Goid Ring"], "Normal", "Gold Ring"),
+    (["Stalwart Goid Ring of Skill"], "Magic", "Gold Ring"),
+    (["Doom Loop", "Sapphlre Ring"], "Rare", "Sapphire Ring"),
+)
+
+
+def _headers(items, count, seed=0):
+    rng = random.Random(seed)
+    bases = [item for item in items if item.get("namespace") == "ITEM"
+             and (item.get("craftable") or {}).get("category") not in NON_EQUIPMENT]
+    headers = []
+    for _ in range(count):
+        item = rng.choice(bases)
+        base = ocr_noise(item["name"], rng) if rng.random() < NOISE else item["name"]
+        kind = rng.random()
+        if kind < 0.2:
+            rarity, lines = "Normal", [base]
+        elif kind < 0.6:
+            rarity, lines = "Magic", [f"{rng.choice(MAGIC_PREFIXES)} {base} {rng.choice(MAGIC_SUFFIXES)}"]
+        else:
+            rarity, lines = "Rare", [f"{rng.choice(_RARE_PREFIXES)} {rng.choice(_RARE_SUFFIXES)}", base]
+        headers.append((lines, rarity, item["name"]))
+    return headers + list(TYPO_HEADERS)
+
+
+def legacy_scan(names, lines):
+    """Первое название каталога, входящее в строку."""
+    for line in lines:
+        cleaned = clean_item_name(line)
+        for name, item in names:
+            if name in cleaned:
+                return item
+    return None
+
+
+def fuzzy_header(item_lookup, lines):
+    """find_item_by_header без автомата."""
+    for line in lines:
+        item = item_lookup.get(clean_item_name(line))
+        if item is not None:
+            return item
+    best = None
+    for line in lines:
+        for candidate in search_items_by_name(item_lookup, line, limit=1):
+            if best is None or candidate.score > best.score:
+                best = candidate
+    return best.item if best else None
+
+
+def automaton(item_lookup, lines):
+    match = find_base_type(item_lookup, lines)
+    return match.item if match else None
+
+
+def main() -> None:
+    items = load_ndjson("items.ndjson")
+    item_lookup = build_item_lookup(items)
+    names = list(item_lookup.items())
+    headers = _headers(items, HEADERS)
+
+    start = time.perf_counter()
+    states = NameAutomaton(names).states
+    build = time.perf_counter() - start
+    # Автомат индекса строится при первом поиске — не в замере
+    item_lookup.longest_match([""])
+
+    print(f"заголовков: {len(headers)} (обычные, магические и редкие, {NOISE:.0%} с OCR-ошибкой, "
+          f"{len(TYPO_HEADERS)} TYPO_HEADERS), названий: {len(names)}")
+    print(f"построение автомата: {build * 1e3:.0f} ms, состояний {states}")
+    for label, find in (("перебор `in`", lambda lines, rarity: legacy_scan(names, lines)),
+                        ("триграммы (прежний)", lambda lines, rarity: fuzzy_header(item_lookup, lines)),
+                        ("Ахо — Корасик", lambda lines, rarity: automaton(item_lookup, lines)),
+                        ("find_item_by_header", lambda lines, rarity: find_item_by_header(item_lookup, lines))):
+        start = time.perf_counter()
+        found = [find(lines, rarity) for lines, rarity, _ in headers]
+        elapsed = (time.perf_counter() - start) / len(headers)
+        correct = sum(item is not None and item["name"] == expected for item, (*_, expected) in zip(found, headers))
+        typos = sum(item is not None and item["name"] == expected
+                    for item, (*_, expected) in zip(found[-len(TYPO_HEADERS):], TYPO_HEADERS))
+        print(f"  {label:20s}: {elapsed * 1e6:9.1f} us/заголовок, верная база {correct}/{len(headers)}, "
+              f"TYPO_HEADERS {typos}/{len(TYPO_HEADERS)}")
+
+
+if __name__ == "__main__":
+    main()
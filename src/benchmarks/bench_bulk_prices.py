@@ -0,0 +1,76 @@
+"""
+Снимок цен (pricing.bulk) против поштучных запросов торговли на локальном сервере.
+
+Берутся предметы, которые чаще всего проверяют: валюта, фрагменты, камни,
+уникальные. Печатается время оценки и число запросов к серверу на пути проверки
+без снимка и со снимком, время обновления снимка (загрузка, курсы валют, индекс),
+размер индекса и пример курсов.
+"""
+import os
+import random
+import tempfile
+import time
+
+from catalog import load_catalog
+from config import get_settings
+from pricing import BulkPriceScheduler, PriceService, TradeClient
+from pricing.bulk import parse_categories
+from pricing.cache import price_category
+from pricing.mock_server import MockTradeServer
+from pricing.rate_limit import RateRule
+
+LATENCY = 0.03
+CHECKS = 40
+MAIN_CURRENCIES = ("divine", "chaos", "annul", "alch", "regal", "mirror")
+
+
+def _pass(service: PriceService, items, server: MockTradeServer):
+    before = server.requests["search"] + server.requests["fetch"]
+    start = time.perf_counter()
+    for item in items:
+        service.price_item(item)
+    return time.perf_counter() - start, server.requests["search"] + server.requests["fetch"] - before
+
+
+def main() -> None:
+    catalog = load_catalog(items_file="items.ndjson", stats_file="stats.ndjson")
+    categories = parse_categories(get_settings().bulk_price_categories)
+    common = [item for item in catalog.items if price_category(item) in categories]
+    items = random.Random(0).sample(common, CHECKS)
+    rules = (RateRule(10 ** 6, 1, 0),)
+
+    with tempfile.TemporaryDirectory() as directory, \
+            MockTradeServer(latency=LATENCY, search_rules=rules, fetch_rules=rules, items=catalog.items) as server:
+        plain = PriceService(TradeClient(server.url, "Standard"), catalog.stats)
+        plain.trade_stats
+        plain_time, plain_requests = _pass(plain, items, server)
+        plain.close()
+
+        bulk = BulkPriceScheduler(server.url + "/api/bulk/{league}", "Standard", catalog.items, categories,
+                                  snapshot_path=os.path.join(directory, "prices_bulk.json"))
+        start = time.perf_counter()
+        index = bulk.refresh()
+        refresh_time = time.perf_counter() - start
+        service = PriceService(TradeClient(server.url, "Standard"), catalog.stats, bulk=bulk)
+        service.trade_stats
+        bulk_time, bulk_requests = _pass(service, items, server)
+
+        restarted = BulkPriceScheduler(bulk.source, "Standard", catalog.items, categories,
+                                       snapshot_path=bulk.snapshot_path)
+        start = time.perf_counter()
+        restarted.load_saved()
+        load_time = time.perf_counter() - start
+        service.close()
+
+    print(f"проверок: {CHECKS} (категории: {', '.join(categories)}), задержка сервера {LATENCY * 1e3:.0f} ms")
+    print(f"  поштучные запросы: {plain_time * 1e3:8.1f} ms, запросов к серверу {plain_requests}")
+    print(f"  снимок цен:        {bulk_time * 1e3:8.1f} ms, запросов к серверу {bulk_requests}")
+    print(f"обновление снимка: {refresh_time * 1e3:.0f} ms, предметов в индексе {len(index)}, "
+          f"чтение сохранённого при запуске {load_time * 1e3:.0f} ms")
+    rates = ", ".join(f"{tag} {index.rates[tag]:g}" for tag in MAIN_CURRENCIES if tag in index.rates)
+    print(f"курсов валют {len(index.rates)}, основные в {index.base}: {rates}")
+    print(f"1 divine = {index.convert(1, 'divine', 'chaos'):g} chaos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Память процесса после загрузки каталога: полные статы против ленивых (LazyStat).
+
+Каждый режим измеряется в отдельном подпроцессе, чтобы RSS не накапливался.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+MODES = ("eager-ndjson", "lazy-ndjson", "lazy-snapshot")
+
+
+def _rss_bytes() -> int:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _measure(mode: str, snapshot_path: str) -> None:
+    from catalog import load_catalog, load_snapshot
+    from parsing_utils import parse_item
+
+    rss_before = _rss_bytes()
+    tracemalloc.start()
+    if mode == "eager-ndjson":
+        catalog = load_catalog(use_snapshot=False, lazy=False)
+    elif mode == "lazy-ndjson":
+        catalog = load_catalog(use_snapshot=False, lazy=True)
+    else:
+        catalog = load_snapshot(snapshot_path)
+    parse_item("Gold Ring\n+25% to Fire Resistance\n+45 to maximum Life", catalog.item_lookup, catalog.stat_lookup)
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{mode:14} heap {heap / 2 ** 20:6.1f} MiB   rss +{(_rss_bytes() - rss_before) / 2 ** 20:6.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--snapshot")
+    args = parser.parse_args()
+
+    if args.mode:
+        _measure(args.mode, args.snapshot)
+        return
+
+    from catalog import build_catalog
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = build_catalog(output_path=os.path.join(tmp_dir, "catalog.bin"))
+        for mode in MODES:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_catalog_memory", "--mode", mode, "--snapshot", snapshot_path],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
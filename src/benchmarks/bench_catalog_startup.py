@@ -0,0 +1,42 @@
+"""
+Время старта каталога: разбор ndjson с построением индексов против загрузки снимка.
+"""
+import os
+import tempfile
+import time
+
+from catalog import Catalog, build_catalog, load_snapshot, source_fingerprint
+from parsing_utils import DATA_DIR, load_ndjson
+
+
+def _best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _load_from_ndjson():
+    load_ndjson.cache_clear()
+    return Catalog(load_ndjson("items.ndjson"), load_ndjson("stats.ndjson"))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = build_catalog(DATA_DIR, os.path.join(tmp_dir, "catalog.bin"))
+        size = os.path.getsize(snapshot_path)
+        fingerprint = source_fingerprint()
+
+        ndjson = _best_of(_load_from_ndjson, repeat=5)
+        snapshot = _best_of(lambda: load_snapshot(snapshot_path, fingerprint), repeat=5)
+
+    print(f"снимок: {size / 1024:.0f} KiB")
+    print(f"ndjson + индексы: {ndjson * 1e3:.1f} ms")
+    print(f"снимок (mmap):    {snapshot * 1e3:.1f} ms")
+    print(f"ускорение: x{ndjson / snapshot:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Конвейер проверки без AppKit: захват-заглушка (синтетические тултипы), настоящие
+предобработка и разбор, имитация OCR (время задаётся, текст известен).
+
+Печатается, сколько главный поток занят одной проверкой: прежний синхронный
+mouseUp_ против CheckPipeline.submit; порядок стадий в progress-колбэках;
+и что новая проверка, начатая во время медленной, отменяет её — результат
+устаревшей проверки не доставляется, а рабочий поток освобождается быстро.
+
+Затем на одних заглушках (захват, предобработка, OCR, парсер) проверяются
+пути ошибок и отмены: неудачный захват и ошибка OCR доставляются в on_error
+со стадией, отменённая проверка не доставляет ни результата, ни ошибки.
+"""
+import queue
+import statistics
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import numpy as np
+from PIL import Image
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks.bench_upscalers import image_set  # noqa: E402
+from catalog import load_catalog  # noqa: E402
+from check_pipeline import CheckError, CheckJob, CheckPipeline, CheckStage  # noqa: E402
+from frame import Frame  # noqa: E402
+from ocr_service import OcrError, OcrResult  # noqa: E402
+from parsing_utils import IncrementalItemParser  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+
+OCR_SECONDS = 0.3
+SLOW_OCR_SECONDS = 3.0
+
+
+class StubScreen:
+    """Захват по «прямоугольнику» — номеру синтетического тултипа."""
+
+    def __init__(self) -> None:
+        # Номер последнего захваченного тултипа: по нему имитация OCR знает текст
+        self.last = None
+        self.samples = []
+        for text, small, _ in image_set():
+            rgba = np.dstack([small, np.full(small.shape[:2], 255, dtype=np.uint8)])
+            self.samples.append((text, Frame(rgba, "RGBA")))
+
+    def capture(self, rect):
+        self.last = rect
+        return self.samples[rect][1]
+
+
+class SimulatedOcr:
+    """Распознаёт «мгновенно» по известному тексту, но занимает seconds; отменяется по событию."""
+
+    def __init__(self, screen: StubScreen) -> None:
+        self.screen = screen
+        self.seconds = OCR_SECONDS
+
+    def __call__(self, image, on_section, cancel_event, lang=None, whitelist=None):
+        deadline = time.perf_counter() + self.seconds
+        while time.perf_counter() < deadline:
+            if cancel_event.wait(0.01):
+                raise CancelledError()
+        text = self.screen.samples[self.screen.last][0]
+        for section in text.split("\n--------\n"):
+            on_section(section)
+        return OcrResult(text, 90.0)
+
+
+class StubParser:
+    def __init__(self) -> None:
+        self.hit_rate = 1.0
+
+    def feed(self, text):
+        pass
+
+    def result(self):
+        return None
+
+
+def _stub_check(capture, recognize, cancel: bool = False):
+    """Одна проверка на заглушках; возвращает доставленные (вид, стадия, значение)."""
+    delivered = []
+    done = threading.Event()
+    blank = Frame(np.zeros((8, 8, 4), dtype=np.uint8), "RGBA")
+    pipeline = CheckPipeline(
+        capture=lambda rect: blank if capture is None else capture(rect),
+        preprocess=lambda frame, scale: Image.new("L", (8, 8)),
+        parser_factory=StubParser,
+        recognize=recognize,
+    )
+    job = pipeline.submit(None, lambda job, result: (delivered.append(("result", job.stage, result)), done.set()),
+                          on_error=lambda job, error: (delivered.append(("error", job.stage, error)), done.set()))
+    if cancel:
+        pipeline.cancel()
+    done.wait(2.0)
+    pipeline.close()
+    return job, delivered
+
+
+def check_stub_paths() -> None:
+    """Ошибки и отмена конвейера на заглушках захвата и OCR."""
+    def recognized(image, on_section, cancel_event, lang=None, whitelist=None):
+        return OcrResult("Gold Ring", 90.0)
+
+    def broken_ocr(image, on_section, cancel_event, lang=None, whitelist=None):
+        raise OcrError("движок упал")
+
+    def blocked_ocr(image, on_section, cancel_event, lang=None, whitelist=None):
+        if cancel_event.wait(2.0):
+            raise CancelledError()
+        return OcrResult("Gold Ring", 90.0)
+
+    _, delivered = _stub_check(None, recognized)
+    assert [(kind, stage) for kind, stage, _ in delivered] == [("result", CheckStage.Parse)], delivered
+    _, delivered = _stub_check(lambda rect: None, recognized)
+    assert [(kind, stage) for kind, stage, _ in delivered] == [("error", CheckStage.Capture)], delivered
+    assert isinstance(delivered[0][2], CheckError)
+    _, delivered = _stub_check(None, broken_ocr)
+    assert [(kind, stage) for kind, stage, _ in delivered] == [("error", CheckStage.Ocr)], delivered
+    assert isinstance(delivered[0][2], OcrError)
+    job, delivered = _stub_check(None, blocked_ocr, cancel=True)
+    assert job.cancelled and delivered == [], delivered
+    print("заглушки: результат, ошибка захвата, ошибка OCR и отмена доставлены как ожидалось")
+
+
+def main() -> None:
+    catalog = load_catalog(items_file="items.ndjson", stats_file="stats.ndjson")
+    screen = StubScreen()
+    ocr = SimulatedOcr(screen)
+
+    main_thread = queue.Queue()
+    pipeline = CheckPipeline(
+        capture=screen.capture,
+        preprocess=ScreenshotHandler.process_frame,
+        parser_factory=lambda: IncrementalItemParser(catalog.item_lookup, catalog.stat_lookup, catalog.tier_index),
+        recognize=ocr,
+        dispatch=main_thread.put,
+    )
+
+    def drain(until: threading.Event, timeout: float = 10.0) -> None:
+        """Цикл «главного потока»: выполняет доставленные вызовы."""
+        deadline = time.perf_counter() + timeout
+        while not until.is_set() and time.perf_counter() < deadline:
+            try:
+                main_thread.get(timeout=0.01)()
+            except queue.Empty:
+                pass
+
+    # Синхронно, как прежний mouseUp_: главный поток занят всей проверкой
+    blocking = []
+    for rect in range(len(screen.samples)):
+        start = time.perf_counter()
+        pipeline.run(CheckJob(0, rect))
+        blocking.append(time.perf_counter() - start)
+
+    # Через submit: главный поток занят только постановкой
+    submit_times, stages, parsed = [], [], 0
+    for rect in range(len(screen.samples)):
+        done = threading.Event()
+        results = []
+        start = time.perf_counter()
+        pipeline.submit(rect, lambda job, result: (results.append(result), done.set()),
+                        on_progress=lambda job, stage: stages.append(stage.value) if rect == 0 else None)
+        submit_times.append(time.perf_counter() - start)
+        drain(done)
+        parsed += results[0].item is not None
+
+    # Новая проверка во время медленной: устаревшая отменяется
+    delivered = []
+    done = threading.Event()
+    ocr.seconds = SLOW_OCR_SECONDS
+    slow = pipeline.submit(0, lambda job, result: delivered.append(job.id))
+    time.sleep(0.3)
+    ocr.seconds = OCR_SECONDS
+    start = time.perf_counter()
+    fresh = pipeline.submit(1, lambda job, result: (delivered.append(job.id), done.set()))
+    drain(done)
+    fresh_latency = time.perf_counter() - start
+    pipeline.close()
+
+    print(f"проверок: {len(screen.samples)}, имитация OCR {OCR_SECONDS * 1e3:.0f} ms, "
+          f"предмет найден в {parsed} из {len(screen.samples)}")
+    print(f"главный поток, синхронно (mouseUp_): медиана {statistics.median(blocking) * 1e3:8.1f} ms")
+    print(f"главный поток, CheckPipeline.submit: медиана {statistics.median(submit_times) * 1e3:8.3f} ms")
+    print(f"стадии: {' -> '.join(stages)}")
+    print(f"отмена: медленная проверка ({SLOW_OCR_SECONDS:.0f} с OCR) прервана новой; "
+          f"новая доставлена через {fresh_latency * 1e3:.0f} ms, "
+          f"доставлены проверки {delivered} (устаревшая {slow.id}, новая {fresh.id})")
+    assert delivered == [fresh.id]
+
+    check_stub_paths()
+
+
+if __name__ == "__main__":
+    main()
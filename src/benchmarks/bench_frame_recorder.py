@@ -0,0 +1,49 @@
+"""
+Цена отладочной записи кадра на горячем пути: синхронный PNG (как прежний
+processed.save) против FrameRecorder.record, и поведение при серии проверок.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from frame_recorder import FrameRecorder
+
+# Бинаризованный тултип после увеличения x4
+WIDTH, HEIGHT = 2000, 1400
+CHECKS = 20
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(np.where(rng.random((HEIGHT, WIDTH)) > 0.9, 255, 0).astype(np.uint8), "L")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sync = []
+        for _ in range(5):
+            start = time.perf_counter()
+            image.save(os.path.join(tmp_dir, "screenshot_processed.png"))
+            sync.append(time.perf_counter() - start)
+
+        recorder = FrameRecorder(os.path.join(tmp_dir, "frames"), frames_per_stage=5, queue_size=4)
+        hot = []
+        for _ in range(CHECKS):
+            start = time.perf_counter()
+            recorder.record("processed", image)
+            hot.append(time.perf_counter() - start)
+        recorder.close()
+        stats = recorder.stats()
+        kept = len(os.listdir(os.path.join(tmp_dir, "frames", "processed")))
+
+    print(f"кадр {WIDTH}x{HEIGHT} L")
+    print(f"синхронный PNG:        {statistics.median(sync) * 1e3:8.2f} ms на проверку")
+    print(f"FrameRecorder.record:  {statistics.median(hot) * 1e6:8.1f} µs на проверку")
+    print(f"серия из {CHECKS} проверок подряд: записано {stats.written}, отброшено {stats.dropped}, "
+          f"на диске {kept} (кольцевой буфер)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Распознавание высокого тултипа полосами: задержка OCR при 1, 2 и 4 процессах пула.
+
+Тултипы с 14 модификаторами отрисовываются с линиями-разделителями секций, как в
+игре, и проходят обычную предобработку. Печатаются время поиска полос (профиль
+строк), число полос и задержка распознавания. Если tesseract не установлен,
+используется имитация движка со временем работы, пропорциональным площади полосы
+(как у tesseract): она показывает масштабирование пула при достаточном числе ядер.
+Проверяется также, что ни один разрез не проходит по тексту и что текст полос,
+пришедших в обратном порядке, собирается по порядку.
+"""
+import os
+import random
+import shutil
+import statistics
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks import synthetic  # noqa: E402
+from benchmarks.bench_upscalers import BACKGROUND, FONT_SIZE, FOREGROUND  # noqa: E402
+from frame import Frame  # noqa: E402
+from ocr_bands import BandAssembler, recognize_bands, split_bands  # noqa: E402
+from ocr_service import OcrResult, OcrService  # noqa: E402
+from parsing_utils import load_ndjson  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+
+MODIFIERS = 14
+TOOLTIPS = 3
+WORKERS = (1, 2, 4)
+# Имитация: секунд на мегапиксель предобработанного изображения
+SIMULATED_SECONDS_PER_MPIXEL = 0.4
+
+
+class SimulatedEngine:
+    """Движок без распознавания: только время работы, пропорциональное площади."""
+
+    def __init__(self, lang: str, psm: int) -> None:
+        pass
+
+    def recognize(self, image: Image.Image, lang=None, whitelist=None) -> OcrResult:
+        time.sleep(image.width * image.height / 1e6 * SIMULATED_SECONDS_PER_MPIXEL)
+        return OcrResult("", -1.0)
+
+
+def _render(text: str) -> np.ndarray:
+    font = ImageFont.load_default(size=FONT_SIZE)
+    lines = text.split("\n")
+    line_height = round(FONT_SIZE * 1.4)
+    width = max(round(font.getlength(line)) for line in lines) + FONT_SIZE * 2
+    image = Image.new("RGB", (width, line_height * len(lines) + FONT_SIZE), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(lines):
+        y = FONT_SIZE // 2 + index * line_height
+        if line == "--------":
+            draw.line((FONT_SIZE // 2, y + line_height // 2, width - FONT_SIZE // 2, y + line_height // 2),
+                      fill=FOREGROUND, width=1)
+        else:
+            draw.text((FONT_SIZE, y), line, fill=FOREGROUND, font=font)
+    return np.asarray(image)
+
+
+def _images():
+    rng = random.Random(5)
+    items = [item for item in load_ndjson("items.ndjson") if (item.get("craftable") or {}).get("category")]
+    templates = synthetic._modifier_templates(load_ndjson("stats.ndjson"))
+    images = []
+    for _ in range(TOOLTIPS):
+        rgb = _render(synthetic.make_tooltip(rng.choice(items), templates, rng, modifiers=MODIFIERS))
+        rgba = np.dstack([rgb, np.full(rgb.shape[:2], 255, dtype=np.uint8)])
+        images.append(ScreenshotHandler.preprocess_frame(Frame(rgba, "RGBA")))
+    return images
+
+
+def _check_assembly() -> None:
+    bands = split_bands(np.asarray(_images()[0]), 4)
+    sections = []
+    assembler = BandAssembler(bands, sections.append)
+    for index in reversed(range(len(bands))):
+        assembler.add(index, OcrResult(f"band {index}", 90.0))
+    expected = [f"band {index}" for index in range(len(bands))]
+    assert [line for line in assembler.result().text.split("\n") if line != "--------"] == expected
+    assert "\n".join(sections).split("\n") == expected
+
+
+def main() -> None:
+    images = _images()
+    engine = None if shutil.which("tesseract") else SimulatedEngine
+    print(f"тултипов: {len(images)}, размер {images[0].width}x{images[0].height} и т.п., "
+          f"ядер: {os.cpu_count()}, движок: {'имитация' if engine else 'tesseract'}")
+
+    for image in images:
+        pixels = np.asarray(image)
+        start = time.perf_counter()
+        bands = split_bands(pixels, max(WORKERS))
+        elapsed = time.perf_counter() - start
+        cut_rows = [band.bottom for band in bands[:-1]]
+        assert not any(np.any(pixels[row] > 127) and not np.mean(pixels[row] > 127) >= 0.5 for row in cut_rows), \
+            "разрез прошёл по строке текста"
+        print(f"  {image.height:>5} строк: полос {len(bands)} ({', '.join(str(band.height) for band in bands)}), "
+              f"поиск {elapsed * 1e3:.2f} ms")
+    _check_assembly()
+
+    baseline = None
+    for workers in WORKERS:
+        service = OcrService(workers=workers, engine_factory=engine)
+        try:
+            recognize_bands(service, images[0], workers)  # запуск процессов
+            timings = []
+            for image in images:
+                start = time.perf_counter()
+                recognize_bands(service, image, workers)
+                timings.append(time.perf_counter() - start)
+        finally:
+            service.close()
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"процессов {workers}: медиана {median * 1e3:7.0f} ms (x{baseline / median:.2f})")
+
+
+if __name__ == "__main__":
+    main()
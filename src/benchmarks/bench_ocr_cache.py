@@ -0,0 +1,92 @@
+"""
+Повторная проверка того же предмета через кэш OCR.
+
+Каждый тултип «захватывается» дважды с разными полями выделения и разным шумом
+сцены, в том числе под полупрозрачным фоном тултипа. Первая проверка проходит
+весь путь (обрезка, отпечаток, предобработка и, если есть tesseract, OCR),
+повторная — обрезку, отпечаток и поиск в кэше.
+Дополнительно проверяется, что тултип с одной изменённой цифрой не совпадает
+с исходным (ложное попадание вернуло бы чужой текст и чужую цену).
+"""
+import random
+import re
+import shutil
+import statistics
+import time
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_text_crop import _selection  # noqa: E402
+from benchmarks.bench_upscalers import FONT_SIZE, _render, image_set  # noqa: E402
+from config import get_settings  # noqa: E402
+from ocr_cache import OcrCache, fingerprint  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+from text_region import crop_to_text  # noqa: E402
+
+
+def _translucent(tooltip: np.ndarray, rng: random.Random) -> np.ndarray:
+    """Сцена, просвечивающая через фон тултипа: свой шум на каждый захват."""
+    noise = np.random.default_rng(rng.randrange(2 ** 32)).integers(-10, 11, size=tooltip.shape)
+    return np.clip(tooltip.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def _change_digit(text: str) -> str:
+    """Меняет последнюю цифру текста (другой ролл того же модификатора)."""
+    match = list(re.finditer(r"\d", text))[-1]
+    digit = str((int(match.group()) + 1) % 10)
+    return text[:match.start()] + digit + text[match.end():]
+
+
+def main() -> None:
+    rng = random.Random(17)
+    padding = get_settings().text_crop_padding
+    ocr = None
+    if shutil.which("tesseract") is not None:
+        from ocr_service import OcrService
+        ocr = OcrService(workers=1)
+
+    cache = OcrCache(maxsize=64)
+    first, repeat, false_hits = [], [], 0
+    try:
+        samples = image_set()
+        for text, tooltip, _ in samples:
+            frame, _ = _selection(_translucent(tooltip, rng), rng)
+            start = time.perf_counter()
+            cropped = crop_to_text(frame, padding)
+            key = fingerprint(cropped)
+            if cache.get(key) is None:
+                image = ScreenshotHandler.preprocess_frame(cropped)
+                cache.put(key, ocr.recognize(image).text if ocr else text)
+            first.append(time.perf_counter() - start)
+
+        for text, tooltip, _ in samples:
+            frame, _ = _selection(_translucent(tooltip, rng), rng)
+            start = time.perf_counter()
+            entry = cache.get(fingerprint(crop_to_text(frame, padding)))
+            repeat.append(time.perf_counter() - start)
+            assert entry is not None, "повторная проверка не попала в кэш"
+
+        for text, _, _ in samples:
+            changed = np.asarray(_render(_change_digit(text), FONT_SIZE))
+            frame, _ = _selection(_translucent(changed, rng), rng)
+            if cache.get(fingerprint(crop_to_text(frame, padding))) is not None:
+                false_hits += 1
+    finally:
+        if ocr is not None:
+            ocr.close()
+
+    info = cache.info()
+    print(f"тултипов: {len(samples)}, OCR: {'tesseract' if ocr else 'нет (только предобработка)'}")
+    print(f"первая проверка:    медиана {statistics.median(first) * 1e3:8.2f} ms")
+    print(f"повторная (кэш):    медиана {statistics.median(repeat) * 1e3:8.2f} ms, "
+          f"максимум {max(repeat) * 1e3:.2f} ms")
+    print(f"изменена одна цифра: ложных попаданий {false_hits} из {len(samples)}")
+    print(f"кэш: попаданий {info.hits}, промахов {info.misses}, доля попаданий {info.hit_rate:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Каскад OCR против постоянного x4 rus+eng на конвейере проверки (захват-заглушка).
+
+С установленным tesseract распознавание настоящее. Без него используется
+имитация: время пропорционально площади изображения (rus+eng дороже eng), а на
+первом уровне текст каждого четвёртого тултипа искажён в строках модификаторов
+(мелкий шрифт, не распознанный при x2) — такие проверки должны перейти на x4.
+Печатаются медианная стоимость проверки, распределение по уровням каскада
+и число проверок, разобранных так же, как эталонный текст.
+"""
+import random
+import shutil
+import statistics
+import time
+from concurrent.futures import CancelledError
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks import synthetic  # noqa: E402
+from benchmarks.bench_check_pipeline import StubScreen  # noqa: E402
+from catalog import load_catalog  # noqa: E402
+from check_pipeline import CheckJob, CheckPipeline, recognize_with_service  # noqa: E402
+from config import get_settings  # noqa: E402
+from ocr_cascade import TOOLTIP_WHITELIST, CascadeTier, OcrCascade  # noqa: E402
+from ocr_service import OcrResult  # noqa: E402
+from parsing_utils import IncrementalItemParser, parse_item  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+
+SECONDS_PER_MPIXEL = 0.4
+# Во сколько раз rus+eng медленнее одного языка (две модели)
+MULTILANG_COST = 1.6
+
+
+class SimulatedOcr:
+    def __init__(self, screen: StubScreen) -> None:
+        self.screen = screen
+
+    def __call__(self, image, on_section, cancel_event, lang=None, whitelist=None):
+        index = self.screen.last
+        text, frame = self.screen.samples[index]
+        scale = image.width // frame.width
+        cost = image.width * image.height / 1e6 * SECONDS_PER_MPIXEL
+        if cancel_event.wait(cost * (MULTILANG_COST if "+" in (lang or "rus+eng") else 1.0)):
+            raise CancelledError()
+        if scale < 4 and index % 4 == 0:
+            rng = random.Random(index)
+            text = "\n".join(line if i < 8 else synthetic.ocr_noise(synthetic.ocr_noise(line, rng), rng)
+                             for i, line in enumerate(text.split("\n")))
+        for section in text.split("\n--------\n"):
+            on_section(section)
+        return OcrResult(text, -1.0)
+
+
+def _run(pipeline: CheckPipeline, count: int):
+    timings, results = [], []
+    for rect in range(count):
+        start = time.perf_counter()
+        results.append(pipeline.run(CheckJob(rect, rect)))
+        timings.append(time.perf_counter() - start)
+    return timings, results
+
+
+def main() -> None:
+    settings = get_settings()
+    catalog = load_catalog(items_file="items.ndjson", stats_file="stats.ndjson")
+    screen = StubScreen()
+    real = shutil.which("tesseract") is not None
+    recognize = recognize_with_service if real else SimulatedOcr(screen)
+
+    def pipeline(cascade):
+        return CheckPipeline(
+            capture=screen.capture,
+            preprocess=ScreenshotHandler.process_frame,
+            parser_factory=lambda: IncrementalItemParser(catalog.item_lookup, catalog.stat_lookup, catalog.tier_index),
+            recognize=recognize,
+            cascade=cascade,
+        )
+
+    expected = [parse_item(text, catalog.item_lookup, catalog.stat_lookup, catalog.tier_index)
+                for text, _ in screen.samples]
+
+    def correct(results):
+        return sum((result.item and result.item.to_dict()) == (item and item.to_dict())
+                   for result, item in zip(results, expected))
+
+    cascade = OcrCascade([CascadeTier(settings.ocr_cascade_scale, settings.ocr_cascade_lang, TOOLTIP_WHITELIST),
+                          CascadeTier(settings.upscale_factor, settings.ocr_lang)],
+                         settings.ocr_cascade_min_confidence, settings.ocr_cascade_min_parse_rate)
+    count = len(screen.samples)
+    baseline, baseline_results = _run(pipeline(None), count)
+    cascaded, cascaded_results = _run(pipeline(cascade), count)
+
+    print(f"проверок: {count}, OCR: {'tesseract' if real else 'имитация'}")
+    print(f"всегда x{settings.upscale_factor} {settings.ocr_lang}: медиана {statistics.median(baseline) * 1e3:7.0f} ms, "
+          f"разобрано верно {correct(baseline_results)}/{count}")
+    print(f"каскад:               медиана {statistics.median(cascaded) * 1e3:7.0f} ms, "
+          f"разобрано верно {correct(cascaded_results)}/{count}")
+    for level, stats in enumerate(cascade.stats()):
+        print(f"  уровень {level} ({stats.tier.label}): закончили {stats.finished}, попыток {stats.attempts}, "
+              f"в среднем {stats.seconds / max(1, stats.attempts) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Задержка OCR на одну проверку: прежний холодный путь (pytesseract: новый процесс
+tesseract, временные файлы, загрузка моделей на каждый вызов) против тёплого пула
+OcrService. Нужен установленный tesseract с языками rus и eng.
+"""
+import shutil
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks._stubs import StubModule, install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks.bench_upscalers import image_set  # noqa: E402
+from frame import Frame  # noqa: E402
+from ocr_service import DEFAULT_LANG, DEFAULT_PSM, OcrService  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+
+CHECKS = 8
+
+
+def _images():
+    images = []
+    for _, small, _ in image_set()[:CHECKS]:
+        rgba = np.dstack([small, np.full(small.shape[:2], 255, dtype=np.uint8)])
+        images.append(ScreenshotHandler.preprocess_frame(Frame(rgba, "RGBA")))
+    return images
+
+
+def _timings(func, images):
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        func(image)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    if shutil.which("tesseract") is None:
+        print("tesseract не найден: бенчмарк пропущен")
+        return
+    images = _images()
+    print(f"проверок: {len(images)}, язык {DEFAULT_LANG}, psm {DEFAULT_PSM}")
+
+    if not isinstance(sys.modules.get("pytesseract"), StubModule):
+        import pytesseract
+        cold = _timings(lambda image: pytesseract.image_to_string(image, DEFAULT_LANG, f"--psm {DEFAULT_PSM}"), images)
+        print(f"pytesseract (холодный):  медиана {statistics.median(cold) * 1e3:7.0f} ms")
+    else:
+        print("pytesseract не установлен: холодный путь пропущен")
+
+    start = time.perf_counter()
+    service = OcrService(workers=1)
+    try:
+        first = _timings(service.recognize, images[:1])[0]
+        print(f"OcrService, первая проверка (с запуском пула): {(time.perf_counter() - start) * 1e3:7.0f} ms "
+              f"(распознавание {first * 1e3:.0f} ms)")
+        warm = _timings(service.recognize, images)
+        print(f"OcrService ({service.engine_factory.__name__}): медиана {statistics.median(warm) * 1e3:7.0f} ms")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
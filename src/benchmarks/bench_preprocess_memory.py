@@ -0,0 +1,82 @@
+"""
+Пиковая память и задержка предобработки захвата 1920x1080 (увеличение x4):
+
+  rgba-float32 — исходный порядок: RGBA увеличивается во float32 (как tf.image.resize),
+                 серый канал получается уже после увеличения;
+  rgb-uint8    — RGB без альфы, бэкенд из настроек, затем preprocess_for_ocr;
+  gray-first   — ScreenshotHandler.preprocess_frame: серый uint8 до увеличения, полосами.
+
+Каждый режим измеряется в отдельном подпроцессе (VmHWM из /proc, Linux).
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks._preprocess import preprocess_for_ocr, upscale  # noqa: E402
+from benchmarks.bench_upscalers import image_set  # noqa: E402
+from frame import Frame  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+from upscalers import get_upscaler  # noqa: E402
+
+MODES = ("rgba-float32", "rgb-uint8", "gray-first")
+WIDTH, HEIGHT = 1920, 1080
+
+
+def _status_kib(field: str) -> int:
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith(field + ":"))
+
+
+def _capture() -> Frame:
+    # Полноэкранный BGRA-захват, замощённый отрисованными тултипами
+    _, tooltip, _ = image_set()[0]
+    rows = -(-HEIGHT // tooltip.shape[0])
+    cols = -(-WIDTH // tooltip.shape[1])
+    rgb = np.tile(tooltip, (rows, cols, 1))[:HEIGHT, :WIDTH]
+    bgra = np.dstack([rgb[..., ::-1], np.full((HEIGHT, WIDTH), 255, dtype=np.uint8)])
+    return ScreenshotHandler.mask_regions(Frame.from_buffer(bgra.tobytes(), WIDTH, HEIGHT, WIDTH * 4))
+
+
+def _run_mode(mode: str, budget_mb: int) -> Image.Image:
+    frame = _capture()
+    rss_before = _status_kib("VmRSS")
+    start = time.perf_counter()
+    if mode == "rgba-float32":
+        upscaled = get_upscaler("numpy").upscale(frame.to_array("RGBA"), 4)
+        result = preprocess_for_ocr(upscaled)
+    elif mode == "rgb-uint8":
+        result = preprocess_for_ocr(upscale(frame.to_array("RGB"), 4))
+    else:
+        result = ScreenshotHandler.preprocess_frame(frame, 4, budget_mb * 2 ** 20)
+    elapsed = time.perf_counter() - start
+    peak = (_status_kib("VmHWM") - rss_before) / 1024
+    print(f"{mode:<13} {elapsed * 1e3:8.0f} ms   пик RSS +{peak:7.1f} MiB   результат {result.width}x{result.height}")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--budget-mb", type=int, default=32, help="Бюджет полос для gray-first.")
+    args = parser.parse_args()
+
+    if args.mode:
+        _run_mode(args.mode, args.budget_mb)
+        return
+
+    print(f"захват {WIDTH}x{HEIGHT}, увеличение x4, бюджет полос {args.budget_mb} MiB")
+    for mode in MODES:
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_preprocess_memory", "--mode", mode,
+                        "--budget-mb", str(args.budget_mb)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Всплески оценок против локального сервера торговли: число исходящих запросов.
+
+1. Ctrl+E по одному тултипу много раз подряд: одновременные оценки одного предмета.
+2. Очередь проверок нескольких предметов, часть из которых даёт одинаковый запрос.
+3. Быстрая смена проверок (как start_selection): каждая новая отменяет предыдущую.
+
+Для 1 и 2 печатается число запросов к серверу без совмещения и с совмещением
+(singleflight в PriceService), для 3 — без отмены и с отменой устаревших.
+Кэш цен выключен, чтобы считать только совмещение.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from catalog import load_catalog
+from pricing import PriceService, TradeCancelledError, TradeClient
+from pricing.mock_server import MockTradeServer
+from pricing.rate_limit import RateRule
+
+LATENCY = 0.05
+BURST = 8
+WORKERS = 4
+SUPERSEDE_INTERVAL = 0.02
+
+
+def _requests(server: MockTradeServer) -> int:
+    return server.requests["search"] + server.requests["fetch"]
+
+
+def _burst(server, catalog, items, coalesce: bool):
+    service = PriceService(TradeClient(server.url, "Standard", pool_size=len(items)), catalog.stats,
+                           coalesce=coalesce)
+    service.trade_stats
+    before = _requests(server)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        results = list(executor.map(service.price_item, items))
+    elapsed = time.perf_counter() - start
+    service.close()
+    return _requests(server) - before, elapsed, len({result.query_id for result in results})
+
+
+def _superseded(server, catalog, items, cancel: bool):
+    service = PriceService(TradeClient(server.url, "Standard", pool_size=WORKERS), catalog.stats)
+    service.trade_stats
+    before = _requests(server)
+    delivered, dropped = [], 0
+    current = None
+    futures = []
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        for item in items:
+            if cancel and current is not None:
+                current.set()
+            current = threading.Event()
+            futures.append(executor.submit(service.price_item, item, current))
+            time.sleep(SUPERSEDE_INTERVAL)
+        wait(futures)
+    for future in futures:
+        try:
+            delivered.append(future.result())
+        except TradeCancelledError:
+            dropped += 1
+    service.close()
+    return _requests(server) - before, len(delivered), dropped
+
+
+def main() -> None:
+    catalog = load_catalog(items_file="items.ndjson", stats_file="stats.ndjson")
+    bases = [item for item in catalog.items if item.get("namespace") == "ITEM"][::151]
+    rules = (RateRule(10 ** 6, 1, 0),)
+
+    with MockTradeServer(latency=LATENCY, search_rules=rules, fetch_rules=rules) as server:
+        print(f"задержка сервера {LATENCY * 1e3:.0f} ms")
+        spam = [bases[0]] * BURST
+        queued = [bases[index % 3] for index in range(BURST * 2)]
+        for name, items in ((f"{BURST} x Ctrl+E по одному предмету", spam),
+                            (f"{len(queued)} проверок 3 предметов", queued)):
+            print(name + ":")
+            for coalesce in (False, True):
+                requests, elapsed, distinct = _burst(server, catalog, items, coalesce)
+                print(f"  {'совмещение' if coalesce else 'без совмещения':15s}: запросов {requests:3d}, "
+                      f"{elapsed * 1e3:6.0f} ms, разных результатов {distinct}")
+
+        sequence = bases[1:1 + BURST * 2]
+        print(f"{len(sequence)} проверок разных предметов каждые {SUPERSEDE_INTERVAL * 1e3:.0f} ms, "
+              f"{WORKERS} потока:")
+        for cancel in (False, True):
+            requests, delivered, dropped = _superseded(server, catalog, sequence, cancel)
+            print(f"  {'отмена устаревших' if cancel else 'без отмены':17s}: запросов {requests:3d}, "
+                  f"оценок доставлено {delivered}, отброшено до отправки {dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Кэш цен (PriceCache) на пути оценки против локального сервера торговли с задержкой.
+
+Печатается время оценки пачки предметов и число запросов к серверу:
+без кэша, первый проход (промахи), повтор (память), после «перезапуска»
+(новый PriceCache на том же файле — диск) и после истечения TTL
+(просроченные отдаются сразу, обновление идёт в фоне).
+"""
+import os
+import tempfile
+import time
+
+from catalog import load_catalog
+from pricing import PriceCache, PriceService, TradeClient
+from pricing.cache import parse_ttls
+from pricing.mock_server import MockTradeServer
+from pricing.rate_limit import RateRule
+
+LATENCY = 0.03
+ITEMS = 20
+TTLS = "Currency=600,UNIQUE=3600"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _pass(service: PriceService, items, server: MockTradeServer):
+    before = sum(server.requests.values())
+    start = time.perf_counter()
+    for item in items:
+        service.price_item(item)
+    return time.perf_counter() - start, sum(server.requests.values()) - before
+
+
+def main() -> None:
+    catalog = load_catalog(items_file="items.ndjson", stats_file="stats.ndjson")
+    items = [item for item in catalog.items if item.get("namespace") == "ITEM"][::97][:ITEMS]
+    rules = (RateRule(10 ** 6, 1, 0),)
+    clock = Clock()
+
+    with tempfile.TemporaryDirectory() as directory, \
+            MockTradeServer(latency=LATENCY, search_rules=rules, fetch_rules=rules) as server:
+        path = os.path.join(directory, "prices.sqlite3")
+
+        def service(cache):
+            result = PriceService(TradeClient(server.url, "Standard"), catalog.stats, cache)
+            result.trade_stats
+            return result
+
+        def cache():
+            return PriceCache(path, ttl=1800, category_ttls=parse_ttls(TTLS), clock=clock)
+
+        plain = service(None)
+        rows = [("без кэша", *_pass(plain, items, server))]
+        plain.close()
+
+        cached = service(cache())
+        rows.append(("первый проход", *_pass(cached, items, server)))
+        rows.append(("повтор (память)", *_pass(cached, items, server)))
+        cached.close()
+
+        restarted = service(cache())
+        rows.append(("перезапуск (диск)", *_pass(restarted, items, server)))
+        clock.now += 7200
+        rows.append(("после TTL (stale)", *_pass(restarted, items, server)))
+        before = sum(server.requests.values())
+        restarted._refresh_executor.shutdown(wait=True)
+        refreshed = sum(server.requests.values()) - before
+        info = restarted.cache.info()
+        restarted.close()
+
+    print(f"предметов: {len(items)}, задержка сервера {LATENCY * 1e3:.0f} ms")
+    for name, elapsed, requests in rows:
+        print(f"  {name:18s}: {elapsed * 1e3:8.1f} ms, запросов к серверу {requests}")
+    print(f"  фоновое обновление просроченных: запросов {refreshed}")
+    print(f"  метрики последнего кэша: {info}")
+
+
+if __name__ == "__main__":
+    main()
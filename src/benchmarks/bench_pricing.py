@@ -0,0 +1,102 @@
+"""
+Клиент торговли против локального сервера (pricing.mock_server) с задержкой.
+
+1. Keep-alive пул против нового соединения на каждый запрос: время запроса
+   и число открытых TCP-соединений. На loopback соединение почти бесплатно;
+   с настоящим сервером пул экономит ещё и TCP/TLS-рукопожатие на каждом запросе.
+2. Пачка проверок при строгих правилах сервера: с RateLimiter (ожидание по
+   заголовкам) и без него — число ответов 429, неудавшихся проверок и время.
+"""
+import http.client
+import json
+import statistics
+import time
+
+from catalog import load_catalog
+from pricing import PriceService, RateLimiter, TradeClient, TradeError
+from pricing.mock_server import MockTradeServer
+from pricing.rate_limit import RateRule
+
+LATENCY = 0.005
+REQUESTS = 60
+BURST = 12
+STRICT_SEARCH = (RateRule(4, 2, 10),)
+STRICT_FETCH = (RateRule(8, 2, 10),)
+QUERY = {"query": {"status": {"option": "online"}, "type": "Expert Hooded Cloak"}, "sort": {"price": "asc"}}
+
+
+class NoLimit(RateLimiter):
+    """Клиент, не читающий заголовки ограничения."""
+
+    def acquire(self, policy: str, cancel_event=None) -> float:
+        return 0.0
+
+    def update(self, policy, headers, status=None) -> None:
+        pass
+
+
+def _new_connection_per_request(server: MockTradeServer) -> float:
+    host, port = server.server_address[:2]
+    body = json.dumps(QUERY).encode("utf-8")
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection(host, port)
+    connection.request("POST", "/api/trade2/search/Standard", body,
+                       {"Content-Type": "application/json", "Connection": "close"})
+    connection.getresponse().read()
+    connection.close()
+    return time.perf_counter() - start
+
+
+def _pooled(client: TradeClient) -> float:
+    start = time.perf_counter()
+    client.search(QUERY)
+    return time.perf_counter() - start
+
+
+def _connections(requests: int, pooled: bool):
+    rules = (RateRule(10 ** 6, 1, 0),)
+    with MockTradeServer(latency=LATENCY, search_rules=rules, fetch_rules=rules) as server:
+        client = TradeClient(server.url, "Standard")
+        timings = [_pooled(client) if pooled else _new_connection_per_request(server) for _ in range(requests)]
+        client.close()
+        return timings, server.connections
+
+
+def _burst(service_items, stats, limiter: RateLimiter):
+    with MockTradeServer(latency=LATENCY, search_rules=STRICT_SEARCH, fetch_rules=STRICT_FETCH) as server:
+        service = PriceService(TradeClient(server.url, "Standard", limiter=limiter), stats)
+        service.trade_stats
+        failed = 0
+        start = time.perf_counter()
+        for item in service_items:
+            try:
+                service.price_item(item)
+            except TradeError:
+                failed += 1
+        elapsed = time.perf_counter() - start
+        service.client.close()
+        return elapsed, failed, server.limited, sum(server.requests.values())
+
+
+def main() -> None:
+    catalog = load_catalog(items_file="items.ndjson", stats_file="stats.ndjson")
+    bases = [item for item in catalog.items if item.get("namespace") == "ITEM"][:BURST]
+
+    fresh, fresh_connections = _connections(REQUESTS, pooled=False)
+    pooled, pooled_connections = _connections(REQUESTS, pooled=True)
+    print(f"запросов: {REQUESTS}, задержка сервера {LATENCY * 1e3:.0f} ms")
+    print(f"новое соединение на запрос: медиана {statistics.median(fresh) * 1e3:6.2f} ms, "
+          f"соединений {fresh_connections}")
+    print(f"keep-alive пул:             медиана {statistics.median(pooled) * 1e3:6.2f} ms, "
+          f"соединений {pooled_connections}")
+
+    print(f"пачка из {len(bases)} проверок, правила search {STRICT_SEARCH[0].hits}/{STRICT_SEARCH[0].period:g} с, "
+          f"fetch {STRICT_FETCH[0].hits}/{STRICT_FETCH[0].period:g} с:")
+    for name, limiter in (("без ограничения", NoLimit()), ("RateLimiter", RateLimiter())):
+        elapsed, failed, limited, requests = _burst(bases, catalog.stats, limiter)
+        print(f"  {name:16s}: {elapsed:5.1f} с, запросов {requests}, ответов 429: {limited}, "
+              f"неудачных проверок {failed}, ожидание {limiter.waited:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
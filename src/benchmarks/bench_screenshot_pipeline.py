@@ -0,0 +1,101 @@
+"""
+Задержка и выделения памяти по стадиям конвейера скриншота на полноэкранном
+захвате: прежний путь (построчное копирование, BGRA->RGBA, PIL) против Frame.
+
+Апсемплинг сравнивается отдельно: python -m benchmarks.bench_upscalers.
+Выделения считаются через tracemalloc (numpy сообщает о своих буферах,
+внутренние буферы PIL не видны).
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks._preprocess import preprocess_for_ocr, upscale  # noqa: E402
+from frame import Frame  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+
+# Полноэкранный захват Retina 5K; CoreGraphics выравнивает строки, отсюда запас в bytes_per_row
+WIDTH, HEIGHT = 5120, 2880
+BYTES_PER_ROW = WIDTH * 4 + 64
+
+
+def _capture() -> bytes:
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, 256, size=(HEIGHT, BYTES_PER_ROW), dtype=np.uint8)
+    return rows.tobytes()
+
+
+def _legacy_convert(raw_data: bytes) -> Image.Image:
+    data = np.frombuffer(raw_data, dtype=np.uint8)
+    out = np.zeros((HEIGHT, WIDTH, 4), dtype=np.uint8)
+    for row_index in range(HEIGHT):
+        start = row_index * BYTES_PER_ROW
+        out[row_index, :, :] = data[start:start + WIDTH * 4].reshape((WIDTH, 4))
+    out = out[:, :, [2, 1, 0, 3]]
+    return Image.fromarray(out, "RGBA")
+
+
+def _legacy_mask(image: Image.Image) -> Image.Image:
+    draw = ImageDraw.Draw(image)
+    for region in [(0, 0, 80, 80), (image.width - 80, 0, image.width, 80)]:
+        draw.rectangle(list(region), fill="black")
+    return image
+
+
+def _legacy_upscale_input(image: Image.Image) -> np.ndarray:
+    # Прежний upscale_with_tensorflow начинал с np.array(pil_image)
+    return np.array(image)
+
+
+def _legacy_preprocess(image: Image.Image) -> Image.Image:
+    gray = image.convert("L")
+    high_contrast = ImageEnhance.Contrast(gray).enhance(2.0)
+    filtered = high_contrast.filter(ImageFilter.MedianFilter(size=3))
+    return filtered.point(lambda p: 255 if p > 128 else 0)
+
+
+def _stage(name: str, func, *args, repeat: int = 3):
+    best = float("inf")
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"  {name:<28} {best * 1e3:9.2f} ms   пик выделений {peak / 2 ** 20:8.1f} MiB")
+    return result
+
+
+def main() -> None:
+    raw_data = _capture()
+    print(f"захват {WIDTH}x{HEIGHT}, bytes_per_row={BYTES_PER_ROW}, {len(raw_data) / 2 ** 20:.1f} MiB")
+
+    print("прежний конвейер:")
+    image = _stage("CGImage -> PIL RGBA", _legacy_convert, raw_data)
+    image = _stage("маски (ImageDraw)", _legacy_mask, image)
+    _stage("вход апсемплинга (np.array)", _legacy_upscale_input, image)
+    legacy = _stage("предобработка (PIL)", _legacy_preprocess, image)
+
+    print("Frame:")
+    frame = _stage("CGImage -> Frame (view)", Frame.from_buffer, raw_data, WIDTH, HEIGHT, BYTES_PER_ROW)
+    frame = _stage("маски (отложенные)", ScreenshotHandler.mask_regions, frame)
+    pixels = _stage("вход апсемплинга (RGB)", frame.to_array, "RGB")
+    current = _stage("предобработка (numpy)", preprocess_for_ocr, pixels)
+    _stage("предобработка из luma()", lambda: preprocess_for_ocr(frame.luma()))
+
+    diff = np.count_nonzero(np.asarray(legacy) != np.asarray(current))
+    print(f"различающихся пикселей после бинаризации: {diff} из {WIDTH * HEIGHT}")
+    _stage("апсемплинг x4 (600x400)", upscale, pixels[:600, :400], 4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Сравнение прежнего линейного перебора регулярных выражений
+с предкомпилированным CompiledStatMatcher на тултипе редкого предмета.
+"""
+import re
+import time
+
+from parsing_utils import load_ndjson, build_item_lookup, build_stat_lookup, parse_item
+
+RARE_TOOLTIP = """Gold Ring
+Rarity: Rare
+Item Level: 81
++6% to all Elemental Resistances
++45 to maximum Life
++32% to Fire Resistance
++28% to Cold Resistance
+12% reduced Cold Damage
+Adds 3 to 15 Fire Damage to Attacks
++18 to Dexterity
++21 to Intelligence
+22% increased Rarity of Items found
++3 to Spirit
+Corrupted
+Some flavour text"""
+
+
+def _legacy_lookup(stats):
+    lookup = {}
+    for stat in stats:
+        for matcher in stat.get("matchers", []):
+            pattern = re.escape(matcher["string"]).replace(r"\#", r"(\d+)")
+            lookup[pattern] = stat
+    return lookup
+
+
+def _legacy_parse(lines, stat_lookup):
+    lines = [line.strip() for line in lines.split("\n") if line.strip()]
+    found = []
+    for line in lines[1:]:
+        for pattern, stat in stat_lookup.items():
+            if re.match(pattern, line, re.IGNORECASE):
+                found.append(stat)
+                break
+    return found
+
+
+def _best_of(func, repeat, number):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main() -> None:
+    stats = load_ndjson("stats.ndjson")
+    items = load_ndjson("items.ndjson")
+    item_lookup = build_item_lookup(items)
+
+    start = time.perf_counter()
+    legacy_lookup = _legacy_lookup(stats)
+    legacy_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = build_stat_lookup(stats)
+    compiled_build = time.perf_counter() - start
+
+    legacy = _best_of(lambda: _legacy_parse(RARE_TOOLTIP, legacy_lookup), repeat=3, number=3)
+    compiled = _best_of(lambda: parse_item(RARE_TOOLTIP, item_lookup, matcher), repeat=5, number=200)
+
+    print(f"матчеров: {len(matcher)}")
+    print(f"построение индекса: legacy {legacy_build * 1e3:.1f} ms, compiled {compiled_build * 1e3:.1f} ms")
+    print(f"разбор тултипа (15 строк): legacy {legacy * 1e3:.2f} ms, compiled {compiled * 1e6:.1f} µs")
+    print(f"ускорение: x{legacy / compiled:.0f}")
+    info = matcher.cache_info()
+    print(f"кэш шаблонов: hits {info.hits}, misses {info.misses}, "
+          f"hit rate {info.hits / max(1, info.hits + info.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
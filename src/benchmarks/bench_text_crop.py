@@ -0,0 +1,76 @@
+"""
+Обрезка выделения до области текста: сколько пикселей не доходит до увеличения и OCR.
+
+Тултипы отрисовываются внутри «небрежного» выделения со случайными полями
+(тёмный фон с шумом, как сцена за тултипом). Для каждого захвата печатаются
+площадь до/после, время поиска области и время предобработки с обрезкой и без,
+а также проверяется, что весь отрисованный текст остался внутри области.
+"""
+import random
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks._stubs import install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks.bench_upscalers import BACKGROUND, image_set  # noqa: E402
+from config import get_settings  # noqa: E402
+from frame import Frame  # noqa: E402
+from screenshot_handler import ScreenshotHandler  # noqa: E402
+from text_region import find_text_bbox  # noqa: E402
+
+
+def _selection(tooltip: np.ndarray, rng: random.Random):
+    """Выделение с полями 20-150% размера тултипа; возвращает кадр и истинную область текста."""
+    h, w = tooltip.shape[:2]
+    top, bottom = rng.randint(h // 5, h * 3 // 2), rng.randint(h // 5, h * 3 // 2)
+    left, right = rng.randint(w // 5, w * 3 // 2), rng.randint(w // 5, w * 3 // 2)
+    noise = np.random.default_rng(rng.randrange(2 ** 32)).integers(-6, 7, size=(h + top + bottom, w + left + right, 3))
+    canvas = np.clip(np.array(BACKGROUND) + noise, 0, 255).astype(np.uint8)
+    canvas[top:top + h, left:left + w] = tooltip
+
+    ink = np.argwhere(np.any(tooltip != BACKGROUND, axis=2))
+    (y0, x0), (y1, x1) = ink.min(axis=0), ink.max(axis=0)
+    truth = (left + x0, top + y0, left + x1 + 1, top + y1 + 1)
+
+    bgra = np.dstack([canvas[..., ::-1], np.full(canvas.shape[:2], 255, dtype=np.uint8)])
+    height, width = canvas.shape[:2]
+    return Frame.from_buffer(bgra.tobytes(), width, height, width * 4), truth
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    rng = random.Random(11)
+    padding = get_settings().text_crop_padding
+    saved, speedups = [], []
+    print(f"{'выделение':>12} {'область':>12} {'сэкономлено':>11} {'поиск':>8} {'без обрезки':>12} {'с обрезкой':>11} текст")
+    for _, tooltip, _ in image_set():
+        frame, truth = _selection(tooltip, rng)
+        box, find_time = _timed(find_text_bbox, frame, 4, padding)
+        cropped = frame.crop(*box) if box else frame
+        _, full_time = _timed(ScreenshotHandler.preprocess_frame, frame, 4)
+        _, crop_time = _timed(ScreenshotHandler.preprocess_frame, cropped, 4)
+
+        kept = box is not None and box[0] <= truth[0] and box[1] <= truth[1] \
+            and box[2] >= truth[2] and box[3] >= truth[3]
+        full_pixels = frame.width * frame.height
+        crop_pixels = cropped.width * cropped.height
+        saved.append(1 - crop_pixels / full_pixels)
+        speedups.append(full_time / crop_time)
+        print(f"{frame.width:>5}x{frame.height:<6} {cropped.width:>5}x{cropped.height:<6} {saved[-1]:>10.0%} "
+              f"{find_time * 1e3:>6.2f}ms {full_time * 1e3:>10.0f}ms {crop_time * 1e3:>9.0f}ms "
+              f"{'цел' if kept else 'ОБРЕЗАН'}")
+    print(f"в среднем сэкономлено {statistics.mean(saved):.0%} пикселей, "
+          f"предобработка быстрее в {statistics.mean(speedups):.1f} раза")
+
+
+if __name__ == "__main__":
+    main()
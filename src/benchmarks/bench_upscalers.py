@@ -0,0 +1,133 @@
+"""
+Сравнение бэкендов апсемплинга на фиксированном наборе синтетических тултипов:
+стоимость первого импорта (время и прирост RSS в отдельном процессе, Linux), задержка,
+пик выделений numpy и точность.
+
+Точность: если установлены pytesseract и tesseract — доля совпавших символов OCR
+с исходным текстом; иначе — доля пикселей бинаризованного результата, совпавших
+с бинаризацией того же текста, сразу отрисованного в 4 раза крупнее.
+"""
+import difflib
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmarks._stubs import StubModule, install_platform_stubs
+
+install_platform_stubs()
+
+from benchmarks._preprocess import preprocess_for_ocr  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+from parsing_utils import load_ndjson  # noqa: E402
+from upscalers import available_upscalers, get_upscaler  # noqa: E402
+
+SCALE = 4
+FONT_SIZE = 12
+IMAGE_COUNT = 8
+# Цвета тултипа в игре: светлый текст на тёмном фоне
+BACKGROUND = (12, 10, 8)
+FOREGROUND = (200, 190, 170)
+
+# ru_maxrss дочернего процесса на Linux наследует пик родителя, поэтому читаем текущий VmRSS
+_IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+def rss_kib():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+before = rss_kib()
+start = time.perf_counter()
+from upscalers import get_upscaler
+get_upscaler({name!r})
+print(json.dumps({{"seconds": time.perf_counter() - start, "rss_kib": rss_kib() - before}}))
+"""
+
+
+def _render(text: str, font_size: int) -> Image.Image:
+    font = ImageFont.load_default(size=font_size)
+    lines = text.split("\n")
+    line_height = round(font_size * 1.4)
+    width = max(round(font.getlength(line)) for line in lines) + font_size * 2
+    image = Image.new("RGB", (width, line_height * len(lines) + font_size), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(lines):
+        draw.text((font_size, font_size // 2 + index * line_height), line, fill=FOREGROUND, font=font)
+    return image
+
+
+def image_set() -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    """(текст, захват в исходном размере, тот же текст в SCALE раз крупнее)."""
+    texts = synthetic.make_tooltips(load_ndjson("items.ndjson"), load_ndjson("stats.ndjson"), IMAGE_COUNT, seed=7)
+    result = []
+    for text in texts:
+        small = np.asarray(_render(text, FONT_SIZE))
+        large = _render(text, FONT_SIZE * SCALE)
+        # Крупная отрисовка подгоняется к точному размеру апсемплинга
+        large = large.resize((small.shape[1] * SCALE, small.shape[0] * SCALE))
+        result.append((text, small, np.asarray(large)))
+    return result
+
+
+def _ocr_available() -> bool:
+    return not isinstance(sys.modules.get("pytesseract"), StubModule) and shutil.which("tesseract") is not None
+
+
+def _accuracy(text: str, upscaled: np.ndarray, reference: np.ndarray) -> float:
+    binarized = preprocess_for_ocr(upscaled)
+    if _ocr_available():
+        import pytesseract
+        recognized = pytesseract.image_to_string(binarized, "eng", "--psm 6")
+        return difflib.SequenceMatcher(None, text, recognized.strip()).ratio()
+    expected = np.asarray(preprocess_for_ocr(reference))
+    return float(np.mean(np.asarray(binarized) == expected))
+
+
+def _import_cost(name: str) -> dict:
+    src = sys.path[0] if sys.path[0] else "."
+    output = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(src=src, name=name)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_backend(name: str, images) -> dict:
+    upscaler = get_upscaler(name)
+    latencies, peaks, scores = [], [], []
+    for text, small, reference in images:
+        upscaler.upscale(small, SCALE)  # прогрев
+        tracemalloc.start()
+        start = time.perf_counter()
+        upscaled = upscaler.upscale(small, SCALE)
+        latencies.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        scores.append(_accuracy(text, upscaled, reference))
+    return {
+        "import": _import_cost(name),
+        "latency_ms": statistics.median(latencies) * 1e3,
+        "peak_mib": max(peaks) / 2 ** 20,
+        "accuracy": statistics.mean(scores),
+    }
+
+
+def main() -> None:
+    images = image_set()
+    pixels = statistics.mean(small.shape[0] * small.shape[1] for _, small, _ in images)
+    metric = "OCR, доля символов" if _ocr_available() else "совпадение с отрисовкой x4, доля пикселей"
+    print(f"изображений: {len(images)}, в среднем {pixels:.0f} пикселей, x{SCALE}; точность: {metric}")
+    print(f"{'бэкенд':<12} {'импорт':>10} {'RSS импорта':>12} {'задержка':>10} {'пик numpy':>10} {'точность':>9}")
+    for name in available_upscalers():
+        result = bench_backend(name, images)
+        print(f"{name:<12} {result['import']['seconds'] * 1e3:>7.0f} ms {result['import']['rss_kib'] / 1024:>8.1f} MiB "
+              f"{result['latency_ms']:>7.2f} ms {result['peak_mib']:>6.1f} MiB {result['accuracy']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Headless-набор бенчмарков каталога и разбора тултипов с JSON-отчётом.
+
+Запуск из каталога src:
+    python -m benchmarks.run -o bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.2
+
+В режиме сравнения код возврата 1, если медиана какого-либо замера
+выросла больше чем на threshold относительно базовой линии. Также код 1,
+если модуль приложения не импортируется или нечитаемый текст OCR
+(UNREADABLE_OCR) разобран как предмет.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from benchmarks._stubs import install_platform_stubs
+
+STUBBED_MODULES = install_platform_stubs()
+
+from benchmarks import synthetic  # noqa: E402
+from parsing_utils import (  # noqa: E402
+    DATA_DIR, load_ndjson, build_item_lookup, build_stat_lookup, find_item_by_name, find_stat_by_line, parse_item,
+)
+
+SCHEMA_VERSION = 1
+DEFAULT_FRACTIONS = (0.25, 0.5, 1.0)
+DEFAULT_THRESHOLD = 0.15
+# Модули приложения, которые должны импортироваться без macOS (с заглушками)
+APP_MODULES = ("overlay", "screenshot_handler", "mouse_tracking_panel", "text_editor_overlay",
+               "key_listener", "process_handler")
+# Нечитаемый текст OCR экрана (без "Rarity:"): разбор должен вернуть None ("предмет не найден"),
+# а не слабого кандидата нечёткого поиска
+UNREADABLE_OCR = (
+    "Loading",
+    "Simple Robe\nQuality: +12%\nRequires: Level 20",
+    "Tabula Rasa\nSimple Robe\nItem Level: 68\n+25% to Fire Resistance",
+)
+
+
+def measure(func: Callable[[], object], repeat: int, number: int) -> Dict[str, float]:
+    """
+    Время одного вызова func: repeat серий по number вызовов.
+
+    :return: Медиана, минимум и максимум по сериям (секунды на вызов).
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples),
+            "repeat": repeat, "number": number}
+
+
+def _cycle(values: Sequence) -> Callable[[], object]:
+    # Каждый вызов берёт следующее значение: замер усредняется по всему набору входов
+    state = {"i": 0}
+
+    def _next():
+        value = values[state["i"] % len(values)]
+        state["i"] += 1
+        return value
+    return _next
+
+
+def bench_size(label: str, items: List[dict], stats: List[dict], repeat: int, scale: float) -> Dict[str, dict]:
+    """Все замеры для одного размера каталога."""
+    number = lambda n: max(1, round(n * scale))  # noqa: E731
+    results: Dict[str, dict] = {}
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        synthetic.write_catalog(items, stats, data_dir)
+
+        def _load():
+            load_ndjson.cache_clear()
+            load_ndjson("items.ndjson", data_dir)
+            load_ndjson("stats.ndjson", data_dir)
+        results["load_ndjson"] = measure(_load, repeat, number(1))
+    load_ndjson.cache_clear()
+
+    results["build_item_lookup"] = measure(lambda: build_item_lookup(items), repeat, number(1))
+    results["build_stat_lookup"] = measure(lambda: build_stat_lookup(stats), repeat, number(1))
+
+    item_lookup = build_item_lookup(items)
+    stat_lookup = build_stat_lookup(stats)
+
+    exact_names = _cycle(synthetic.make_item_names(items, 256, seed=1))
+    noisy_names = _cycle(synthetic.make_item_names(items, 256, seed=2, noise=1.0))
+    results["find_item_by_name"] = measure(lambda: find_item_by_name(item_lookup, exact_names()),
+                                           repeat, number(2000))
+    results["find_item_by_name_fuzzy"] = measure(lambda: find_item_by_name(item_lookup, noisy_names()),
+                                                 repeat, number(200))
+
+    stat_lines = synthetic.make_stat_lines(stats, 512, seed=3)
+    if stat_lines:
+        # Холодный кэш шаблонов: каждая серия начинается с пустого кэша
+        def _find_stat_cold():
+            stat_lookup.cache_clear()
+            for line in stat_lines:
+                find_stat_by_line(stat_lookup, line)
+        cold = measure(_find_stat_cold, repeat, number(1))
+        results["find_stat_by_line"] = {**cold, **{k: cold[k] / len(stat_lines) for k in ("median", "min", "max")}}
+        warm_lines = _cycle(stat_lines)
+        results["find_stat_by_line_cached"] = measure(lambda: find_stat_by_line(stat_lookup, warm_lines()),
+                                                      repeat, number(5000))
+
+    tooltips = _cycle(synthetic.make_tooltips(items, stats, 256, seed=4, noise=0.1))
+    results["parse_item"] = measure(lambda: parse_item(tooltips(), item_lookup, stat_lookup),
+                                    repeat, number(500))
+    ocr_tooltips = _cycle(synthetic.make_tooltips(items, stats, 256, seed=5, noise=0.1, ocr=True))
+    results["parse_item_ocr"] = measure(lambda: parse_item(ocr_tooltips(), item_lookup, stat_lookup),
+                                        repeat, number(500))
+
+    for name, result in results.items():
+        result["size"] = label
+        result["items"] = len(items)
+        result["stats"] = len(stats)
+    return {f"{label}/{name}": result for name, result in results.items()}
+
+
+def check_imports() -> Dict[str, Optional[str]]:
+    """Импортирует модули приложения; значение — текст ошибки или None."""
+    errors: Dict[str, Optional[str]] = {}
+    for module in APP_MODULES:
+        try:
+            importlib.import_module(module)
+            errors[module] = None
+        except Exception as e:
+            errors[module] = f"{type(e).__name__}: {e}"
+    return errors
+
+
+def check_unreadable(items: List[dict], stats: List[dict]) -> Dict[str, Optional[str]]:
+    """Разбирает UNREADABLE_OCR; значение — название найденного предмета или None."""
+    item_lookup, stat_lookup = build_item_lookup(items), build_stat_lookup(stats)
+    found: Dict[str, Optional[str]] = {}
+    for text in UNREADABLE_OCR:
+        parsed = parse_item(text, item_lookup, stat_lookup)
+        found[text.replace("\n", " / ")] = parsed.item["name"] if parsed else None
+    return found
+
+
+def run(fractions: Sequence[float] = DEFAULT_FRACTIONS, repeat: int = 5, scale: float = 1.0,
+        data_dir: str = DATA_DIR) -> dict:
+    """Выполняет все замеры и возвращает отчёт (словарь, сериализуемый в JSON)."""
+    all_items = load_ndjson("items.ndjson", data_dir)
+    all_stats = load_ndjson("stats.ndjson", data_dir)
+
+    results: Dict[str, dict] = {}
+    for fraction in fractions:
+        label = f"{round(fraction * 100)}%"
+        items = synthetic.subset(all_items, round(len(all_items) * fraction), seed=0)
+        stats = synthetic.subset(all_stats, round(len(all_stats) * fraction), seed=0)
+        print(f"[{label}] items={len(items)} stats={len(stats)}", file=sys.stderr)
+        results.update(bench_size(label, items, stats, repeat, scale))
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "scale": scale,
+            "stubbed_modules": STUBBED_MODULES,
+            "imports": check_imports(),
+            "unreadable": check_unreadable(all_items, all_stats),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Сравнивает медианы замеров с базовой линией.
+
+    :return: Строки сравнения; status — "regression", "improvement", "ok" или "new".
+    """
+    rows = []
+    base_results = baseline.get("results", {})
+    for name, result in current["results"].items():
+        base = base_results.get(name)
+        if base is None:
+            rows.append({"name": name, "current": result["median"], "baseline": None, "ratio": None, "status": "new"})
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "current": result["median"], "baseline": base["median"],
+                     "ratio": ratio, "status": status})
+    return rows
+
+
+def _format_time(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def print_report(report: dict, rows: Optional[List[dict]] = None, stream=sys.stderr) -> None:
+    """Печатает таблицу замеров (и сравнения, если есть) для человека."""
+    if rows is None:
+        for name, result in report["results"].items():
+            print(f"{name:<40} {_format_time(result['median']):>12}", file=stream)
+    else:
+        for row in rows:
+            ratio = f"x{row['ratio']:.2f}" if row["ratio"] is not None else ""
+            print(f"{row['name']:<40} {_format_time(row['baseline']):>12} -> {_format_time(row['current']):>12} "
+                  f"{ratio:>7} {row['status']}", file=stream)
+    failed = {module: error for module, error in report["meta"]["imports"].items() if error}
+    for module, error in failed.items():
+        print(f"импорт {module} не удался: {error}", file=stream)
+    for text, name in report["meta"]["unreadable"].items():
+        if name:
+            print(f"нечитаемый текст разобран как {name}: {text}", file=stream)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless-бенчмарки каталога и разбора тултипов.")
+    parser.add_argument("-o", "--output", help="Куда записать JSON-отчёт (по умолчанию stdout).")
+    parser.add_argument("--baseline", help="JSON-отчёт прошлого запуска для сравнения.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимый рост медианы (доля, по умолчанию %(default)s).")
+    parser.add_argument("--fractions", type=float, nargs="+", default=list(DEFAULT_FRACTIONS),
+                        help="Размеры каталога как доли полного (по умолчанию %(default)s).")
+    parser.add_argument("--repeat", type=int, default=5, help="Серий на замер (медиана по сериям).")
+    parser.add_argument("--quick", action="store_true", help="В 10 раз меньше вызовов в серии.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Каталог с items.ndjson и stats.ndjson.")
+    args = parser.parse_args(argv)
+
+    report = run(args.fractions, args.repeat, 0.1 if args.quick else 1.0, args.data_dir)
+
+    rows = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        rows = compare(report, baseline, args.threshold)
+        report["comparison"] = {"baseline": os.path.abspath(args.baseline), "threshold": args.threshold,
+                                "rows": rows}
+    print_report(report, rows)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    import_failed = any(report["meta"]["imports"].values())
+    misparsed = any(report["meta"]["unreadable"].values())
+    regressed = rows is not None and any(row["status"] == "regression" for row in rows)
+    return 1 if import_failed or misparsed or regressed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
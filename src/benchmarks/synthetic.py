@@ -0,0 +1,135 @@
+"""
+Синтетические данные для бенчмарков: подмножества каталога заданного размера
+и тултипы, собранные из реальных записей items.ndjson и stats.ndjson.
+"""
+import json
+import os
+import random
+import re
+from typing import List, Optional, Sequence
+
+_SLOT_RE = re.compile(r"#")
+_SEPARATOR = "--------"
+_RARE_PREFIXES = ("Doom", "Storm", "Blood", "Grim", "Dusk", "Hate", "Gale", "Rune")
+_RARE_SUFFIXES = ("Loop", "Grasp", "Shell", "Bite", "Song", "Veil", "Coil", "Spark")
+
+
+def subset(records: Sequence[dict], size: int, seed: int = 0) -> List[dict]:
+    """Случайное подмножество записей размера size в исходном порядке."""
+    if size >= len(records):
+        return list(records)
+    rng = random.Random(seed)
+    return [records[i] for i in sorted(rng.sample(range(len(records)), size))]
+
+
+def write_ndjson(records: Sequence[dict], path: str) -> str:
+    """Записывает записи в ndjson-файл (формат data/*.ndjson)."""
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False))
+            file.write("\n")
+    return path
+
+
+def write_catalog(items: Sequence[dict], stats: Sequence[dict], data_dir: str) -> str:
+    """Записывает подмножество каталога в data_dir как items.ndjson и stats.ndjson."""
+    write_ndjson(items, os.path.join(data_dir, "items.ndjson"))
+    write_ndjson(stats, os.path.join(data_dir, "stats.ndjson"))
+    return data_dir
+
+
+def _modifier_templates(stats: Sequence[dict]) -> List[str]:
+    # Однострочные шаблоны торгуемых статов (многострочные содержат литеральный "\\n")
+    return [
+        matcher["string"]
+        for stat in stats if "id" in stat
+        for matcher in stat.get("matchers", [])
+        if "\\n" not in matcher["string"] and "\n" not in matcher["string"] and not matcher.get("negate")
+    ]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return _SLOT_RE.sub(lambda _: str(rng.randint(1, 120)), template)
+
+
+def ocr_noise(text: str, rng: random.Random) -> str:
+    """Одна типичная ошибка OCR: замена, пропуск или удвоение буквы."""
+    letters = [i for i, char in enumerate(text) if char.isalpha()]
+    if not letters:
+        return text
+    i = rng.choice(letters)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return text[:i] + rng.choice("ilo01") + text[i + 1:]
+    if kind == 1:
+        return text[:i] + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def make_tooltip(item: dict, templates: Sequence[str], rng: random.Random,
+                 modifiers: int = 6, noise: float = 0.0, ocr: bool = False) -> str:
+    """
+    Собирает тултип предмета в формате, который копирует игра:
+    класс, редкость, имя, свойства, требования и секцию модификаторов.
+
+    :param ocr: Текст как после OCR экрана: без строк "Item Class:" и "Rarity:"
+                и без разделителей секций (на экране это линии, а не текст).
+    """
+    category = (item.get("craftable") or {}).get("category")
+    if item.get("namespace") == "UNIQUE":
+        rarity = "Unique"
+        name_lines = [item["name"], (item.get("unique") or {}).get("base", item["name"])]
+    elif category:
+        rarity = "Rare"
+        name_lines = [f"{rng.choice(_RARE_PREFIXES)} {rng.choice(_RARE_SUFFIXES)}", item["name"]]
+    else:
+        rarity = "Normal"
+        name_lines = [item["name"]]
+    if noise and rng.random() < noise:
+        name_lines[-1] = ocr_noise(name_lines[-1], rng)
+
+    lines = []
+    if category:
+        lines.append(f"Item Class: {category}")
+    lines += [f"Rarity: {rarity}", *name_lines, _SEPARATOR,
+              f"Quality: +{rng.randint(0, 20)}%", _SEPARATOR,
+              f"Requires: Level {rng.randint(1, 80)}", _SEPARATOR,
+              f"Item Level: {rng.randint(1, 82)}", _SEPARATOR]
+    if templates:
+        lines.append(_fill(rng.choice(templates), rng) + " (implicit)")
+        lines.append(_SEPARATOR)
+        lines += [_fill(rng.choice(templates), rng) for _ in range(modifiers)]
+    if ocr:
+        lines = [line for line in lines if line != _SEPARATOR and not line.startswith(("Item Class:", "Rarity:"))]
+    return "\n".join(lines)
+
+
+def make_tooltips(items: Sequence[dict], stats: Sequence[dict], count: int, seed: int = 0,
+                  noise: float = 0.0, templates: Optional[List[str]] = None, ocr: bool = False) -> List[str]:
+    """
+    Генерирует count тултипов по предметам и статам каталога.
+
+    :param noise: Доля тултипов с OCR-ошибкой в названии базы.
+    :param ocr: Тултипы в виде текста OCR экрана (см. make_tooltip).
+    """
+    rng = random.Random(seed)
+    templates = _modifier_templates(stats) if templates is None else templates
+    return [make_tooltip(rng.choice(items), templates, rng, noise=noise, ocr=ocr) for _ in range(count)]
+
+
+def make_stat_lines(stats: Sequence[dict], count: int, seed: int = 0) -> List[str]:
+    """Строки модификаторов с числами вместо '#' (для find_stat_by_line)."""
+    rng = random.Random(seed)
+    templates = _modifier_templates(stats)
+    return [_fill(rng.choice(templates), rng) for _ in range(count)] if templates else []
+
+
+def make_item_names(items: Sequence[dict], count: int, seed: int = 0, noise: float = 0.0) -> List[str]:
+    """Названия предметов каталога; доля noise — с OCR-ошибкой."""
+    rng = random.Random(seed)
+    names: List[str] = []
+    for _ in range(count):
+        name = rng.choice(items)["name"]
+        names.append(ocr_noise(name, rng) if noise and rng.random() < noise else name)
+    return names
+
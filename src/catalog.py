@@ -0,0 +1,310 @@
+import gc
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import zlib
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+from logger_config import logger
+from item_index import ItemNameIndex
+from parsing_utils import DATA_DIR, load_ndjson, build_item_lookup, build_stat_lookup
+from stat_matcher import CompiledStatMatcher
+from tier_index import TierIndex
+
+# Поднимается при каждом изменении состава или классов pickle снимка:
+# 2 — ленивые статы, 3 — TierIndex и кэш шаблонов CompiledStatMatcher, 4 — поле автомата ItemNameIndex
+CATALOG_VERSION = 4
+SNAPSHOT_FILE = "catalog.bin"
+ITEMS_FILE = "items.ndjson"
+STATS_FILE = "stats.ndjson"
+
+# Поля стата, которые нужны для сопоставления строк и всегда держатся в памяти.
+# Остальное (tiers, trade) декодируется по требованию.
+LIGHT_STAT_KEYS = ("ref", "id", "better", "matchers")
+RECORD_CACHE_SIZE = 64
+
+# magic, версия формата, отпечаток исходных ndjson (sha256), crc32 тела,
+# длина pickle-индексов, длина секции записей (json-строки полных статов)
+_MAGIC = b"POE2CAT\0"
+_HEADER = struct.Struct("<8sI32sIQQ")
+
+
+class CatalogError(Exception):
+    """Снимок каталога отсутствует, повреждён или устарел."""
+
+
+class RecordStore:
+    """
+    Доступ к полным json-записям статов через mmap с небольшим LRU-кэшем.
+    """
+
+    def __init__(self, path: str, base_offset: int = 0, cache_size: int = RECORD_CACHE_SIZE) -> None:
+        self.path = path
+        self.base_offset = base_offset
+        with open(path, "rb") as file:
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.record = lru_cache(maxsize=cache_size)(self._decode)
+
+    def _decode(self, offset: int, length: int) -> dict:
+        start = self.base_offset + offset
+        return json.loads(self._mapped[start:start + length])
+
+    def close(self) -> None:
+        self.record.cache_clear()
+        self._mapped.close()
+
+
+class LazyStat(Mapping):
+    """
+    Стат, у которого в памяти только поля LIGHT_STAT_KEYS и смещение полной записи.
+    Обращение к остальным ключам (tiers, trade, ...) декодирует запись из RecordStore.
+    """
+
+    __slots__ = ("_light", "_offset", "_length", "_store")
+
+    def __init__(self, light: dict, offset: int, length: int, store: Optional[RecordStore] = None) -> None:
+        self._light = light
+        self._offset = offset
+        self._length = length
+        self._store = store
+
+    def full_record(self) -> dict:
+        """Полная запись стата (декодируется при первом обращении)."""
+        return self._store.record(self._offset, self._length)
+
+    def __getitem__(self, key):
+        if key in LIGHT_STAT_KEYS:
+            return self._light[key]
+        return self.full_record()[key]
+
+    def __contains__(self, key) -> bool:
+        if key in LIGHT_STAT_KEYS:
+            return key in self._light
+        return key in self.full_record()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.full_record())
+
+    def __len__(self) -> int:
+        return len(self.full_record())
+
+    def __repr__(self) -> str:
+        return f"LazyStat({self._light.get('id') or self._light.get('ref')!r})"
+
+    def __getstate__(self):
+        # Хранилище (mmap) не сериализуется и привязывается после загрузки снимка.
+        return self._light, self._offset, self._length
+
+    def __setstate__(self, state) -> None:
+        self._light, self._offset, self._length = state
+        self._store = None
+
+
+class Catalog:
+    """
+    Справочник предметов и статов вместе с готовыми индексами поиска.
+    """
+
+    def __init__(self, items: List[dict], stats: List[Mapping], item_lookup=None, stat_lookup=None,
+                 source: str = "ndjson", record_store: Optional[RecordStore] = None,
+                 tier_index: Optional[TierIndex] = None) -> None:
+        self.items = items
+        self.stats = stats
+        self.item_lookup = item_lookup if item_lookup is not None else build_item_lookup(items)
+        self.stat_lookup = stat_lookup if stat_lookup is not None else build_stat_lookup(stats)
+        self.tier_index = tier_index if tier_index is not None else TierIndex(stats)
+        self.source = source
+        self.record_store = record_store
+
+    @property
+    def lazy(self) -> bool:
+        return self.record_store is not None
+
+    def clear_caches(self) -> None:
+        """Сбрасывает кэши, зависящие от содержимого каталога (при его перезагрузке)."""
+        self.stat_lookup.cache_clear()
+        if self.record_store is not None:
+            self.record_store.record.cache_clear()
+
+
+# Классы, чьи объекты лежат в pickle снимка: изменение их модулей меняет формат
+_PICKLED_CLASSES = (ItemNameIndex, CompiledStatMatcher, TierIndex, LazyStat)
+
+
+@lru_cache(maxsize=1)
+def code_fingerprint() -> bytes:
+    """
+    Отпечаток исходного кода модулей классов из снимка: снимок, записанный другой
+    версией кода, отбрасывается, даже если CATALOG_VERSION забыли поднять.
+    Если исходник недоступен (собранное приложение), учитывается только имя модуля.
+    """
+    digest = hashlib.sha256()
+    for module_name in sorted({cls.__module__ for cls in _PICKLED_CLASSES}):
+        digest.update(module_name.encode("utf-8"))
+        try:
+            with open(sys.modules[module_name].__file__, "rb") as file:
+                digest.update(file.read())
+        except (OSError, TypeError):
+            pass
+    return digest.digest()
+
+
+def source_fingerprint(data_dir: str = DATA_DIR, items_file: str = ITEMS_FILE, stats_file: str = STATS_FILE) -> bytes:
+    """
+    Дешёвый отпечаток исходных файлов (имя, размер, mtime) и кода формата
+    для проверки актуальности снимка.
+    """
+    digest = hashlib.sha256()
+    digest.update(struct.pack("<I", CATALOG_VERSION))
+    digest.update(code_fingerprint())
+    for file_name in (items_file, stats_file):
+        stat = os.stat(os.path.join(data_dir, file_name))
+        digest.update(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.digest()
+
+
+def build_catalog(data_dir: str = DATA_DIR, output_path: Optional[str] = None,
+                  items_file: str = ITEMS_FILE, stats_file: str = STATS_FILE) -> str:
+    """
+    Компилирует ndjson-файлы из data_dir в бинарный снимок с готовыми индексами.
+    Полные записи статов кладутся отдельной секцией и декодируются лениво.
+
+    :return: Путь к записанному снимку.
+    """
+    output_path = output_path or os.path.join(data_dir, SNAPSHOT_FILE)
+
+    records = bytearray()
+    stats = []
+    tier_index = TierIndex()
+    for stat in load_ndjson(stats_file, data_dir):
+        line = json.dumps(stat, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        light = {key: stat[key] for key in LIGHT_STAT_KEYS if key in stat}
+        stats.append(LazyStat(light, len(records), len(line)))
+        tier_index.add_stat(stat)
+        records += line + b"\n"
+
+    catalog = Catalog(load_ndjson(items_file, data_dir), stats, tier_index=tier_index)
+    payload = pickle.dumps(
+        {
+            "items": catalog.items,
+            "stats": catalog.stats,
+            "item_lookup": catalog.item_lookup,
+            "stat_lookup": catalog.stat_lookup,
+            "tier_index": catalog.tier_index,
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    header = _HEADER.pack(
+        _MAGIC,
+        CATALOG_VERSION,
+        source_fingerprint(data_dir, items_file, stats_file),
+        zlib.crc32(records, zlib.crc32(payload)),
+        len(payload),
+        len(records),
+    )
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        file.write(payload)
+        file.write(records)
+    os.replace(tmp_path, output_path)
+    logger.info("Снимок каталога записан: %s (%d байт)", output_path, len(header) + len(payload) + len(records))
+    return output_path
+
+
+def load_snapshot(snapshot_path: str, expected_fingerprint: Optional[bytes] = None) -> Catalog:
+    """
+    Загружает снимок каталога через mmap. Статы остаются ленивыми (LazyStat).
+
+    :raises CatalogError: Если снимок отсутствует, повреждён или не соответствует исходным данным.
+    """
+    try:
+        file = open(snapshot_path, "rb")
+    except FileNotFoundError:
+        raise CatalogError(f"Снимок каталога не найден: {snapshot_path}")
+
+    with file:
+        if os.fstat(file.fileno()).st_size < _HEADER.size:
+            raise CatalogError("Снимок каталога обрезан.")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with mapped:
+        magic, version, fingerprint, checksum, payload_length, records_length = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC or version != CATALOG_VERSION:
+            raise CatalogError(f"Неподдерживаемый формат снимка (версия {version}).")
+        if expected_fingerprint is not None and fingerprint != expected_fingerprint:
+            raise CatalogError("Снимок каталога устарел.")
+
+        with memoryview(mapped)[_HEADER.size:] as body:
+            if len(body) != payload_length + records_length or zlib.crc32(body) != checksum:
+                raise CatalogError("Контрольная сумма снимка не совпадает.")
+            # Сборщик мусора не нужен при распаковке сотен тысяч только что созданных объектов.
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                data = pickle.loads(body[:payload_length])
+                items, stats, tier_index = data["items"], data["stats"], data["tier_index"]
+                item_lookup, stat_lookup = data["item_lookup"], data["stat_lookup"]
+            except Exception as e:
+                # Снимок другой версии кода: классы переименованы, поля состояния изменились и т. п.
+                raise CatalogError(f"Снимок каталога не распакован: {e!r}.") from e
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+
+    store = RecordStore(snapshot_path, base_offset=_HEADER.size + payload_length)
+    for stat in stats:
+        stat._store = store
+    return Catalog(items, stats, item_lookup, stat_lookup,
+                   source="snapshot", record_store=store, tier_index=tier_index)
+
+
+def load_lazy_stats(stats_path: str, tier_index: Optional[TierIndex] = None) -> List[LazyStat]:
+    """
+    Читает stats.ndjson, оставляя в памяти только лёгкие поля и смещения строк.
+    Если передан tier_index, таблицы тиров заполняются из полных записей по ходу чтения.
+    """
+    store = RecordStore(stats_path)
+    stats = []
+    offset = 0
+    with open(stats_path, "rb") as file:
+        for line in file:
+            stat = json.loads(line)
+            light = {key: stat[key] for key in LIGHT_STAT_KEYS if key in stat}
+            stats.append(LazyStat(light, offset, len(line), store))
+            if tier_index is not None:
+                tier_index.add_stat(stat)
+            offset += len(line)
+    return stats
+
+
+def load_catalog(data_dir: str = DATA_DIR, items_file: str = ITEMS_FILE, stats_file: str = STATS_FILE,
+                 use_snapshot: bool = True, lazy: bool = True) -> Catalog:
+    """
+    Загружает каталог: сначала из актуального снимка, иначе из ndjson.
+
+    :param lazy: Держать в памяти только индекс матчеров, а полные записи статов
+                 декодировать по требованию (mmap + LRU).
+    """
+    if use_snapshot and (items_file, stats_file) == (ITEMS_FILE, STATS_FILE):
+        snapshot_path = os.path.join(data_dir, SNAPSHOT_FILE)
+        try:
+            catalog = load_snapshot(snapshot_path, source_fingerprint(data_dir, items_file, stats_file))
+            logger.info("Каталог загружен из снимка %s.", snapshot_path)
+            return catalog
+        except CatalogError as e:
+            logger.info("Снимок каталога не используется: %s Загрузка из ndjson.", e)
+
+    items = load_ndjson(items_file, data_dir)
+    if lazy:
+        tier_index = TierIndex()
+        stats = load_lazy_stats(os.path.join(data_dir, stats_file), tier_index)
+        return Catalog(items, stats, record_store=stats[0]._store if stats else None, tier_index=tier_index)
+    return Catalog(items, load_ndjson(stats_file, data_dir))
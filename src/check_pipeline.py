@@ -0,0 +1,239 @@
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, NamedTuple, Optional
+
+from PIL import Image
+
+from config import get_settings
+from frame import Frame
+from logger_config import logger
+from ocr_bands import recognize_bands
+from ocr_cache import CacheEntry, OcrCache, fingerprint
+from ocr_cascade import OcrCascade
+from ocr_service import OcrResult, get_ocr_service
+from parsed_item import ParsedItem
+
+Rect = Any
+# (изображение, on_section, cancel_event, lang, whitelist) -> OcrResult
+Recognizer = Callable[[Image.Image, Optional[Callable[[str], None]], threading.Event, Optional[str], Optional[str]],
+                      OcrResult]
+
+
+class CheckStage(Enum):
+    Capture = "capture"
+    Preprocess = "preprocess"
+    Ocr = "ocr"
+    Parse = "parse"
+    Price = "price"
+
+
+class CheckError(Exception):
+    """Стадия проверки не дала результата (нет скриншота, предобработка не удалась)."""
+
+
+class CheckCancelledError(Exception):
+    """Проверка отменена: её результат устарел."""
+
+
+class CheckResult(NamedTuple):
+    text: str
+    item: Optional[ParsedItem]
+    price: Any = None
+    # Текст взят из кэша OCR, увеличение и распознавание пропущены
+    cached: bool = False
+    cache_entry: Optional[CacheEntry] = None
+    # Уровень каскада OCR, на котором закончилась проверка
+    ocr_level: Optional[int] = None
+
+
+class CheckJob:
+    """Одна проверка предмета; отменяется флагом, который стадии проверяют между шагами."""
+
+    def __init__(self, job_id: int, rect: Rect) -> None:
+        self.id = job_id
+        self.rect = rect
+        self.stage: Optional[CheckStage] = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise CheckCancelledError(f"Проверка {self.id} отменена.")
+
+
+def recognize_with_service(image: Image.Image, on_section: Optional[Callable[[str], None]],
+                           cancel_event: threading.Event, lang: Optional[str] = None,
+                           whitelist: Optional[str] = None) -> OcrResult:
+    """Распознавание по умолчанию: полосами на пуле OcrService процесса (Settings.ocr_bands*)."""
+    settings = get_settings()
+    return recognize_bands(get_ocr_service(), image, settings.ocr_bands or None, on_section,
+                           settings.ocr_band_min_height, cancel_event, lang, whitelist)
+
+
+def _call(callback: Callable[[], None]) -> None:
+    callback()
+
+
+class CheckPipeline:
+    """
+    Конвейер проверки предмета вне главного потока:
+    захват -> (кэш OCR) -> предобработка -> OCR -> разбор -> цена.
+    С каскадом предобработка и OCR повторяются на следующем уровне, пока результат
+    не примет OcrCascade.accepts.
+
+    Стадии передаются функциями, поэтому конвейер работает без AppKit
+    (например, с захватом из файла). Проверки выполняются в рабочем потоке;
+    progress/result/error-колбэки доставляются через dispatch — для интерфейса
+    это постановка вызова в главный поток, по умолчанию прямой вызов.
+    Новая проверка отменяет незавершённые: их результат не доставляется,
+    а ещё не начатые полосы OCR снимаются с очереди.
+    """
+
+    def __init__(self, capture: Callable[[Rect], Optional[Frame]],
+                 preprocess: Callable[[Frame, Optional[int]], Optional[Image.Image]],
+                 parser_factory: Callable[[], Any],
+                 recognize: Recognizer = recognize_with_service,
+                 price: Optional[Callable[[ParsedItem], Any]] = None,
+                 cache: Optional[OcrCache] = None,
+                 cascade: Optional[OcrCascade] = None,
+                 dispatch: Callable[[Callable[[], None]], None] = _call) -> None:
+        self.capture = capture
+        self.preprocess = preprocess
+        self.parser_factory = parser_factory
+        self.recognize = recognize
+        self.price = price
+        self.cache = cache
+        self.cascade = cascade
+        self.dispatch = dispatch
+        self._ids = itertools.count(1)
+        # Последняя проверка; остаётся здесь и после завершения, пока её результат
+        # ждёт главного потока — новая проверка успеет его отменить
+        self._current: Optional[CheckJob] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CheckPipeline")
+
+    def submit(self, rect: Rect, on_result: Callable[[CheckJob, CheckResult], None],
+               on_progress: Optional[Callable[[CheckJob, CheckStage], None]] = None,
+               on_error: Optional[Callable[[CheckJob, Exception], None]] = None) -> CheckJob:
+        """Отменяет текущие проверки и ставит новую; возвращается сразу."""
+        job = CheckJob(next(self._ids), rect)
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._current = job
+        self._executor.submit(self._run, job, on_result, on_progress, on_error)
+        return job
+
+    def cancel(self) -> None:
+        """Отменяет незавершённую проверку (её результат не будет доставлен)."""
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._current = None
+
+    def close(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+    def run(self, job: CheckJob, on_progress: Optional[Callable[[CheckJob, CheckStage], None]] = None) -> CheckResult:
+        """
+        Выполняет стадии проверки в текущем потоке.
+
+        :raises CheckCancelledError: Проверка отменена между стадиями или во время OCR.
+        :raises CheckError: Стадия не дала результата.
+        """
+        def enter(stage: CheckStage) -> None:
+            job.raise_if_cancelled()
+            job.stage = stage
+            if on_progress is not None:
+                on_progress(job, stage)
+
+        enter(CheckStage.Capture)
+        frame = self.capture(job.rect)
+        if frame is None:
+            raise CheckError("Не удалось получить скриншот.")
+
+        key = fingerprint(frame) if self.cache is not None else None
+        entry = self.cache.get(key) if self.cache is not None else None
+        if entry is not None:
+            text, item, cached = entry.text, entry.parsed, True
+            if item is None:
+                enter(CheckStage.Parse)
+                parser = self.parser_factory()
+                parser.feed(text)
+                item = entry.parsed = parser.result()
+        else:
+            text, parser, level = self._recognize(job, frame, enter)
+
+            # Секции разобраны по мере распознавания полос; здесь только итог
+            enter(CheckStage.Parse)
+            item, cached = parser.result(), False
+            if self.cache is not None:
+                entry = self.cache.put(key, text, item)
+
+        price = None
+        if self.price is not None and item is not None:
+            enter(CheckStage.Price)
+            price = self.price(item)
+        job.raise_if_cancelled()
+        return CheckResult(text, item, price, cached, entry, None if cached else level)
+
+    def _recognize(self, job: CheckJob, frame: Frame, enter: Callable[[CheckStage], None]):
+        """
+        Предобработка и OCR по уровням каскада (без каскада — один уровень по настройкам).
+        :return: (текст, парсер с результатом разбора, номер уровня или None без каскада).
+        """
+        tiers = self.cascade.tiers if self.cascade is not None else (None,)
+        for level, tier in enumerate(tiers):
+            start = time.perf_counter()
+            enter(CheckStage.Preprocess)
+            image = self.preprocess(frame, tier.scale if tier else None)
+            if image is None:
+                raise CheckError("Не удалось обработать скриншот.")
+
+            enter(CheckStage.Ocr)
+            parser = self.parser_factory()
+            try:
+                result = self.recognize(image, parser.feed, job.cancel_event,
+                                        tier.lang if tier else None, tier.whitelist if tier else None)
+            except CancelledError:
+                raise CheckCancelledError(f"Проверка {job.id} отменена во время OCR.") from None
+            if self.cascade is None:
+                return result.text, parser, None
+
+            self.cascade.record_attempt(level, time.perf_counter() - start)
+            if self.cascade.accepts(level, result, parser.hit_rate):
+                self.cascade.record_finished(level)
+                logger.info("OCR: уровень %d (%s), уверенность %.0f, статов найдено %.0f%%.",
+                            level, tier.label, result.confidence, 100 * parser.hit_rate)
+                return result.text, parser, level
+
+    def _run(self, job: CheckJob, on_result, on_progress, on_error) -> None:
+        def progress(job: CheckJob, stage: CheckStage) -> None:
+            self.dispatch(lambda: job.cancelled or on_progress(job, stage))
+
+        try:
+            result = self.run(job, progress if on_progress is not None else None)
+        except CheckCancelledError as e:
+            logger.debug("%s", e)
+            return
+        except Exception as e:
+            # Ожидаемую ошибку стадии показывает on_error; непредвиденную — с трассировкой здесь
+            expected = isinstance(e, CheckError)
+            if not expected or on_error is None:
+                logger.error("Ошибка проверки %d на стадии %s: %s", job.id,
+                             job.stage.value if job.stage else "-", e, exc_info=not expected)
+            if on_error is not None:
+                self.dispatch(lambda: job.cancelled or on_error(job, e))
+            return
+        # Отмена могла прийти, пока вызов ждал главного потока
+        self.dispatch(lambda: job.cancelled or on_result(job, result))
@@ -0,0 +1,62 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from batch_parsing import DEFAULT_CHUNK_SIZE, write_batch
+from catalog import build_catalog
+from logger_config import redirect_console_to_stderr
+from parsing_utils import DATA_DIR
+
+
+def _build_catalog_command(args: argparse.Namespace) -> int:
+    path = build_catalog(args.data_dir, args.output)
+    print(path)
+    return 0
+
+
+def _parse_batch_command(args: argparse.Namespace) -> int:
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        write_batch(input_stream, output_stream, jobs=args.jobs, data_dir=args.data_dir, chunk_size=args.chunk_size)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Консольные команды без графического интерфейса.
+
+    Примеры:
+        python -m cli build-catalog --data-dir ../data
+        python -m cli parse-batch dumps.txt --jobs 8 > parsed.ndjson
+    """
+    # stdout занят результатами команд, логи идут в stderr
+    redirect_console_to_stderr()
+
+    parser = argparse.ArgumentParser(prog="poe2-price-checker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build-catalog", help="Скомпилировать data/*.ndjson в бинарный снимок.")
+    build_parser.add_argument("--data-dir", default=DATA_DIR, help="Каталог с items.ndjson и stats.ndjson.")
+    build_parser.add_argument("--output", default=None, help="Путь к снимку (по умолчанию data/catalog.bin).")
+    build_parser.set_defaults(handler=_build_catalog_command)
+
+    batch_parser = subparsers.add_parser("parse-batch", help="Разобрать тексты предметов в NDJSON.")
+    batch_parser.add_argument("input", nargs="?", default="-", help="Файл с текстами предметов ('-' — stdin).")
+    batch_parser.add_argument("--output", "-o", default="-", help="Файл результата ('-' — stdout).")
+    batch_parser.add_argument("--jobs", "-j", type=int, default=1, help="Количество процессов разбора.")
+    batch_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Предметов на одно задание пула.")
+    batch_parser.add_argument("--data-dir", default=DATA_DIR, help="Каталог с items.ndjson и stats.ndjson.")
+    batch_parser.set_defaults(handler=_parse_batch_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from logger_config import logger
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(BASE_DIR, "settings.json")
+# Переопределение любого поля через окружение: POE2PC_<ПОЛЕ>, например POE2PC_UPSCALER=numpy
+ENV_PREFIX = "POE2PC_"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Настройки приложения. Значения по умолчанию перекрываются settings.json,
+    а затем переменными окружения POE2PC_*.
+    """
+    # Бэкенд увеличения скриншота: pillow, numpy, tensorflow, opencv
+    upscaler: str = "pillow"
+    upscale_factor: int = 4
+    # Бюджет промежуточных буферов предобработки (полосы увеличенного изображения)
+    preprocess_memory_budget_mb: int = 32
+    # Обрезка выделения до области текста перед увеличением; отступ в пикселях захвата
+    text_crop: bool = True
+    text_crop_padding: int = 6
+    # Фоновая запись отладочных кадров конвейера (по умолчанию выключена)
+    debug_frames: bool = False
+    debug_frames_dir: str = ""
+    debug_frames_per_stage: int = 5
+    # Пул рабочих процессов OCR
+    ocr_workers: int = 2
+    ocr_lang: str = "rus+eng"
+    ocr_psm: int = 6
+    ocr_timeout: float = 10.0
+    # Параллельное распознавание полосами по разделителям секций:
+    # наибольшее число полос (0 — по числу процессов OCR, 1 — без деления), мин. высота полосы
+    ocr_bands: int = 0
+    ocr_band_min_height: int = 200
+    # Каскад OCR: сначала дешёвый уровень (увеличение, язык, белый список символов),
+    # затем upscale_factor и ocr_lang, если уверенность или доля найденных статов ниже порогов
+    ocr_cascade: bool = True
+    ocr_cascade_scale: int = 2
+    ocr_cascade_lang: str = "eng"
+    ocr_cascade_whitelist: bool = True
+    ocr_cascade_min_confidence: float = 70.0
+    ocr_cascade_min_parse_rate: float = 0.8
+    # Кэш результатов OCR по перцептивному хешу кадра (0 записей — выключен)
+    ocr_cache_size: int = 64
+    ocr_cache_ttl: float = 300.0
+    ocr_cache_max_distance: int = 12
+    # Сервер торговли: адрес (для отладки — python -m pricing.mock_server), лига,
+    # keep-alive соединений в пуле, таймаут и число лотов для оценки
+    trade_url: str = "https://www.pathofexile.com"
+    trade_league: str = "Standard"
+    trade_pool_size: int = 2
+    trade_timeout: float = 10.0
+    trade_listings: int = 10
+    # Кэш цен: LRU в памяти (0 записей — выключен) перед SQLite на диске (по умолчанию data/prices.sqlite3);
+    # TTL по умолчанию и по категориям (craftable.category, UNIQUE), сколько ещё отдавать просроченные
+    price_cache_size: int = 256
+    price_cache_file: str = ""
+    price_cache_ttl: float = 1800.0
+    price_cache_ttls: str = "Currency=600,MapFragment=900,UNIQUE=3600"
+    price_cache_stale: float = 86400.0
+    # Снимок цен для предзагрузки (пусто — выключено): http(s)://.../{league}, путь или file://;
+    # например http://127.0.0.1:8080/api/bulk/{league} у pricing.mock_server. Интервал и категории индекса
+    bulk_price_url: str = ""
+    bulk_price_interval: float = 900.0
+    bulk_price_categories: str = "Currency,MapFragment,Breachstone,Omen,SoulCore,Active Skill Gem,Support Skill Gem,UNIQUE"
+
+
+def _coerce(value: str, default: Any) -> Any:
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def load_settings(path: Optional[str] = SETTINGS_FILE, environ: Optional[Dict[str, str]] = None) -> Settings:
+    """
+    Собирает настройки из файла (если он есть) и окружения.
+    Неизвестные ключи и некорректные значения пропускаются с предупреждением в лог.
+    """
+    environ = os.environ if environ is None else environ
+    known = {field.name: field.default for field in fields(Settings)}
+    values: Dict[str, Any] = {}
+
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning("Не удалось прочитать настройки %s: %s", path, e)
+            data = {}
+        for key, value in data.items():
+            if key in known:
+                values[key] = value
+            else:
+                logger.warning("Неизвестный параметр настроек: %s", key)
+
+    for name, default in known.items():
+        raw = environ.get(ENV_PREFIX + name.upper())
+        if raw is None:
+            continue
+        try:
+            values[name] = _coerce(raw, default)
+        except ValueError:
+            logger.warning("Некорректное значение %s%s=%r", ENV_PREFIX, name.upper(), raw)
+
+    return replace(Settings(), **values)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Настройки процесса (читаются один раз)."""
+    return load_settings()
@@ -0,0 +1,24 @@
+from enum import Enum
+
+
+class TooltipSection(Enum):
+    Header = "header"
+    Properties = "properties"
+    Requirements = "requirements"
+    Status = "status"
+    Implicit = "implicit"
+    Explicit = "explicit"
+    Enchant = "enchant"
+    Rune = "rune"
+    Crafted = "crafted"
+    Flavour = "flavour"
+
+
+# Секции, строки которых сопоставляются со статами.
+MODIFIER_SECTIONS = frozenset({
+    TooltipSection.Implicit,
+    TooltipSection.Explicit,
+    TooltipSection.Enchant,
+    TooltipSection.Rune,
+    TooltipSection.Crafted,
+})
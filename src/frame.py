@@ -0,0 +1,149 @@
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Прямоугольник маски (left, top, right, bottom) включительно, как у ImageDraw.rectangle.
+Region = Tuple[int, int, int, int]
+
+# Коэффициенты ITU-R 601-2 в фиксированной точке (16 бит) — как у PIL при convert("L").
+_LUMA_R, _LUMA_G, _LUMA_B = 19595, 38470, 7471
+_LUMA_STRIP_ROWS = 256
+
+
+def rgb_to_luma(rgb: np.ndarray, strip_rows: int = _LUMA_STRIP_ROWS) -> np.ndarray:
+    """
+    Переводит массив (H, W, 3) в оттенки серого uint8 (H, W), совпадающие с PIL convert("L").
+    Принимает и непрерывные массивы, и strided-представления; промежуточные
+    uint32-буферы ограничены полосой из strip_rows строк.
+    """
+    height, width = rgb.shape[:2]
+    out = np.empty((height, width), dtype=np.uint8)
+    acc = np.empty((min(strip_rows, height), width), dtype=np.uint32)
+    tmp = np.empty_like(acc)
+    for top in range(0, height, strip_rows):
+        strip = rgb[top:top + strip_rows]
+        rows = strip.shape[0]
+        a, t = acc[:rows], tmp[:rows]
+        np.multiply(strip[..., 0], _LUMA_R, out=a, dtype=np.uint32)
+        np.multiply(strip[..., 1], _LUMA_G, out=t, dtype=np.uint32)
+        a += t
+        np.multiply(strip[..., 2], _LUMA_B, out=t, dtype=np.uint32)
+        a += t
+        a += 0x8000
+        a >>= 16
+        out[top:top + rows] = a
+    return out
+
+
+class Frame:
+    """
+    Кадр захвата экрана поверх исходного буфера без копирования.
+
+    Буфер оборачивается strided-представлением numpy (H, W, каналы) с учётом
+    выравнивания строк (bytes_per_row). Выбор каналов (BGRA -> RGB) тоже
+    даёт представление, а не копию. Маски хранятся как список прямоугольников
+    и применяются только при материализации (to_array, luma, to_pil).
+    """
+
+    __slots__ = ("_pixels", "channel_order", "_masks")
+
+    def __init__(self, pixels: np.ndarray, channel_order: str = "RGBA", masks: Tuple[Region, ...] = ()) -> None:
+        if pixels.ndim != 3 or pixels.shape[2] != len(channel_order):
+            raise ValueError(f"Ожидался массив (H, W, {len(channel_order)}), получен {pixels.shape}.")
+        self._pixels = pixels
+        self.channel_order = channel_order
+        self._masks = masks
+
+    @classmethod
+    def from_buffer(cls, buffer, width: int, height: int, bytes_per_row: int,
+                    channel_order: str = "BGRA") -> "Frame":
+        """
+        Оборачивает сырой буфер захвата (например, CFData из CGDataProviderCopyData).
+
+        :raises ValueError: Если в буфере меньше байт, чем нужно для кадра.
+        """
+        channels = len(channel_order)
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        if height and data.size < bytes_per_row * (height - 1) + width * channels:
+            raise ValueError("Недостаточно байт для полного изображения.")
+        pixels = np.ndarray(
+            shape=(height, width, channels),
+            dtype=np.uint8,
+            buffer=data,
+            strides=(bytes_per_row, channels, 1),
+        )
+        pixels.flags.writeable = False
+        return cls(pixels, channel_order)
+
+    @classmethod
+    def from_pil(cls, image: Image.Image) -> "Frame":
+        """Кадр из PIL.Image (RGB/RGBA) — для отладки и бенчмарков."""
+        return cls(np.asarray(image), image.mode)
+
+    @property
+    def width(self) -> int:
+        return self._pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self._pixels.shape[0]
+
+    @property
+    def masks(self) -> Tuple[Region, ...]:
+        return self._masks
+
+    @property
+    def pixels(self) -> np.ndarray:
+        """Исходное представление буфера (без масок, только для чтения)."""
+        return self._pixels
+
+    def channels(self, order: str = "RGB") -> np.ndarray:
+        """
+        Представление с нужным порядком каналов без копирования, если порядок
+        выражается срезом (BGRA -> RGB — срез с отрицательным шагом).
+        Без учёта масок.
+        """
+        indices = [self.channel_order.index(channel) for channel in order]
+        if len(indices) == 1:
+            return self._pixels[..., indices[0]]
+        step = indices[1] - indices[0]
+        if step and all(b - a == step for a, b in zip(indices, indices[1:])):
+            stop: Optional[int] = indices[-1] + step
+            return self._pixels[..., indices[0]:(None if stop < 0 else stop):step]
+        return self._pixels[..., indices]
+
+    def with_masks(self, regions: Iterable[Region]) -> "Frame":
+        """Новый кадр поверх того же буфера с дополнительными масками (закраска чёрным)."""
+        return Frame(self._pixels, self.channel_order, self._masks + tuple(regions))
+
+    def crop(self, left: int, top: int, right: int, bottom: int) -> "Frame":
+        """
+        Кадр-представление области [left, right) x [top, bottom) без копирования.
+        Маски переводятся в координаты нового кадра.
+        """
+        masks = tuple((l - left, t - top, r - left, b - top) for l, t, r, b in self._masks
+                      if r >= left and b >= top and l < right and t < bottom)
+        return Frame(self._pixels[top:bottom, left:right], self.channel_order, masks)
+
+    def _apply_masks(self, array: np.ndarray) -> np.ndarray:
+        for left, top, right, bottom in self._masks:
+            array[max(top, 0):max(bottom + 1, 0), max(left, 0):max(right + 1, 0)] = 0
+        return array
+
+    def to_array(self, order: str = "RGB") -> np.ndarray:
+        """Непрерывная копия каналов order с применёнными масками — единственная копия кадра."""
+        return self._apply_masks(np.ascontiguousarray(self.channels(order)))
+
+    def luma(self) -> np.ndarray:
+        """Оттенки серого uint8 (H, W) прямо из буфера, с применёнными масками."""
+        return self._apply_masks(rgb_to_luma(self.channels("RGB")))
+
+    def to_pil(self, order: str = "RGBA") -> Image.Image:
+        """PIL.Image с применёнными масками (для сохранения и отладки)."""
+        array = self.to_array(order)
+        if order == "RGBA":
+            # Закрашенные области непрозрачны, как после ImageDraw.rectangle(fill="black")
+            for left, top, right, bottom in self._masks:
+                array[max(top, 0):max(bottom + 1, 0), max(left, 0):max(right + 1, 0), 3] = 255
+        return Image.fromarray(array, order)
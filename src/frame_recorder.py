@@ -0,0 +1,177 @@
+import atexit
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Dict, NamedTuple, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from config import BASE_DIR, get_settings
+from logger_config import logger
+
+DEFAULT_OUTPUT_DIR = os.path.join(BASE_DIR, "debug_frames")
+DEFAULT_FRAMES_PER_STAGE = 5
+DEFAULT_QUEUE_SIZE = 8
+# Быстрое сжатие: кадры отладочные, размер файла не важен
+_PNG_COMPRESS_LEVEL = 1
+
+# Кадр: PIL.Image, массив uint8 или функция, которая построит его в потоке записи
+FrameSource = Union[Image.Image, np.ndarray, Callable[[], Union[Image.Image, np.ndarray]]]
+
+
+class RecorderStats(NamedTuple):
+    recorded: int
+    written: int
+    dropped: int
+    failed: int
+
+
+class _Job(NamedTuple):
+    stage: str
+    sequence: int
+    timestamp: float
+    source: FrameSource
+
+
+class NullRecorder:
+    """Выключенный регистратор: запись ничего не стоит."""
+    enabled = False
+
+    def record(self, stage: str, source: FrameSource) -> bool:
+        return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        pass
+
+
+class FrameRecorder:
+    """
+    Фоновая запись отладочных кадров конвейера в PNG.
+
+    record() не блокирует: кадр кладётся в ограниченную очередь, а при её
+    переполнении отбрасывается. Кодирование PNG выполняет поток записи.
+    Для каждой стадии на диске хранятся только последние frames_per_stage
+    файлов (кольцевой буфер): stage/<время>-<номер>.png.
+    """
+    enabled = True
+
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR, frames_per_stage: int = DEFAULT_FRAMES_PER_STAGE,
+                 queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.output_dir = output_dir
+        self.frames_per_stage = max(1, frames_per_stage)
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._files: Dict[str, Deque[str]] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._recorded = self._written = self._dropped = self._failed = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="FrameRecorder", daemon=True)
+        self._thread.start()
+
+    def record(self, stage: str, source: FrameSource) -> bool:
+        """
+        Ставит кадр стадии в очередь записи.
+
+        :param source: Изображение или функция без аргументов, возвращающая его
+                       (дорогие преобразования выполнятся в потоке записи).
+        :return: False, если кадр отброшен (очередь заполнена или регистратор закрыт).
+        """
+        if self._closed:
+            return False
+        job = _Job(stage, next(self._sequence), time.time(), source)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._recorded += 1
+        return True
+
+    def stats(self) -> RecorderStats:
+        with self._lock:
+            return RecorderStats(self._recorded, self._written, self._dropped, self._failed)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт записи всех принятых кадров. :return: False по истечении timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Дописывает очередь и останавливает поток записи."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _stage_files(self, stage: str) -> Deque[str]:
+        files = self._files.get(stage)
+        if files is None:
+            # Файлы прошлых запусков тоже входят в кольцевой буфер
+            stage_dir = os.path.join(self.output_dir, stage)
+            os.makedirs(stage_dir, exist_ok=True)
+            files = deque(os.path.join(stage_dir, name) for name in sorted(os.listdir(stage_dir))
+                          if name.endswith(".png"))
+            self._files[stage] = files
+        return files
+
+    def _write(self, job: _Job) -> None:
+        image = job.source() if callable(job.source) else job.source
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        files = self._stage_files(job.stage)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(job.timestamp))
+        path = os.path.join(self.output_dir, job.stage, f"{stamp}-{job.sequence:06d}.png")
+        image.save(path, compress_level=_PNG_COMPRESS_LEVEL)
+        files.append(path)
+        while len(files) > self.frames_per_stage:
+            oldest = files.popleft()
+            try:
+                os.remove(oldest)
+            except FileNotFoundError:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._write(job)
+                with self._lock:
+                    self._written += 1
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.error("Не удалось записать отладочный кадр %s: %s", job.stage, e, exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+@lru_cache(maxsize=1)
+def get_frame_recorder() -> Union[FrameRecorder, NullRecorder]:
+    """
+    Регистратор процесса по настройкам (Settings.debug_frames*).
+    По умолчанию выключен и возвращает NullRecorder.
+    """
+    settings = get_settings()
+    if not settings.debug_frames:
+        return NullRecorder()
+    recorder = FrameRecorder(settings.debug_frames_dir or DEFAULT_OUTPUT_DIR, settings.debug_frames_per_stage)
+    atexit.register(recorder.close, 2.0)
+    logger.info("Запись отладочных кадров включена: %s", recorder.output_dir)
+    return recorder
@@ -0,0 +1,183 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from name_automaton import BaseTypeMatch, NameAutomaton
+
+
+class ItemCandidate(NamedTuple):
+    """Кандидат нечёткого поиска предмета по названию."""
+    item: dict
+    name: str
+    distance: int
+    score: float
+
+
+def _trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def myers_distance(pattern: str, text: str, masks: Optional[Dict[str, int]] = None, search: bool = False) -> int:
+    """
+    Бит-параллельное расстояние Левенштейна (алгоритм Майерса).
+
+    :param pattern: Образец (название из справочника).
+    :param text: Текст (очищенная строка OCR).
+    :param masks: Предвычисленные битовые маски образца.
+    :param search: Если True — минимальное расстояние от образца до любой подстроки текста.
+    :return: Расстояние редактирования.
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0 if search else len(text)
+    if masks is None:
+        masks = _pattern_masks(pattern)
+
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv = full, 0
+    score = best = m
+    carry = 0 if search else 1
+
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | carry) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        if search and score < best:
+            best = score
+
+    return best if search else score
+
+
+class ItemNameIndex:
+    """
+    Индекс названий предметов (name и refName) для поиска с учётом ошибок OCR.
+
+    Точные совпадения находятся одним обращением к словарю. Для остальных
+    кандидаты отбираются по триграммным постинг-листам и ранжируются по
+    расстоянию редактирования: как целиком, так и как подстрока очищенного
+    имени (магические предметы «Prefix Base of Suffix»). Длинные совпадения
+    ранжируются выше коротких, поэтому "ring" не перекрывает "gold ring".
+    """
+
+    # Сколько лучших по триграммам кандидатов проверяется расстоянием.
+    VERIFY_LIMIT = 16
+    MIN_NAME_LENGTH = 3
+
+    def __init__(self, items: List[dict]) -> None:
+        self._exact: Dict[str, dict] = {}
+        for item in items:
+            name = item.get("name", "").lower()
+            ref_name = item.get("refName", "").lower()
+            if name:
+                self._exact[name] = item
+            if ref_name:
+                self._exact[ref_name] = item
+
+        self._names: List[str] = list(self._exact)
+        self._masks: List[Dict[str, int]] = [_pattern_masks(name) for name in self._names]
+        self._trigram_counts: List[int] = []
+        # Нижняя граница общих триграмм (q-gram lemma): каждая ошибка портит не более
+        # трёх триграмм, ещё две граничные теряются, если название — часть запроса.
+        self._min_overlap: List[int] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for name_id, name in enumerate(self._names):
+            grams = set(_trigrams(name))
+            self._trigram_counts.append(len(grams))
+            self._min_overlap.append(max(1, len(grams) - 3 * self.max_typos(len(name)) - 2))
+            for gram in grams:
+                postings[gram].append(name_id)
+        self._postings: Dict[str, Tuple[int, ...]] = {g: tuple(ids) for g, ids in postings.items()}
+        # Автомат по всем названиям строится при первом поиске базы (в снимок каталога не входит)
+        self._automaton: Optional[NameAutomaton] = None
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._exact
+
+    def get(self, name: str) -> Optional[dict]:
+        """Точный поиск по нормализованному (lower) названию."""
+        return self._exact.get(name)
+
+    def items(self):
+        return self._exact.items()
+
+    def longest_match(self, lines: Sequence[str]) -> Optional[BaseTypeMatch]:
+        """
+        Самое длинное название предмета внутри строк (lower) за один проход:
+        база магического "prefix base of suffix" или редкого предмета под его именем.
+        """
+        if self._automaton is None:
+            self._automaton = NameAutomaton(self._exact.items())
+        return self._automaton.longest(lines)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_automaton"] = None
+        return state
+
+    @staticmethod
+    def max_typos(length: int) -> int:
+        """Допустимое число ошибок OCR для названия заданной длины."""
+        return max(1, length // 4)
+
+    def search(self, name: str, limit: int = 5) -> List[ItemCandidate]:
+        """
+        Возвращает кандидатов, отсортированных по убыванию score.
+
+        :param name: Очищенное (lower) название из OCR.
+        :param limit: Максимальное количество кандидатов.
+        """
+        if not name:
+            return []
+
+        grams = set(_trigrams(name))
+        postings = self._postings
+        overlap = Counter(chain.from_iterable(postings[g] for g in grams if g in postings))
+        if not overlap:
+            return []
+
+        min_overlap = self._min_overlap
+        shortlisted = [i for i, shared in overlap.items() if shared >= min_overlap[i]]
+        if len(shortlisted) > self.VERIFY_LIMIT:
+            # Сначала названия, чьи триграммы сильнее всего представлены в запросе.
+            counts = self._trigram_counts
+            shortlisted = heapq.nlargest(
+                self.VERIFY_LIMIT, shortlisted, key=lambda i: (overlap[i] / counts[i], counts[i])
+            )
+
+        candidates = []
+        query_length = len(name)
+        for name_id in shortlisted:
+            candidate = self._names[name_id]
+            if len(candidate) < self.MIN_NAME_LENGTH:
+                continue
+            distance = myers_distance(candidate, name, self._masks[name_id], search=True)
+            if distance > self.max_typos(len(candidate)):
+                continue
+            score = (len(candidate) - distance) / max(query_length, len(candidate))
+            candidates.append(ItemCandidate(self._exact[candidate], candidate, distance, score))
+
+        candidates.sort(key=lambda c: (-c.score, c.distance))
+        return candidates[:limit]
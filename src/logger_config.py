@@ -1,5 +1,6 @@
 import sys
 import logging
+import multiprocessing
 from typing import Optional
 
 # 1) Создаём (или получаем) глобальный логгер
@@ -10,8 +11,10 @@ logger.setLevel(logging.DEBUG)
 formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
 # 3) Обработчик записи в файл
-#    ВАЖНО: mode="w" перезаписывает файл при каждом новом запуске приложения
-file_handler = logging.FileHandler("app.log", mode="w", encoding="utf-8")
+#    ВАЖНО: mode="w" перезаписывает файл при каждом новом запуске приложения,
+#    дочерние процессы (пулы разбора/OCR) дописывают в тот же файл
+_log_mode = "w" if multiprocessing.parent_process() is None else "a"
+file_handler = logging.FileHandler("app.log", mode=_log_mode, encoding="utf-8")
 file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
@@ -23,6 +26,13 @@ console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
 
+def redirect_console_to_stderr() -> None:
+    """
+    Переключает консольный вывод логов на stderr, когда stdout занят данными (CLI-режим).
+    """
+    console_handler.setStream(sys.stderr)
+
+
 def handle_exception(exc_type, exc_value, exc_traceback) -> None:
     """
     Глобальная обработка необработанных исключений:
@@ -7,6 +7,7 @@ from overlay import Overlay
 from logger_config import logger, handle_exception
 from process_handler import ProcessHandler
 from screenshot_handler import ScreenshotHandler
+from ocr_service import get_ocr_service
 
 import rumps  # Импортируем библиотеку для работы с треем macOS
 
@@ -37,6 +38,8 @@ def main() -> None:
 
         process_handler = ProcessHandler()
         screenshot_handler = ScreenshotHandler()
+        # Рабочие процессы OCR загружают языковые модели заранее, до первой проверки
+        get_ocr_service()
         overlay = Overlay(process_handler, screenshot_handler)
 
         # Создаем приложение для трея
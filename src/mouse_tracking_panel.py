@@ -1,5 +1,4 @@
 import objc
-import pytesseract
 from AppKit import (
     NSPanel,
     NSColor,
@@ -23,19 +22,18 @@ from logger_config import logger
 class MouseTrackingPanel(NSPanel):
     """
     Панель, позволяющая «рисовать» выделенную область мышью
-    (mouseDown/Dragged/Up) и, при отпускании, делать скриншот
-    выбранного региона (через ScreenshotHandler).
+    (mouseDown/Dragged/Up) и, при отпускании, передавать выбранный регион
+    в overlay (проверка выполняется CheckPipeline вне главного потока).
     Поддерживает fullscreen-пространство (NSWindowCollectionBehaviorFullScreenAuxiliary).
     """
 
     @classmethod
-    def create_panel(cls, rect: Tuple[Tuple[float, float], Tuple[float, float]], screenshot_handler=None, finish_callback=None) -> 'MouseTrackingPanel':
+    def create_panel(cls, rect: Tuple[Tuple[float, float], Tuple[float, float]], finish_callback=None) -> 'MouseTrackingPanel':
         """
         Создаёт и инициализирует MouseTrackingPanel в указанных координатах.
 
         :param rect: Кортеж ((x, y), (width, height)), глобальные координаты на экране.
-        :param screenshot_handler: Экземпляр ScreenshotHandler для сохранения скриншота.
-        :param finish_callback: Callback overlay.finish_selection().
+        :param finish_callback: Callback overlay.finish_selection(global_rect).
         :return: Экземпляр MouseTrackingPanel.
         """
         (global_x, global_y), (w, h) = rect
@@ -55,7 +53,7 @@ class MouseTrackingPanel(NSPanel):
 
         panel._initialize_content_view()
         panel._initialize_selection_layer()
-        panel._initialize_fields(screenshot_handler, (global_x, global_y), finish_callback)
+        panel._initialize_fields((global_x, global_y), finish_callback)
 
         return panel
 
@@ -72,13 +70,12 @@ class MouseTrackingPanel(NSPanel):
         self.contentView().layer().addSublayer_(selection_layer)
         self._selectionLayer = selection_layer
 
-    def _initialize_fields(self, screenshot_handler, window_origin, finish_callback):
+    def _initialize_fields(self, window_origin, finish_callback):
         """Инициализирует внутренние поля панели."""
         self._startPoint = (0, 0)
         self._endPoint = (0, 0)
         self._dragging = False
         self._windowOrigin = window_origin
-        self._screenshot_handler = screenshot_handler
         self._finish_callback = finish_callback
 
     @staticmethod
@@ -105,7 +102,10 @@ class MouseTrackingPanel(NSPanel):
             self.updateSelectionLayer()
 
     def mouseUp_(self, event):
-        """Завершение выделения: делаем скриншот и закрываем панель."""
+        """
+        Завершение выделения: передаём регион в overlay. Захват, OCR и разбор
+        выполняются вне обработчика событий, интерфейс не блокируется.
+        """
         try:
             if self._dragging:
                 self._endPoint = event.locationInWindow()
@@ -115,11 +115,8 @@ class MouseTrackingPanel(NSPanel):
                 rect_local = self.selectionRect()
                 global_rect = self.local_rect_to_global(rect_local)
 
-                if self._screenshot_handler:
-                    pil_image = self._screenshot_handler.take_screenshot(global_rect)
-                    if pil_image:
-                        parsed_text = pytesseract.image_to_string(pil_image, "rus+eng", "--psm 6")
-                        self._finish_callback(parsed_text)
+                if self._finish_callback:
+                    self._finish_callback(global_rect)
                 else:
                     self.close()
         except Exception as e:
@@ -0,0 +1,127 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class BaseTypeMatch(NamedTuple):
+    """Название предмета, найденное в строках заголовка."""
+    item: dict
+    # Совпавшее название (lower) и его место: номер строки, начало и конец в строке
+    name: str
+    line: int
+    start: int
+    end: int
+    # craftable.category предмета
+    category: Optional[str]
+    # Название входит словами в более длинное название каталога ("ring" в "ruby ring"):
+    # ошибка OCR в остальной части строки может скрывать более длинное название
+    extendable: bool = False
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class NameAutomaton:
+    """
+    Автомат Ахо — Корасик по названиям предметов (name и refName, в нижнем регистре).
+
+    За один проход по строкам заголовка находит все вхождения названий, стоящие
+    на границах слов, и выбирает самое длинное: у магического предмета
+    «Prefix Base of Suffix» это база, а не короткое название внутри неё
+    ("gold ring", а не "ring"); случайное имя редкого предмета над базой
+    проигрывает базе, если короче.
+    """
+
+    MIN_NAME_LENGTH = 3
+
+    def __init__(self, names: Iterable[Tuple[str, dict]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Название, оканчивающееся в состоянии (-1 — нет), и ближайшее по цепочке
+        # неудач состояние с названием: вхождения в позиции перебираются от длинных к коротким
+        self._output: List[int] = [-1]
+        self._output_link: List[int] = [-1]
+        self._names: List[str] = []
+        self._items: List[dict] = []
+        for name, item in names:
+            if len(name) >= self.MIN_NAME_LENGTH:
+                self._add(name, item)
+        self._link()
+        self._extendable = {name_id for own_id, name in enumerate(self._names)
+                            for _, _, name_id in self.matches(name) if name_id != own_id}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    def _add(self, name: str, item: dict) -> None:
+        state = 0
+        for char in name:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+                self._output_link.append(-1)
+            state = next_state
+        if self._output[state] == -1:
+            self._output[state] = len(self._names)
+            self._names.append(name)
+            self._items.append(item)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output_link[child] = target if self._output[target] != -1 else self._output_link[target]
+
+    def matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Вхождения названий на границах слов: (начало, конец, номер названия)."""
+        goto, fail, output, output_link = self._goto, self._fail, self._output, self._output_link
+        names = self._names
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if output[state] != -1 else output_link[state]
+            if match == -1 or not _is_boundary(text, index + 1):
+                continue
+            while match != -1:
+                name_id = output[match]
+                start = index + 1 - len(names[name_id])
+                if _is_boundary(text, start - 1):
+                    yield start, index + 1, name_id
+                match = output_link[match]
+
+    def longest(self, lines: Sequence[str]) -> Optional[BaseTypeMatch]:
+        """
+        Самое длинное название в строках (lower); при равной длине — из более
+        поздней строки (база стоит под именем редкого предмета).
+        """
+        best = None
+        best_key = (0, -1)
+        for line_no, line in enumerate(lines):
+            for start, end, name_id in self.matches(line):
+                key = (end - start, line_no)
+                if key > best_key:
+                    best_key = key
+                    best = (line_no, start, end, name_id)
+        if best is None:
+            return None
+        line_no, start, end, name_id = best
+        item = self._items[name_id]
+        return BaseTypeMatch(item, self._names[name_id], line_no, start, end,
+                             (item.get("craftable") or {}).get("category"), name_id in self._extendable)
@@ -0,0 +1,168 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from PIL import Image
+
+from ocr_service import OcrResult, OcrService
+
+# Доля «чернил» в строке, начиная с которой строка считается линией-разделителем секций
+SEPARATOR_FILL = 0.5
+# Минимальная высота полосы (пиксели предобработанного изображения, ~3 строки текста при x4)
+MIN_BAND_HEIGHT = 200
+# Строка-разделитель для токенизатора на стыке полос, разрезанных по линии
+SECTION_SEPARATOR = "--------"
+# Период проверки отмены при ожидании полос, секунды
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class Band(NamedTuple):
+    top: int
+    bottom: int
+    # Полоса начинается сразу после линии-разделителя секций
+    after_separator: bool
+
+    @property
+    def height(self) -> int:
+        return self.bottom - self.top
+
+
+def _runs(flags: np.ndarray) -> np.ndarray:
+    """Отрезки [start, end) подряд идущих True."""
+    padded = np.concatenate(([False], flags, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges.reshape(-1, 2)
+
+
+def row_profile(pixels: np.ndarray) -> np.ndarray:
+    """Доля светлых (текстовых) пикселей в каждой строке бинаризованного изображения."""
+    return np.count_nonzero(pixels > 127, axis=1) / max(1, pixels.shape[1])
+
+
+def split_bands(pixels: np.ndarray, max_bands: int, min_height: int = MIN_BAND_HEIGHT) -> List[Band]:
+    """
+    Делит бинаризованное изображение тултипа на горизонтальные полосы.
+
+    Сначала режет по линиям-разделителям секций (строки с долей чернил от
+    SEPARATOR_FILL), сами линии в полосы не входят. Затем полосы выше средней
+    (высота / max_bands) делятся по пустому промежутку между строками текста,
+    ближайшему к середине, а пока полос больше max_bands, объединяются соседние
+    (начиная с самой низкой пары). Строка текста никогда не разрезается.
+    """
+    height = pixels.shape[0]
+    profile = row_profile(pixels)
+    bands: List[Band] = []
+    top, after_separator = 0, False
+    for start, end in _runs(profile >= SEPARATOR_FILL):
+        if np.any(profile[top:start] > 0):
+            bands.append(Band(top, int(start), after_separator))
+        top, after_separator = int(end), True
+    if np.any(profile[top:height] > 0) or not bands:
+        bands.append(Band(top, height, after_separator))
+
+    # Полосы выше средней делятся по пустым промежуткам, затем лишние объединяются
+    blank = profile == 0
+    target = height / max(1, max_bands)
+    while True:
+        index = max(range(len(bands)), key=lambda i: bands[i].height)
+        band = bands[index]
+        if band.height <= target or band.height < 2 * min_height:
+            break
+        gaps = _runs(blank[band.top:band.bottom]) + band.top
+        cuts = [(start + end) // 2 for start, end in gaps
+                if band.top + min_height <= (start + end) // 2 <= band.bottom - min_height]
+        if not cuts:
+            break
+        cut = min(cuts, key=lambda row: abs(row - (band.top + band.bottom) // 2))
+        bands[index:index + 1] = [Band(band.top, int(cut), band.after_separator), Band(int(cut), band.bottom, False)]
+
+    while len(bands) > max(1, max_bands):
+        index = min(range(len(bands) - 1), key=lambda i: bands[i + 1].bottom - bands[i].top)
+        bands[index:index + 2] = [Band(bands[index].top, bands[index + 1].bottom, bands[index].after_separator)]
+    return bands
+
+
+class BandAssembler:
+    """
+    Собирает результаты полос, приходящие в любом порядке, в текст по порядку полос.
+    Как только готов непрерывный префикс, законченные секции передаются on_section
+    (например, IncrementalItemParser.feed) — разбор идёт, пока OCR остальных полос не закончен.
+    """
+
+    def __init__(self, bands: List[Band], on_section: Optional[Callable[[str], None]] = None) -> None:
+        self.bands = bands
+        self.on_section = on_section
+        self._results: Dict[int, OcrResult] = {}
+        self._next = 0
+        self._pending: List[str] = []
+        self._lines: List[str] = []
+
+    @property
+    def complete(self) -> bool:
+        return self._next == len(self.bands)
+
+    def add(self, index: int, result: OcrResult) -> None:
+        self._results[index] = result
+        while self._next in self._results:
+            band = self.bands[self._next]
+            if band.after_separator and self._next:
+                self._end_section()
+                self._lines.append(SECTION_SEPARATOR)
+            text = self._results[self._next].text.strip("\n")
+            if text:
+                self._pending.append(text)
+                self._lines.append(text)
+            self._next += 1
+        if self.complete:
+            self._end_section()
+
+    def _end_section(self) -> None:
+        if self._pending and self.on_section is not None:
+            self.on_section("\n".join(self._pending))
+        self._pending = []
+
+    def result(self) -> OcrResult:
+        """Текст полос по порядку и средняя уверенность, взвешенная по высоте полос."""
+        weighted = [(result.confidence, self.bands[index].height) for index, result in self._results.items()
+                    if result.confidence >= 0]
+        total = sum(height for _, height in weighted)
+        confidence = sum(value * height for value, height in weighted) / total if total else -1.0
+        return OcrResult("\n".join(self._lines), confidence)
+
+
+def recognize_bands(service: OcrService, image: Image.Image, max_bands: Optional[int] = None,
+                    on_section: Optional[Callable[[str], None]] = None,
+                    min_height: int = MIN_BAND_HEIGHT,
+                    cancel_event: Optional[threading.Event] = None, lang: Optional[str] = None,
+                    whitelist: Optional[str] = None) -> OcrResult:
+    """
+    Распознаёт тултип полосами параллельно на пуле OcrService.
+
+    :param max_bands: Наибольшее число полос (по умолчанию — число рабочих процессов).
+    :param on_section: Вызывается в этом потоке для каждой законченной секции текста по порядку.
+    :param cancel_event: Если установлен, ещё не начатые полосы отменяются и выбрасывается CancelledError.
+    :param lang: Языки и допустимые символы OCR (см. OcrService.submit).
+    :return: OcrResult со склеенным текстом; при одной полосе — обычное распознавание.
+    """
+    pixels = np.asarray(image.convert("L"))
+    bands = split_bands(pixels, max_bands or service.workers, min_height)
+    assembler = BandAssembler(bands, on_section)
+    futures = {
+        service.submit(image.crop((0, band.top, image.width, band.bottom)), lang=lang, whitelist=whitelist): index
+        for index, band in enumerate(bands)
+    }
+    try:
+        pending = set(futures)
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CancelledError()
+            done, pending = wait(pending, CANCEL_POLL_INTERVAL if cancel_event is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                assembler.add(futures[future], future.result())
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return assembler.result()
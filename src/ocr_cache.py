@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Optional
+
+import numpy as np
+from PIL import Image
+
+from config import get_settings
+from frame import Frame
+from logger_config import logger
+from text_region import find_text_bbox
+
+DEFAULT_HASH_SIZE = 16
+DEFAULT_MAX_DISTANCE = 12
+DEFAULT_MAXSIZE = 64
+DEFAULT_TTL = 300.0
+# Допустимое расхождение размеров области текста (пиксели захвата)
+SIZE_TOLERANCE = 2
+# Проверка кандидата по миниатюре (уменьшение в THUMBNAIL_STEP раз усреднением):
+# разница яркости сверх NOISE_FLOOR (полупрозрачный фон тултипа) усредняется по блокам
+# BLOCK x BLOCK — примерно глиф; смена одной цифры ролла даёт блок выше MAX_BLOCK_DIFFERENCE
+THUMBNAIL_STEP = 2
+BLOCK = 4
+NOISE_FLOOR = 24
+MAX_BLOCK_DIFFERENCE = 2.0
+# Перепад между клетками хеша меньше этого считается нулевым: иначе шум тёмного
+# однородного фона переворачивает биты
+HASH_DEAD_ZONE = 2
+
+
+class Fingerprint(NamedTuple):
+    """Перцептивный отпечаток области текста кадра."""
+    hash: int
+    width: int
+    height: int
+    # Яркость области текста, уменьшенная в THUMBNAIL_STEP раз
+    thumbnail: np.ndarray
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    currsize: int
+    hit_rate: float
+
+
+class CacheEntry:
+    """Результат проверки: текст OCR и (после разбора) ParsedItem."""
+
+    __slots__ = ("fingerprint", "text", "parsed", "created")
+
+    def __init__(self, fingerprint: Fingerprint, text: str, parsed: Any = None, created: float = 0.0) -> None:
+        self.fingerprint = fingerprint
+        self.text = text
+        self.parsed = parsed
+        self.created = created
+
+
+def dhash(image: Image.Image, hash_size: int = DEFAULT_HASH_SIZE) -> int:
+    """
+    Разностный хеш: бит «яркость растёт» для соседних клеток сетки hash_size x (hash_size + 1);
+    перепады в пределах HASH_DEAD_ZONE дают 0.
+    """
+    cells = np.asarray(image.resize((hash_size + 1, hash_size), Image.Resampling.BOX), dtype=np.int16)
+    bits = (cells[:, 1:] - cells[:, :-1] > HASH_DEAD_ZONE).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def fingerprint(frame: Frame, hash_size: int = DEFAULT_HASH_SIZE) -> Optional[Fingerprint]:
+    """
+    Отпечаток кадра (обычно уже обрезанного до текста). Область текста уточняется
+    без прореживания, поэтому повторный захват того же тултипа с другим
+    выделением даёт тот же отпечаток. Без текста возвращает None.
+    """
+    box = find_text_bbox(frame, downsample=1)
+    if box is None:
+        return None
+    image = Image.fromarray(frame.crop(*box).luma(), "L")
+    return Fingerprint(dhash(image, hash_size), image.width, image.height,
+                       np.asarray(image.reduce(THUMBNAIL_STEP)))
+
+
+def _block_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """Наибольшая по блокам средняя разница миниатюр сверх порога шума."""
+    h, w = min(a.shape[0], b.shape[0]), min(a.shape[1], b.shape[1])
+    diff = np.abs(a[:h, :w].astype(np.int16) - b[:h, :w].astype(np.int16)) - NOISE_FLOOR
+    np.maximum(diff, 0, out=diff)
+    bh, bw = h // BLOCK * BLOCK, w // BLOCK * BLOCK
+    if not bh or not bw:
+        return float(diff.mean()) if diff.size else 0.0
+    return float(diff[:bh, :bw].reshape(bh // BLOCK, BLOCK, bw // BLOCK, BLOCK).mean(axis=(1, 3)).max())
+
+
+class OcrCache:
+    """
+    LRU-кэш результатов OCR по перцептивному отпечатку с допуском по расстоянию Хэмминга и TTL.
+
+    Кандидат с расстоянием не больше max_distance и почти тем же размером
+    дополнительно сверяется по блокам миниатюры. Поиск — линейный проход
+    по не более чем maxsize записям (popcount на запись).
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL,
+                 max_distance: int = DEFAULT_MAX_DISTANCE, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._clock = clock
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expirations = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _matches(self, entry: CacheEntry, key: Fingerprint) -> bool:
+        other = entry.fingerprint
+        return (abs(other.width - key.width) <= SIZE_TOLERANCE
+                and abs(other.height - key.height) <= SIZE_TOLERANCE
+                and (other.hash ^ key.hash).bit_count() <= self.max_distance
+                and _block_difference(other.thumbnail, key.thumbnail) <= MAX_BLOCK_DIFFERENCE)
+
+    def get(self, key: Optional[Fingerprint]) -> Optional[CacheEntry]:
+        """Ближайшая живая запись для отпечатка или None."""
+        if key is None or self.maxsize <= 0:
+            return None
+        now = self._clock()
+        with self._lock:
+            for entry_id, entry in list(self._entries.items()):
+                if now - entry.created > self.ttl:
+                    del self._entries[entry_id]
+                    self.expirations += 1
+                    continue
+                if self._matches(entry, key):
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, key: Optional[Fingerprint], text: str, parsed: Any = None) -> Optional[CacheEntry]:
+        """Сохраняет результат проверки; возвращает запись (в неё можно дописать parsed)."""
+        if key is None:
+            return None
+        entry = CacheEntry(key, text, parsed, self._clock())
+        if self.maxsize <= 0:
+            return entry
+        with self._lock:
+            self._ids += 1
+            self._entries[self._ids] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expirations = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return CacheInfo(self.hits, self.misses, self.expirations, self.evictions, len(self._entries),
+                             self.hits / lookups if lookups else 0.0)
+
+
+@lru_cache(maxsize=1)
+def get_ocr_cache() -> OcrCache:
+    """Кэш OCR процесса по настройкам (Settings.ocr_cache_*); при размере 0 ничего не хранит."""
+    settings = get_settings()
+    cache = OcrCache(settings.ocr_cache_size, settings.ocr_cache_ttl, settings.ocr_cache_max_distance)
+    logger.info("Кэш OCR: %d записей, TTL %.0f с, допуск %d бит.",
+                cache.maxsize, cache.ttl, cache.max_distance)
+    return cache
@@ -0,0 +1,95 @@
+import string
+import threading
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence
+
+from config import get_settings
+from ocr_service import OcrResult
+
+# Символы английского тултипа: имена, числа, проценты, диапазоны "10-20", пометки "(implicit)"
+TOOLTIP_WHITELIST = string.ascii_letters + string.digits + "+-%.,:()'/"
+DEFAULT_MIN_CONFIDENCE = 70.0
+DEFAULT_MIN_PARSE_RATE = 0.8
+
+
+class CascadeTier(NamedTuple):
+    """Уровень каскада: масштаб увеличения, языки и допустимые символы OCR."""
+    scale: int
+    lang: str
+    whitelist: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"x{self.scale} {self.lang}{' +whitelist' if self.whitelist else ''}"
+
+
+class TierStats(NamedTuple):
+    tier: CascadeTier
+    # Проверок, закончившихся на этом уровне
+    finished: int
+    # Попыток распознавания на этом уровне (включая эскалации выше)
+    attempts: int
+    # Суммарное время попыток, секунды
+    seconds: float
+
+
+class OcrCascade:
+    """
+    Каскад OCR от дешёвого уровня к дорогому.
+
+    Первый уровень — малое увеличение, один язык и белый список символов; результат
+    принимается, если средняя уверенность слов tesseract не ниже min_confidence
+    (когда движок её сообщает) и доля строк модификаторов, найденных в каталоге статов,
+    не ниже min_parse_rate. Иначе проверка переходит на следующий уровень; последний
+    уровень принимается всегда. Статистика хранит, на каком уровне закончилась каждая проверка.
+    """
+
+    def __init__(self, tiers: Sequence[CascadeTier], min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+                 min_parse_rate: float = DEFAULT_MIN_PARSE_RATE) -> None:
+        if not tiers:
+            raise ValueError("Каскад OCR должен содержать хотя бы один уровень.")
+        self.tiers = tuple(tiers)
+        self.min_confidence = min_confidence
+        self.min_parse_rate = min_parse_rate
+        self._lock = threading.Lock()
+        self._finished = [0] * len(self.tiers)
+        self._attempts = [0] * len(self.tiers)
+        self._seconds = [0.0] * len(self.tiers)
+
+    def accepts(self, level: int, result: OcrResult, parse_rate: float) -> bool:
+        """Достаточно ли результата уровня level, чтобы не переходить к следующему."""
+        if level >= len(self.tiers) - 1:
+            return True
+        if 0 <= result.confidence < self.min_confidence:
+            return False
+        return parse_rate >= self.min_parse_rate
+
+    def record_attempt(self, level: int, seconds: float) -> None:
+        with self._lock:
+            self._attempts[level] += 1
+            self._seconds[level] += seconds
+
+    def record_finished(self, level: int) -> None:
+        with self._lock:
+            self._finished[level] += 1
+
+    def stats(self) -> List[TierStats]:
+        with self._lock:
+            return [TierStats(tier, finished, attempts, seconds) for tier, finished, attempts, seconds
+                    in zip(self.tiers, self._finished, self._attempts, self._seconds)]
+
+
+@lru_cache(maxsize=1)
+def get_ocr_cascade() -> Optional[OcrCascade]:
+    """
+    Каскад процесса по настройкам (Settings.ocr_cascade*): первый уровень
+    ocr_cascade_scale/ocr_cascade_lang, последний — upscale_factor/ocr_lang.
+    None, если каскад выключен.
+    """
+    settings = get_settings()
+    if not settings.ocr_cascade:
+        return None
+    first = CascadeTier(settings.ocr_cascade_scale, settings.ocr_cascade_lang,
+                        TOOLTIP_WHITELIST if settings.ocr_cascade_whitelist else None)
+    return OcrCascade([first, CascadeTier(settings.upscale_factor, settings.ocr_lang)],
+                      settings.ocr_cascade_min_confidence, settings.ocr_cascade_min_parse_rate)
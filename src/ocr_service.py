@@ -0,0 +1,322 @@
+import atexit
+import importlib.util
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional
+
+from PIL import Image
+
+from config import get_settings
+from logger_config import logger
+
+DEFAULT_LANG = "rus+eng"
+DEFAULT_PSM = 6
+DEFAULT_TIMEOUT = 10.0
+# Загрузка языковых моделей при старте рабочего процесса
+WORKER_START_TIMEOUT = 30.0
+
+
+class OcrError(Exception):
+    """Распознавание не удалось (движок недоступен, рабочий процесс упал)."""
+
+
+class OcrTimeoutError(OcrError):
+    """Задание не уложилось в таймаут; рабочий процесс перезапущен."""
+
+
+class OcrResult(NamedTuple):
+    text: str
+    # Средняя уверенность по словам, 0..100 (-1, если движок её не сообщает)
+    confidence: float
+
+
+class TesserocrEngine:
+    """
+    Tesseract через tesserocr: языковые модели загружаются один раз на процесс
+    (для каждого набора языков — свой экземпляр API при первом обращении).
+    """
+
+    def __init__(self, lang: str, psm: int) -> None:
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._lang = lang
+        self._psm = psm
+        self._apis = {}
+        self._api(lang)
+
+    def _api(self, lang: str):
+        api = self._apis.get(lang)
+        if api is None:
+            api = self._apis[lang] = self._tesserocr.PyTessBaseAPI(lang=lang, psm=self._psm)
+        return api
+
+    def recognize(self, image: Image.Image, lang: Optional[str] = None, whitelist: Optional[str] = None) -> OcrResult:
+        api = self._api(lang or self._lang)
+        api.SetVariable("tessedit_char_whitelist", whitelist or "")
+        api.SetImage(image)
+        return OcrResult(api.GetUTF8Text(), float(api.MeanTextConf()))
+
+
+class TesseractCliEngine:
+    """
+    Бинарник tesseract: изображение передаётся через stdin, результат (TSV) читается
+    из stdout, без временных файлов. Модели загружаются на каждый вызов.
+    """
+
+    def __init__(self, lang: str, psm: int, binary: Optional[str] = None) -> None:
+        self._binary = binary or shutil.which("tesseract") or "tesseract"
+        self._lang = lang
+        self._psm = psm
+
+    def recognize(self, image: Image.Image, lang: Optional[str] = None, whitelist: Optional[str] = None) -> OcrResult:
+        command = [self._binary, "stdin", "stdout", "-l", lang or self._lang, "--psm", str(self._psm)]
+        if whitelist:
+            command += ["-c", f"tessedit_char_whitelist={whitelist}"]
+        buffer = io.BytesIO()
+        # Без сжатия: кодирование быстрее, а размер для пайпа не важен
+        image.save(buffer, format="PNG", compress_level=0)
+        completed = subprocess.run(command + ["tsv"], input=buffer.getvalue(), capture_output=True, check=True)
+        return parse_tsv(completed.stdout.decode("utf-8", errors="replace"))
+
+
+def parse_tsv(tsv: str) -> OcrResult:
+    """Собирает текст по строкам (block, par, line) и среднюю уверенность слов из TSV tesseract."""
+    lines: List[List[str]] = []
+    confidences: List[float] = []
+    current_key = None
+    for row in tsv.splitlines()[1:]:
+        columns = row.split("\t")
+        if len(columns) < 12 or columns[0] != "5":
+            continue
+        word = columns[11]
+        if not word.strip():
+            continue
+        key = (columns[2], columns[3], columns[4])
+        if key != current_key:
+            lines.append([])
+            current_key = key
+        lines[-1].append(word)
+        confidence = float(columns[10])
+        if confidence >= 0:
+            confidences.append(confidence)
+    text = "\n".join(" ".join(words) for words in lines)
+    return OcrResult(text, sum(confidences) / len(confidences) if confidences else -1.0)
+
+
+def default_engine() -> Callable:
+    """tesserocr, если установлен (тёплые модели), иначе бинарник tesseract."""
+    if importlib.util.find_spec("tesserocr") is not None:
+        return TesserocrEngine
+    logger.warning("tesserocr не установлен: OCR через бинарник tesseract, модели загружаются "
+                   "на каждое распознавание. Установите tesserocr (requirements.txt).")
+    return TesseractCliEngine
+
+
+def _worker_main(conn, engine_factory, lang: str, psm: int) -> None:
+    """Цикл рабочего процесса: движок создаётся один раз, задания приходят по пайпу."""
+    if hasattr(os, "setpgrp"):
+        # Своя группа процессов: при перезапуске вместе с процессом завершается и дочерний tesseract
+        os.setpgrp()
+    try:
+        engine = engine_factory(lang, psm)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", None))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        job_id, mode, size, data, lang, whitelist = message
+        try:
+            result = engine.recognize(Image.frombytes(mode, size, data), lang, whitelist)
+            conn.send((job_id, result, None))
+        except Exception as e:
+            conn.send((job_id, None, f"{type(e).__name__}: {e}"))
+
+
+class _Job(NamedTuple):
+    id: int
+    image: Image.Image
+    timeout: float
+    future: Future
+    lang: Optional[str] = None
+    whitelist: Optional[str] = None
+
+
+class _Worker:
+    """Рабочий процесс и его конец пайпа."""
+
+    def __init__(self, context, engine_factory, lang: str, psm: int, name: str) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, engine_factory, lang, psm),
+                                       name=name, daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise OcrError("Рабочий процесс OCR не запустился вовремя.")
+        status, error = self.conn.recv()
+        if status != "ready":
+            raise OcrError(f"Движок OCR не инициализирован: {error}")
+        self.ready = True
+
+    def kill(self) -> None:
+        """Завершает процесс вместе с его группой (запущенный им tesseract)."""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            # Группа ещё не создана (процесс только стартует) или нет killpg
+            self.process.kill()
+
+    def stop(self, kill: bool = False) -> None:
+        try:
+            if kill:
+                self.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class OcrService:
+    """
+    Пул долгоживущих рабочих процессов OCR с общей очередью заданий.
+
+    Каждый процесс один раз создаёт движок (языковые модели остаются загруженными).
+    Изображения передаются по пайпу в памяти. Задание, превысившее таймаут,
+    завершается OcrTimeoutError, а процесс перезапускается; упавший процесс
+    тоже перезапускается автоматически.
+    """
+
+    def __init__(self, workers: int = 1, lang: str = DEFAULT_LANG, psm: int = DEFAULT_PSM,
+                 timeout: float = DEFAULT_TIMEOUT, engine_factory: Optional[Callable] = None) -> None:
+        self.lang = lang
+        self.psm = psm
+        self.timeout = timeout
+        self.workers = max(1, workers)
+        self.engine_factory = engine_factory or default_engine()
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._serve, args=(index,), name=f"OcrDispatcher-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, image: Image.Image, timeout: Optional[float] = None, lang: Optional[str] = None,
+               whitelist: Optional[str] = None) -> "Future[OcrResult]":
+        """
+        Ставит изображение в очередь; таймаут отсчитывается с момента передачи процессу.
+
+        :param lang: Языки для этого задания (по умолчанию — языки сервиса).
+        :param whitelist: Допустимые символы (tessedit_char_whitelist), по умолчанию без ограничений.
+        """
+        if self._closed:
+            raise OcrError("Сервис OCR остановлен.")
+        future: "Future[OcrResult]" = Future()
+        if image.mode not in ("L", "RGB", "RGBA", "1"):
+            image = image.convert("RGB")
+        self._jobs.put(_Job(next(self._ids), image, timeout or self.timeout, future, lang, whitelist))
+        return future
+
+    def recognize(self, image: Image.Image, timeout: Optional[float] = None, lang: Optional[str] = None,
+                  whitelist: Optional[str] = None) -> OcrResult:
+        """Синхронное распознавание (submit + ожидание результата)."""
+        return self.submit(image, timeout, lang, whitelist).result()
+
+    def close(self) -> None:
+        """Останавливает рабочие процессы; задания в очереди отменяются."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _start_worker(self, index: int) -> _Worker:
+        return _Worker(self._context, self.engine_factory, self.lang, self.psm, f"OcrWorker-{index}")
+
+    def _restart(self, worker: _Worker, index: int, reason: str) -> _Worker:
+        logger.warning("Перезапуск рабочего процесса OCR %d: %s", index, reason)
+        worker.stop(kill=True)
+        with self._lock:
+            self.restarts += 1
+        return self._start_worker(index)
+
+    def _serve(self, index: int) -> None:
+        worker = self._start_worker(index)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                if self._closed:
+                    job.future.cancel()
+                    continue
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                worker = self._run_job(worker, index, job)
+        finally:
+            worker.stop()
+
+    def _run_job(self, worker: _Worker, index: int, job: _Job) -> _Worker:
+        try:
+            if not worker.process.is_alive():
+                worker = self._restart(worker, index, "процесс завершился")
+            worker.wait_ready(WORKER_START_TIMEOUT)
+            image = job.image
+            worker.conn.send((job.id, image.mode, image.size, image.tobytes(), job.lang, job.whitelist))
+            if not worker.conn.poll(job.timeout):
+                job.future.set_exception(OcrTimeoutError(f"OCR не уложился в {job.timeout:.1f} с."))
+                return self._restart(worker, index, "таймаут задания")
+            job_id, result, error = worker.conn.recv()
+        except OcrError as e:
+            job.future.set_exception(e)
+            return self._restart(worker, index, str(e))
+        except (EOFError, OSError) as e:
+            job.future.set_exception(OcrError(f"Рабочий процесс OCR упал: {e!r}"))
+            return self._restart(worker, index, "процесс упал")
+
+        if error is not None:
+            job.future.set_exception(OcrError(error))
+        else:
+            job.future.set_result(result)
+        return worker
+
+
+@lru_cache(maxsize=1)
+def get_ocr_service() -> OcrService:
+    """Сервис OCR процесса по настройкам (Settings.ocr_*); процессы запускаются сразу."""
+    settings = get_settings()
+    service = OcrService(settings.ocr_workers, settings.ocr_lang, settings.ocr_psm, settings.ocr_timeout)
+    atexit.register(service.close)
+    logger.info("Сервис OCR: %d процесс(а), движок %s.", settings.ocr_workers, service.engine_factory.__name__)
+    return service
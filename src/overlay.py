@@ -1,8 +1,11 @@
+import json
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Optional, Tuple
 
 import Quartz.CoreGraphics as CG
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import QMainWindow
 
 from process_handler import ProcessHandler
@@ -12,7 +15,15 @@ from mouse_tracking_panel import MouseTrackingPanel
 from text_editor_overlay import TextEditorOverlay
 
 from logger_config import logger
-from parsing_utils import load_ndjson, build_item_lookup, build_stat_lookup, parse_item
+from catalog import load_catalog
+from parsing_utils import IncrementalItemParser
+from parsed_item import ParsedItem
+from check_pipeline import CheckJob, CheckPipeline, CheckResult, CheckStage
+from ocr_cache import get_ocr_cache
+from ocr_cascade import get_ocr_cascade
+from config import get_settings
+from pricing import (PriceResult, PriceService, TradeCancelledError, TradeError, create_bulk_scheduler,
+                     get_price_cache, get_trade_client)
 
 class Constants:
     CTRL_E_KEY_CODE = 14
@@ -20,6 +31,9 @@ class Constants:
     CTRL_MASK = CG.kCGEventFlagMaskControl
 
 class Overlay(QMainWindow):
+    # Вызов из рабочего потока конвейера, выполняемый в главном потоке (queued connection)
+    _main_thread_call = pyqtSignal(object)
+
     def __init__(
         self,
         process_handler: ProcessHandler,
@@ -37,13 +51,35 @@ class Overlay(QMainWindow):
 
         self.panel: Optional[MouseTrackingPanel] = None
 
-        # Загружаем конфиги
-        self.items = load_ndjson(items_path)
-        self.stats = load_ndjson(stats_path)
+        # Загружаем каталог (из снимка data/catalog.bin, если он актуален) вместе с индексами
+        self.catalog = load_catalog(items_file=items_path, stats_file=stats_path)
+        self.items = self.catalog.items
+        self.stats = self.catalog.stats
+        self.item_lookup = self.catalog.item_lookup
+        self.stat_lookup = self.catalog.stat_lookup
+        self.tier_index = self.catalog.tier_index
+
+        # Конвейер проверки: захват, OCR и разбор вне главного потока
+        self._main_thread_call.connect(lambda callback: callback())
+        self.check_pipeline = CheckPipeline(
+            capture=self.screenshot_handler.capture_frame,
+            preprocess=self.screenshot_handler.process_frame,
+            parser_factory=self.create_item_parser,
+            cache=get_ocr_cache(),
+            cascade=get_ocr_cascade(),
+            dispatch=self._main_thread_call.emit
+        )
+        self.check_job: Optional[CheckJob] = None
 
-        # Создаём словари для быстрого поиска
-        self.item_lookup = build_item_lookup(self.items)
-        self.stat_lookup = build_stat_lookup(self.stats)
+        # Оценка сохранённого предмета по серверу торговли — в рабочих потоках (по соединению пула);
+        # одинаковые одновременные запросы совмещаются в PriceService, устаревшие отменяются
+        bulk_prices = create_bulk_scheduler(self.items)
+        if bulk_prices is not None:
+            bulk_prices.start()
+        self.price_service = PriceService(get_trade_client(), self.stats, get_price_cache(), bulk_prices)
+        self.price_executor = ThreadPoolExecutor(max_workers=get_settings().trade_pool_size,
+                                                 thread_name_prefix="price")
+        self.price_cancel: Optional[threading.Event] = None
 
         # Настраиваем слушатель клавиш (Ctrl+E)
         self.ctrl_e_listener = KeyListener(
@@ -57,14 +93,16 @@ class Overlay(QMainWindow):
         self.esc_listener = KeyListener(
             key_code=Constants.ESC_KEY_CODE,
             modifiers=None,
-            callback=self.finish_selection
+            callback=self.cancel_selection
         )
         self.esc_listener.start_listener()
 
         logger.info("Overlay инициализирован.")
 
     def start_selection(self) -> None:
-        """Создаёт панель MouseTrackingPanel при нажатии Ctrl+E."""
+        """Создаёт панель MouseTrackingPanel при нажатии Ctrl+E; незавершённые проверка и оценка отменяются."""
+        self.cancel_check()
+        self.cancel_price()
         if self.panel is not None:
             logger.debug("Панель уже активна. Игнорирование запроса на создание новой панели.")
             return
@@ -79,17 +117,20 @@ class Overlay(QMainWindow):
 
         self.panel = MouseTrackingPanel.create_panel(
             rect=rect,
-            screenshot_handler=self.screenshot_handler,
             finish_callback=self.finish_selection
         )
         self.panel.makeKeyAndOrderFront_(None)
         logger.info("Панель выбора создана и отображена.")
 
-    def finish_selection(self, text: str) -> None:
+    def create_item_parser(self) -> IncrementalItemParser:
+        """Парсер предмета по секциям текста (разбор идёт по мере распознавания полос)."""
+        return IncrementalItemParser(self.item_lookup, self.stat_lookup, self.tier_index)
+
+    def finish_selection(self, rect) -> None:
         """
-        Закрывает панель (если она есть) и инициирует отображение текстового редактора.
+        Закрывает панель выбора и запускает проверку выбранной области в CheckPipeline.
 
-        :param text: Текст, полученный из панели.
+        :param rect: ((x, y), (width, height)) - выделенная область в глобальных координатах.
         """
         if not self.panel:
             logger.warning("Попытка закрыть несуществующую панель.")
@@ -98,19 +139,64 @@ class Overlay(QMainWindow):
         self.panel.close()
         self.panel = None
         logger.info("Панель выбора закрыта.")
-        self.show_text_editor(text)
+        self.check_job = self.check_pipeline.submit(
+            rect,
+            on_result=self.on_check_result,
+            on_progress=self.on_check_progress,
+            on_error=self.on_check_error
+        )
 
-    def show_text_editor(self, text: str) -> None:
+    def cancel_selection(self) -> None:
+        """ESC: отменяет незавершённую проверку и закрывает панель выбора."""
+        self.cancel_check()
+        if isinstance(self.panel, MouseTrackingPanel):
+            self.panel.close()
+            self.panel = None
+            logger.info("Выбор области отменён.")
+
+    def cancel_check(self) -> None:
+        """Отменяет незавершённую проверку: её результат не будет показан."""
+        if self.check_job is not None:
+            self.check_pipeline.cancel()
+            logger.info("Проверка %d отменена.", self.check_job.id)
+            self.check_job = None
+
+    def cancel_price(self) -> None:
+        """Отменяет незавершённую оценку: её ещё не отправленные запросы не отправляются."""
+        if self.price_cancel is not None:
+            self.price_cancel.set()
+            self.price_cancel = None
+
+    def on_check_progress(self, job: CheckJob, stage: CheckStage) -> None:
+        """Стадия проверки началась (главный поток) — точка для индикатора ожидания."""
+        logger.debug("Проверка %d: %s.", job.id, stage.value)
+
+    def on_check_result(self, job: CheckJob, result: CheckResult) -> None:
+        """Результат проверки (главный поток)."""
+        if job is not self.check_job:
+            return
+        self.check_job = None
+        logger.info("Проверка %d завершена%s.", job.id, " (кэш OCR)" if result.cached else "")
+        self.show_text_editor(result.item)
+
+    def on_check_error(self, job: CheckJob, error: Exception) -> None:
+        """Проверка не удалась (главный поток)."""
+        if job is not self.check_job:
+            return
+        self.check_job = None
+        stage = job.stage.value if job.stage else "-"
+        logger.error("Проверка %d не удалась на стадии %s: %s", job.id, stage, error)
+
+    def show_text_editor(self, item: Optional[ParsedItem]) -> None:
         """
         Отображает TextEditorOverlay для редактирования типа предмета.
 
-        :param text: Текст для редактирования.
+        :param item: Разобранный предмет (None, если тип предмета не найден).
         """
         if self.panel is not None:
             logger.debug("Панель уже активна. Игнорирование запроса на открытие текстового редактора.")
             return
 
-        item = parse_item(text, self.item_lookup, self.stat_lookup)
         if not item:
             logger.warning("Не удалось извлечь тип предмета из текста.")
             return
@@ -146,13 +232,42 @@ class Overlay(QMainWindow):
         self.panel.close()
         self.panel = None
         logger.info(f"Отредактированный текст: {edited_text}")
-        # Здесь можно добавить логику сохранения или обработки отредактированного текста
+        try:
+            item = json.loads(edited_text)
+        except json.JSONDecodeError as e:
+            logger.error("Отредактированный текст не является JSON предмета: %s", e)
+            return
+
+        self.price_cancel = threading.Event()
+        future = self.price_executor.submit(self.price_service.price_item, item, self.price_cancel)
+        future.add_done_callback(
+            lambda done: self._main_thread_call.emit(lambda: self.on_price_result(item, done))
+        )
+
+    def on_price_result(self, item: dict, future: "Future[PriceResult]") -> None:
+        """Цена предмета с сервера торговли (главный поток)."""
+        try:
+            price = future.result()
+        except TradeCancelledError:
+            logger.info("Оценка %s отменена новой проверкой.", item.get("name"))
+            return
+        except (TradeError, KeyError, ValueError) as e:
+            logger.error("Не удалось получить цену %s: %s", item.get("name"), e)
+            return
+        if price.median is None:
+            logger.info("Цена %s: лотов не найдено.", item.get("name"))
+            return
+        logger.info("Цена %s: медиана %g %s (%d из %d лотов).", item.get("name"), price.median, price.currency,
+                    len(price.listings), price.total)
 
     def closeEvent(self, event) -> None:
         """Обработчик события закрытия окна. Останавливает слушатели клавиш."""
         logger.info("Закрытие Overlay. Остановка слушателей клавиш.")
         self.ctrl_e_listener.stop_listener()
         self.esc_listener.stop_listener()
+        self.check_pipeline.close()
+        self.price_executor.shutdown(wait=False, cancel_futures=True)
+        self.price_service.close()
         if self.panel:
             self.panel.close()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,88 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+from enums.item_category import ItemCategory
+from enums.tooltip_section import TooltipSection
+from tier_index import TierInfo
+
+Number = Union[int, float]
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedStat:
+    """
+    Распознанный модификатор предмета. Ссылается на запись стата из каталога, не копируя её.
+    """
+    stat: Mapping
+    matcher: Mapping
+    values: Tuple[Number, ...]
+    negate: bool
+    line: str
+    origin: TooltipSection = TooltipSection.Explicit
+    tier: Optional[TierInfo] = None
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.stat.get("id")
+
+    @property
+    def ref(self) -> str:
+        return self.stat["ref"]
+
+    @property
+    def value(self) -> Optional[Number]:
+        """Первое числовое значение строки или фиксированное значение матчера."""
+        return self.values[0] if self.values else self.matcher.get("value")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "value": self.value,
+            "values": list(self.values),
+            "negate": self.negate,
+            "ref": self.ref,
+            "origin": self.origin.value,
+            **({"tier": self.tier.tier, "tierCount": self.tier.tier_count, "roll": round(self.tier.percentile, 3)}
+               if self.tier else {}),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedItem:
+    """
+    Результат разбора текста предмета. Ссылается на запись предмета из каталога.
+    Сериализация (to_dict/to_json) выполняется только на границах ввода-вывода.
+    """
+    item: Mapping
+    stats: Tuple[ParsedStat, ...] = ()
+    rarity: Optional[str] = None
+    item_class: Optional[ItemCategory] = None
+
+    @property
+    def name(self) -> str:
+        return self.item.get("name", "")
+
+    @property
+    def namespace(self) -> Optional[str]:
+        return self.item.get("namespace")
+
+    @property
+    def category(self) -> Optional[str]:
+        return (self.item.get("craftable") or {}).get("category")
+
+    @property
+    def unique_base(self) -> Optional[str]:
+        return (self.item.get("unique") or {}).get("base")
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = dict(self.item)
+        result["stats"] = [stat.to_dict() for stat in self.stats]
+        if self.rarity:
+            result["rarity"] = self.rarity
+        if self.item_class:
+            result["itemClass"] = self.item_class.value
+        return result
+
+    def to_json(self, indent: Optional[int] = 4) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
@@ -3,70 +3,82 @@ import re
 import os
 from functools import lru_cache
 
+from item_index import ItemNameIndex, myers_distance
+from parsed_item import ParsedItem, ParsedStat
+from stat_matcher import CompiledStatMatcher
+from tooltip_tokenizer import TooltipTokenizer
+from enums.tooltip_section import TooltipSection, MODIFIER_SECTIONS
+from tier_index import EXPLICIT, IMPLICIT
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+# Минимальный score кандидата нечёткого поиска: одна ошибка OCR в названии даёт
+# не меньше 0.6, а случайное слово с коротким названием внутри ("loading" -> "ring") — меньше 0.5
+MIN_FUZZY_SCORE = 0.5
 
-@lru_cache(maxsize=1)
-def load_ndjson(file_name):
+@lru_cache(maxsize=None)
+def load_ndjson(file_name, data_dir=DATA_DIR):
     """
     Загружает ndjson-файл из папки data и возвращает список словарей.
-    Использует кэширование для ускорения повторных вызовов.
+    Использует кэширование для ускорения повторных вызовов (по записи на файл).
     """
-    file_path = os.path.join(DATA_DIR, file_name)
+    file_path = os.path.join(data_dir, file_name)
     with open(file_path, "r", encoding="utf-8") as file:
         return [json.loads(line) for line in file]
 
 def build_item_lookup(items):
     """
-    Создаёт словарь для быстрого поиска предметов по названию.
+    Создаёт индекс для быстрого (в том числе нечёткого) поиска предметов по названию.
     """
-    lookup = {}
-    for item in items:
-        name = item.get("name", "").lower()
-        ref_name = item.get("refName", "").lower()
-        if name:
-            lookup[name] = item
-        if ref_name:
-            lookup[ref_name] = item
-    return lookup
+    return ItemNameIndex(items)
 
 def build_stat_lookup(stats):
     """
-    Создаёт словарь для быстрого поиска статов по матчерам.
+    Создаёт предкомпилированный индекс для быстрого поиска статов по матчерам.
     """
-    lookup = {}
-    for stat in stats:
-        for matcher in stat.get("matchers", []):
-            pattern = re.escape(matcher["string"]).replace(r"\#", r"(\d+)")
-            lookup[pattern] = stat
-    return lookup
+    return CompiledStatMatcher(stats)
 
 
 def find_item_by_name(item_lookup, name):
     """
-    Находит предмет в словаре по названию.
-    Поддерживает очистку имени и поиск по частичному совпадению.
+    Находит предмет в индексе по названию.
+    Поддерживает очистку имени и нечёткий поиск с учётом ошибок OCR.
+    Возвращает None, если лучший кандидат нечёткого поиска слабее MIN_FUZZY_SCORE.
     """
     cleaned_name = clean_item_name(name)
     # Сначала пытаемся найти точное совпадение
-    if cleaned_name in item_lookup:
-        return item_lookup[cleaned_name]
-
-    # Если точное совпадение не найдено, ищем по частичному совпадению
-    for item_name, item in item_lookup.items():
-        if item_name in cleaned_name or cleaned_name in item_name:
-            return item
+    item = item_lookup.get(cleaned_name)
+    if item is not None:
+        return item
+
+    # Если точное совпадение не найдено, берём лучшего кандидата нечёткого поиска
+    candidates = item_lookup.search(cleaned_name, limit=1)
+    if candidates and candidates[0].score >= MIN_FUZZY_SCORE:
+        return candidates[0].item
     return None
 
 
+def search_items_by_name(item_lookup, name, limit=5):
+    """
+    Возвращает ранжированный список кандидатов (ItemCandidate) с расстоянием редактирования.
+    """
+    return item_lookup.search(clean_item_name(name), limit=limit)
+
+
 def find_stat_by_line(stat_lookup, line):
     """
-    Находит стат в словаре по строке.
+    Находит стат в индексе по строке.
     """
-    for pattern, stat in stat_lookup.items():
-        if re.match(pattern, line, re.IGNORECASE):
-            return stat
-    return None
+    match = stat_lookup.match(line)
+    return match.stat if match else None
+
+
+def match_stat_line(stat_lookup, line):
+    """
+    Сопоставляет строку со статом за один проход.
+    Возвращает StatMatch (стат, все числовые значения, флаг negate) или None.
+    """
+    return stat_lookup.match(line)
 
 def clean_item_name(name):
     """
@@ -78,35 +90,159 @@ def clean_item_name(name):
     return name.strip().lower()
 
 
-def parse_item(lines, item_lookup, stat_lookup):
+def find_base_type(item_lookup, name_lines):
     """
-    Парсит строку с переносами и возвращает JSON с характеристиками предмета.
+    Самое длинное название предмета внутри строк заголовка (BaseTypeMatch
+    с категорией craftable.category) или None.
     """
-    lines = [line.strip() for line in lines.split("\n") if line.strip()]
+    # Без clean_item_name: автомат сам проверяет границы слов, а скобки в конце
+    # ("Waystone (Tier 5)") — часть названия
+    return item_lookup.longest_match([name.strip().lower() for name in name_lines])
 
-    # Первая строка — название предмета
-    item_name = lines[0]
-    item = find_item_by_name(item_lookup, item_name)
-    if not item:
-        return json.dumps({"error": "Item not found"}, indent=4)
 
-    # Собираем результат
-    result = item.copy()
-    result["stats"] = []
+def _word_span_distance(name, line):
+    """
+    Наименьшее расстояние редактирования от названия до отрезка строки из целых слов
+    (на слово больше или меньше, чем в названии: OCR склеивает и разрывает слова).
+    """
+    words = line.split()
+    count = name.count(" ") + 1
+    distances = [myers_distance(name, " ".join(words[start:start + size]))
+                 for size in range(max(1, count - 1), count + 2)
+                 for start in range(len(words) - size + 1)]
+    return min(distances, default=len(name))
+
+
+def find_item_by_header(item_lookup, name_lines):
+    """
+    Находит предмет по строкам названия из заголовка тултипа.
+    Сначала ищет точное совпадение среди всех строк (уникальное имя, затем база),
+    затем самое длинное название внутри строки базы (магический или редкий
+    предмет), затем лучшего кандидата нечёткого поиска: не слабее MIN_FUZZY_SCORE
+    или близкого к целым словам строки.
+    """
+    for name in name_lines:
+        item = item_lookup.get(clean_item_name(name))
+        if item is not None:
+            return item
+
+    # База — последняя строка названия. Точное вхождение, не покрывающее её целиком,
+    # проигрывает кандидату нечёткого поиска, который длиннее на больше символов, чем
+    # его ошибок, и чьи ошибки укладываются в допуск для этой разницы: "Rubv Ring" —
+    # "ruby ring", а не "ring", но "Seething Padded Leggings" — не "expert padded leggings".
+    # Кандидат ищется, только если совпавшее название входит в более длинное (extendable)
+    match = find_base_type(item_lookup, name_lines)
+    if match is not None and match.line == len(name_lines) - 1:
+        if match.extendable and (match.start > 0 or match.end < len(name_lines[-1].strip())):
+            for candidate in search_items_by_name(item_lookup, name_lines[-1], limit=1):
+                extra = len(candidate.name) - len(match.name)
+                if candidate.distance < extra and candidate.distance <= item_lookup.max_typos(extra):
+                    return candidate.item
+        return match.item
+
+    # Совпадение выше (в случайном имени редкого предмета) — только если нечёткий поиск ничего не нашёл.
+    # Слабый кандидат не считается: нечитаемый OCR — это "предмет не найден". В магической строке
+    # score занижают аффиксы, поэтому подходит и кандидат в пределах max_typos от целых слов строки
+    # ("Honed Unset Rng of the Fox"), но не кусок слова ("Loading" -> "ring", "Simple" -> "impale")
+    best = best_line = None
+    for name in name_lines:
+        for candidate in search_items_by_name(item_lookup, name, limit=1):
+            if best is None or candidate.score > best.score:
+                best, best_line = candidate, name
+    if best is not None and (best.score >= MIN_FUZZY_SCORE or _word_span_distance(
+            best.name, clean_item_name(best_line)) <= item_lookup.max_typos(len(best.name))):
+        return best.item
+    return match.item if match is not None else None
+
+
+def item_category(item, item_class):
+    """Категория предмета для тиров: из каталога, иначе из строки "Item Class:"."""
+    return (item.get("craftable") or {}).get("category") or (item_class.value if item_class else None)
+
+
+def parse_stat_line(stat_lookup, line, tier_index=None, category=None):
+    """
+    Сопоставляет строку модификатора (TooltipLine) со статом.
+    Возвращает ParsedStat (с тиром, если передан tier_index) или None.
+    """
+    match = match_stat_line(stat_lookup, line.text)
+    if not match:
+        return None
+    tier = None
+    if tier_index is not None and match.values and not match.negate:
+        kind = IMPLICIT if line.section is TooltipSection.Implicit else EXPLICIT
+        tier = tier_index.lookup(match.stat.get("id"), category, match.values[0], kind)
+    return ParsedStat(match.stat, match.matcher, match.values, match.negate, line.text, line.section, tier)
+
+
+class IncrementalItemParser:
+    """
+    Разбор предмета по частям текста, приходящим по порядку (например, полосы OCR).
+    Каждая часть должна заканчиваться на границе секции тултипа. Предмет определяется
+    по заголовку из первой части, строки модификаторов сопоставляются сразу по приходу.
+    """
+
+    def __init__(self, item_lookup, stat_lookup, tier_index=None):
+        self.item_lookup = item_lookup
+        self.stat_lookup = stat_lookup
+        self.tier_index = tier_index
+        self.item = None
+        self.stats = []
+        self.modifier_lines = 0
+        self._tokenizer = TooltipTokenizer()
+        self._header_done = False
+        self._category = None
+
+    def feed(self, text):
+        """Добавляет очередную часть текста."""
+        lines = list(self._tokenizer.feed(text.split("\n")))
+        if not self._header_done:
+            # Заголовок целиком в первой секции, а она целиком в первой части
+            name_lines = [line.text for line in lines if line.section is TooltipSection.Header]
+            if not lines:
+                return
+            self._header_done = True
+            if name_lines:
+                self.item = find_item_by_header(self.item_lookup, name_lines)
+            if self.item:
+                self._category = item_category(self.item, self._tokenizer.item_class)
+        if not self.item:
+            return
+        for line in lines:
+            if line.section in MODIFIER_SECTIONS:
+                self.modifier_lines += 1
+                stat = parse_stat_line(self.stat_lookup, line, self.tier_index, self._category)
+                if stat:
+                    self.stats.append(stat)
+
+    @property
+    def hit_rate(self):
+        """Доля строк модификаторов, сопоставленных со статами (0, если предмет не найден)."""
+        if not self.item:
+            return 0.0
+        return len(self.stats) / self.modifier_lines if self.modifier_lines else 1.0
+
+    def result(self):
+        """ParsedItem по уже полученным частям или None, если предмет не найден."""
+        if not self.item:
+            return None
+        return ParsedItem(self.item, tuple(self.stats), rarity=self._tokenizer.rarity,
+                          item_class=self._tokenizer.item_class)
+
+
+def parse_item(lines, item_lookup, stat_lookup, tier_index=None):
+    """
+    Парсит строку с переносами и возвращает ParsedItem с характеристиками предмета
+    или None, если предмет не найден.
+    Со статами сопоставляются только строки секций модификаторов.
+    Если передан tier_index, к статам добавляются тир и положение значения в тире.
+    """
+    parser = IncrementalItemParser(item_lookup, stat_lookup, tier_index)
+    parser.feed(lines)
+    return parser.result()
 
-    # Парсим остальные строки
-    for line in lines[1:]:
-        stat = find_stat_by_line(stat_lookup, line)
-        if stat:
-            # Извлекаем числовое значение из строки
-            pattern = re.escape(stat["matchers"][0]["string"]).replace(r"\#", r"(\d+)")
-            match = re.match(pattern, line, re.IGNORECASE)
-            if match:
-                value = int(match.group(1))
-                result["stats"].append({
-                    "id": stat["id"],
-                    "value": value,
-                    "ref": stat["ref"],
-                })
 
-    return json.dumps(result, indent=4)
\ No newline at end of file
+if __name__ == "__main__":
+    # python -m parsing_utils parse-batch ... — те же команды, что и в cli.py
+    from cli import main
+    raise SystemExit(main())
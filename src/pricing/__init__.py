@@ -0,0 +1,18 @@
+"""
+Оценка предметов по серверу торговли: запросы по разобранному предмету,
+пул keep-alive соединений, ограничение частоты по заголовкам сервера,
+кэш цен (память и SQLite) и предзагрузка снимка цен для оценки без сети.
+"""
+from pricing.bulk import BulkPriceIndex, BulkPriceScheduler, create_bulk_scheduler
+from pricing.cache import PriceCache, get_price_cache
+from pricing.client import (Listing, PriceResult, TradeCancelledError, TradeClient, TradeError,
+                            get_trade_client)
+from pricing.query import TradeStatIndex, build_query
+from pricing.rate_limit import RateLimiter
+from pricing.service import PriceService
+
+__all__ = [
+    "BulkPriceIndex", "BulkPriceScheduler", "Listing", "PriceCache", "PriceResult", "PriceService",
+    "RateLimiter", "TradeCancelledError", "TradeClient", "TradeError", "TradeStatIndex", "build_query",
+    "create_bulk_scheduler", "get_price_cache", "get_trade_client",
+]
@@ -0,0 +1,267 @@
+"""
+Фоновая предзагрузка цен валюты, фрагментов, камней и уникальных предметов.
+
+Снимок цен берётся целиком с настраиваемого адреса (http(s)://..., путь к файлу
+или file://...; {league} подставляется) в формате:
+
+    {"league": "Standard", "updated": 1700000000.0,
+     "lines": [{"name": "Divine Orb", "amount": 150, "currency": "exalted", "listings": 340}, ...]}
+
+и превращается в компактный индекс по названиям из items.ndjson. Курсы валют
+(по tradeTag предметов валюты) вычисляются при том же обновлении, все цены
+индекса хранятся в базовой валюте. Такие предметы оцениваются без сети.
+"""
+import json
+import os
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from config import get_settings
+from logger_config import logger
+from parsing_utils import DATA_DIR
+from pricing.cache import price_category
+from pricing.client import ConnectionPool, Listing, PriceResult, TradeError
+
+BULK_SNAPSHOT_FILE = "prices_bulk.json"
+BASE_CURRENCY = "exalted"
+# Крупная валюта для показа дорогих предметов
+DISPLAY_CURRENCY = "divine"
+BULK_QUERY_ID = "bulk"
+# Магические и редкие предметы оцениваются по модификаторам, не по названию
+_PRICED_BY_STATS = ("magic", "rare")
+
+
+class BulkItem(NamedTuple):
+    name: str
+    category: str
+    trade_tag: Optional[str]
+
+
+def catalog_names(items: Iterable[Mapping], categories: Sequence[str]) -> Dict[str, BulkItem]:
+    """name и refName предметов нужных категорий (price_category) -> BulkItem."""
+    names: Dict[str, BulkItem] = {}
+    wanted = set(categories)
+    for item in items:
+        category = price_category(item)
+        if category not in wanted:
+            continue
+        entry = BulkItem(item["name"], category, item.get("tradeTag"))
+        for name in (item.get("name"), item.get("refName")):
+            if name:
+                names.setdefault(name, entry)
+    return names
+
+
+def currency_rates(lines: Sequence[Mapping], names: Mapping[str, BulkItem], base: str = BASE_CURRENCY) -> Dict[str, float]:
+    """
+    Курсы валют в base: цена единицы валюты (по tradeTag её предмета).
+    Строка в ещё неизвестной валюте учитывается на следующем проходе.
+    """
+    rates = {base: 1.0}
+    pending = [(names[line["name"]].trade_tag, line) for line in lines
+               if line.get("name") in names and names[line["name"]].trade_tag]
+    while pending:
+        left = []
+        for tag, line in pending:
+            if tag in rates:
+                continue
+            if line.get("currency") in rates:
+                rates[tag] = float(line["amount"]) * rates[line["currency"]]
+            else:
+                left.append((tag, line))
+        if len(left) == len(pending):
+            break
+        pending = left
+    return rates
+
+
+class BulkPriceIndex:
+    """
+    Цены по названию предмета: позиция в массивах цен (в базовой валюте)
+    и числа лотов вместо словаря на строку.
+    """
+
+    def __init__(self, names: Dict[str, int], values: "array[float]", listings: "array[int]",
+                 rates: Dict[str, float], updated: float, base: str = BASE_CURRENCY) -> None:
+        self.names = names
+        self.values = values
+        self.listings = listings
+        self.rates = rates
+        self.updated = updated
+        self.base = base
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Mapping[str, Any], catalog: Mapping[str, BulkItem],
+                      base: str = BASE_CURRENCY) -> "BulkPriceIndex":
+        lines = [line for line in snapshot.get("lines") or () if line.get("name") in catalog]
+        rates = currency_rates(lines, catalog, base)
+        names: Dict[str, int] = {}
+        values, listings = array("d"), array("L")
+        skipped = 0
+        for line in lines:
+            rate = rates.get(line.get("currency"))
+            if rate is None or line.get("amount") is None:
+                skipped += 1
+                continue
+            name = catalog[line["name"]].name
+            names[name] = len(values)
+            values.append(float(line["amount"]) * rate)
+            listings.append(int(line.get("listings") or 0))
+        if skipped:
+            logger.debug("Снимок цен: пропущено строк в неизвестной валюте %d.", skipped)
+        return cls(names, values, listings, rates, float(snapshot.get("updated") or time.time()), base)
+
+    def convert(self, amount: float, source: str, target: str) -> Optional[float]:
+        if source not in self.rates or target not in self.rates:
+            return None
+        return amount * self.rates[source] / self.rates[target]
+
+    def price(self, name: str) -> Optional[PriceResult]:
+        row = self.names.get(name)
+        if row is None:
+            return None
+        value = self.values[row]
+        currency = DISPLAY_CURRENCY if value >= self.rates.get(DISPLAY_CURRENCY, float("inf")) else self.base
+        amount = self.convert(value, self.base, currency)
+        return PriceResult(BULK_QUERY_ID, self.listings[row], (Listing(round(amount, 2), currency),))
+
+
+def read_snapshot(source: str, league: str, pool: Optional[ConnectionPool] = None) -> Dict[str, Any]:
+    """
+    Снимок цен из источника: http(s)://... (через pool), file://... или путь.
+    :raises TradeError: Если источник недоступен или ответил ошибкой.
+    """
+    source = source.replace("{league}", league)
+    parts = urlsplit(source)
+    try:
+        if parts.scheme in ("http", "https"):
+            pool = pool or ConnectionPool(f"{parts.scheme}://{parts.netloc}")
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            response = pool.request("GET", path, headers={"Accept": "application/json"})
+            if response.status >= 400:
+                raise TradeError(f"Снимок цен {source}: HTTP {response.status}")
+            return json.loads(response.body)
+        with open(url2pathname(parts.path) if parts.scheme == "file" else source, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        raise TradeError(f"Снимок цен {source}: {e}") from e
+
+
+class BulkPriceScheduler:
+    """
+    Обновляет индекс цен из источника каждые interval секунд в фоновом потоке.
+
+    Последний снимок сохраняется в snapshot_path и читается при запуске, так что
+    после перезапуска приложения цены доступны сразу, а обновление идёт только
+    когда снимок загружен раньше чем interval назад. Срок считается от локального
+    времени загрузки, а не от поля "updated" снимка: источник может отдавать данные
+    старше interval (локальный файл). lookup() не ходит в сеть.
+    """
+
+    def __init__(self, source: str, league: str, items: Iterable[Mapping], categories: Sequence[str],
+                 interval: float = 900.0, snapshot_path: Optional[str] = None, timeout: float = 10.0) -> None:
+        self.source = source
+        self.league = league
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.catalog = catalog_names(items, categories)
+        self.index: Optional[BulkPriceIndex] = None
+        self.refreshes = 0
+        # Локальное время последней загрузки снимка (time.time()); updated индекса — только для показа возраста
+        self._fetched_at: Optional[float] = None
+        parts = urlsplit(source)
+        self._pool = (ConnectionPool(f"{parts.scheme}://{parts.netloc}", 1, timeout)
+                      if parts.scheme in ("http", "https") else None)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> BulkPriceIndex:
+        """Загружает снимок и заменяет индекс. :raises TradeError:"""
+        start = time.perf_counter()
+        snapshot = read_snapshot(self.source, self.league, self._pool)
+        self.index = BulkPriceIndex.from_snapshot(snapshot, self.catalog)
+        self._fetched_at = time.time()
+        self.refreshes += 1
+        logger.info("Снимок цен: %d предметов, курсов валют %d, %.0f ms.",
+                    len(self.index), len(self.index.rates), (time.perf_counter() - start) * 1e3)
+        if self.snapshot_path:
+            self._save(snapshot)
+        return self.index
+
+    def _save(self, snapshot: Mapping[str, Any]) -> None:
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(dict(snapshot, updated=self.index.updated), file, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("Не удалось сохранить снимок цен %s: %s", self.snapshot_path, e)
+
+    def load_saved(self) -> Optional[BulkPriceIndex]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                self.index = BulkPriceIndex.from_snapshot(json.load(file), self.catalog)
+            # Файл перезаписывается при каждой загрузке: его mtime — время последней загрузки
+            self._fetched_at = os.path.getmtime(self.snapshot_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Сохранённый снимок цен не прочитан: %s", e)
+            return None
+        logger.info("Сохранённый снимок цен: %d предметов, возраст %.0f мин.",
+                    len(self.index), (time.time() - self.index.updated) / 60)
+        return self.index
+
+    def lookup(self, item: Mapping[str, Any]) -> Optional[PriceResult]:
+        """Цена из индекса для предмета в форме ParsedItem.to_dict() или None."""
+        index = self.index
+        if index is None or (item.get("rarity") or "").lower() in _PRICED_BY_STATS:
+            return None
+        return index.price(item.get("name", ""))
+
+    def _due(self) -> float:
+        """Секунды до следующего обновления."""
+        if self.index is None or self._fetched_at is None:
+            return 0.0
+        return max(0.0, self._fetched_at + self.interval - time.time())
+
+    def _run(self) -> None:
+        self.load_saved()
+        while not self._stop.wait(self._due()):
+            try:
+                self.refresh()
+            except TradeError as e:
+                logger.warning("Обновление снимка цен не удалось: %s", e)
+                if self._stop.wait(min(self.interval, 60.0)):
+                    return
+
+    def start(self) -> "BulkPriceScheduler":
+        self._thread = threading.Thread(target=self._run, name="bulk-prices", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.close()
+
+
+def parse_categories(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def create_bulk_scheduler(items: Iterable[Mapping]) -> Optional[BulkPriceScheduler]:
+    """Планировщик по настройкам (Settings.bulk_price_*); None, если источник не задан."""
+    settings = get_settings()
+    if not settings.bulk_price_url:
+        return None
+    return BulkPriceScheduler(settings.bulk_price_url, settings.trade_league, items,
+                              parse_categories(settings.bulk_price_categories), settings.bulk_price_interval,
+                              os.path.join(DATA_DIR, BULK_SNAPSHOT_FILE), settings.trade_timeout)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+
+from config import get_settings
+from logger_config import logger
+from parsing_utils import DATA_DIR
+from pricing.client import Listing, PriceResult
+
+PRICE_CACHE_FILE = "prices.sqlite3"
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTL = 1800.0
+DEFAULT_STALE = 86400.0
+# Сводка метрик в лог каждые LOG_EVERY обращений
+LOG_EVERY = 50
+
+
+def canonical_query(query: Mapping[str, Any]) -> str:
+    """Запрос торговли в каноническом JSON: ключи и фильтры статов упорядочены."""
+    query = json.loads(json.dumps(query))
+    for group in (query.get("query") or {}).get("stats") or ():
+        group["filters"] = sorted(group.get("filters") or (), key=lambda stat: json.dumps(stat, sort_keys=True))
+    return json.dumps(query, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def query_key(query: Mapping[str, Any], league: str) -> str:
+    """Ключ кэша: хеш канонического запроса в лиге."""
+    return hashlib.sha256(f"{league}\n{canonical_query(query)}".encode("utf-8")).hexdigest()
+
+
+def price_category(item: Mapping[str, Any]) -> str:
+    """Категория предмета для TTL: UNIQUE для уникальных, иначе craftable.category."""
+    if item.get("namespace") == "UNIQUE":
+        return "UNIQUE"
+    return (item.get("craftable") or {}).get("category") or item.get("namespace") or ""
+
+
+def parse_ttls(value: str) -> Dict[str, float]:
+    """'Currency=600,UNIQUE=3600' -> {'Currency': 600.0, 'UNIQUE': 3600.0}."""
+    ttls = {}
+    for part in value.split(","):
+        name, _, seconds = part.partition("=")
+        if not name.strip():
+            continue
+        try:
+            ttls[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning("Некорректный TTL кэша цен: %r", part)
+    return ttls
+
+
+class CachedPrice(NamedTuple):
+    result: PriceResult
+    category: str
+    # Время записи и окончания свежести, секунды эпохи (переживают перезапуск)
+    stored: float
+    expires: float
+    # Просрочена, но ещё отдаётся (stale-while-revalidate)
+    stale: bool = False
+
+
+class PriceCacheInfo(NamedTuple):
+    memory_hits: int
+    disk_hits: int
+    stale_hits: int
+    misses: int
+    memory_size: int
+    hit_rate: float
+
+
+def _dump(result: PriceResult) -> str:
+    return json.dumps({"id": result.query_id, "total": result.total,
+                       "listings": [list(listing) for listing in result.listings]})
+
+
+def _load(payload: str) -> PriceResult:
+    data = json.loads(payload)
+    return PriceResult(data["id"], data["total"], tuple(Listing(*listing) for listing in data["listings"]))
+
+
+class PriceCache:
+    """
+    Двухуровневый кэш цен по ключу query_key: LRU в памяти перед SQLite (WAL) на диске.
+
+    Запись свежа ttl секунд (по категории предмета), затем ещё stale секунд
+    отдаётся как просроченная — вызывающий обновляет её в фоне. Диск переживает
+    перезапуск приложения; если базу открыть нельзя, кэш работает только в памяти.
+    """
+
+    def __init__(self, path: Optional[str] = None, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL,
+                 category_ttls: Optional[Mapping[str, float]] = None, stale: float = DEFAULT_STALE,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.category_ttls = dict(category_ttls or {})
+        self.stale = stale
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, CachedPrice]" = OrderedDict()
+        self.memory_hits = self.disk_hits = self.stale_hits = self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open(path)
+
+    def _open(self, path: str) -> None:
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS prices (key TEXT PRIMARY KEY, category TEXT NOT NULL, "
+                       "stored REAL NOT NULL, expires REAL NOT NULL, payload TEXT NOT NULL)")
+            removed = db.execute("DELETE FROM prices WHERE expires < ?", (self._clock() - self.stale,)).rowcount
+            self._db = db
+            logger.debug("Кэш цен %s: удалено устаревших записей %d.", path, removed)
+        except sqlite3.Error as e:
+            logger.warning("Кэш цен на диске недоступен (%s): %s. Кэш только в памяти.", path, e)
+
+    def ttl_for(self, category: str) -> float:
+        return self.category_ttls.get(category, self.ttl)
+
+    def _remember(self, key: str, entry: CachedPrice) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[CachedPrice]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT category, stored, expires, payload FROM prices WHERE key = ?",
+                                   (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Ошибка чтения кэша цен: %s", e)
+            return None
+        if row is None:
+            return None
+        try:
+            return CachedPrice(_load(row[3]), row[0], row[1], row[2])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Повреждённая запись кэша цен %s: %s", key[:12], e)
+            return None
+
+    def get(self, key: str) -> Optional[CachedPrice]:
+        """Запись по ключу: свежая, просроченная (stale=True) или None."""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            from_memory = entry is not None
+            if entry is None:
+                entry = self._read(key)
+            if entry is None or now > entry.expires + self.stale:
+                self.misses += 1
+                self._memory.pop(key, None)
+                entry = None
+            else:
+                self._remember(key, entry)
+                if now > entry.expires:
+                    self.stale_hits += 1
+                    entry = entry._replace(stale=True)
+                elif from_memory:
+                    self.memory_hits += 1
+                else:
+                    self.disk_hits += 1
+            lookups = self.memory_hits + self.disk_hits + self.stale_hits + self.misses
+        if lookups % LOG_EVERY == 0:
+            self.log_info()
+        return entry
+
+    def put(self, key: str, category: str, result: PriceResult) -> CachedPrice:
+        now = self._clock()
+        entry = CachedPrice(result, category, now, now + self.ttl_for(category))
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?)",
+                                     (key, category, entry.stored, entry.expires, _dump(result)))
+                except sqlite3.Error as e:
+                    logger.warning("Ошибка записи кэша цен: %s", e)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM prices")
+
+    def info(self) -> PriceCacheInfo:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.stale_hits
+            lookups = hits + self.misses
+            return PriceCacheInfo(self.memory_hits, self.disk_hits, self.stale_hits, self.misses,
+                                  len(self._memory), hits / lookups if lookups else 0.0)
+
+    def log_info(self) -> None:
+        info = self.info()
+        logger.info("Кэш цен: память %d, диск %d, просроченные %d, промахи %d, доля попаданий %.0f%%.",
+                    info.memory_hits, info.disk_hits, info.stale_hits, info.misses, 100 * info.hit_rate)
+
+    def close(self) -> None:
+        self.log_info()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+@lru_cache(maxsize=1)
+def get_price_cache() -> Optional[PriceCache]:
+    """Кэш цен процесса по настройкам (Settings.price_cache_*); None, если размер 0."""
+    settings = get_settings()
+    if settings.price_cache_size <= 0:
+        return None
+    path = settings.price_cache_file or os.path.join(DATA_DIR, PRICE_CACHE_FILE)
+    cache = PriceCache(path, settings.price_cache_size, settings.price_cache_ttl,
+                       parse_ttls(settings.price_cache_ttls), settings.price_cache_stale)
+    logger.info("Кэш цен: %s, %d записей в памяти, TTL %.0f с (%s), просроченные отдаются ещё %.0f с.",
+                path, cache.maxsize, cache.ttl, settings.price_cache_ttls, cache.stale)
+    return cache
@@ -0,0 +1,203 @@
+import http.client
+import json
+import queue
+import statistics
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+from config import get_settings
+from logger_config import logger
+from pricing.rate_limit import RateLimiter
+
+USER_AGENT = "poe2-price-checker"
+# Сервер торговли отдаёт не больше 10 лотов за один fetch
+FETCH_BATCH = 10
+MAX_RETRIES = 2
+SEARCH = "search"
+FETCH = "fetch"
+
+
+class TradeError(Exception):
+    """Запрос к серверу торговли не удался."""
+
+
+class TradeCancelledError(Exception):
+    """Оценка отменена: запрос устарел и не отправлен."""
+
+
+class Listing(NamedTuple):
+    amount: float
+    currency: str
+
+
+class PriceResult(NamedTuple):
+    query_id: str
+    # Всего найдено лотов (сервер возвращает первые listings по цене)
+    total: int
+    listings: Tuple[Listing, ...]
+
+    @property
+    def currency(self) -> Optional[str]:
+        """Самая частая валюта среди лотов."""
+        if not self.listings:
+            return None
+        return Counter(listing.currency for listing in self.listings).most_common(1)[0][0]
+
+    @property
+    def median(self) -> Optional[float]:
+        """Медианная цена лотов в самой частой валюте."""
+        amounts = [listing.amount for listing in self.listings if listing.currency == self.currency]
+        return statistics.median(amounts) if amounts else None
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    # Имена заголовков в нижнем регистре
+    headers: Dict[str, str]
+    body: bytes
+
+
+class ConnectionPool:
+    """
+    Пул keep-alive соединений HTTP(S) к одному хосту.
+
+    Соединение берётся из пула на время запроса и возвращается, если сервер
+    не закрыл его; новых соединений открывается не больше size. Оборванное
+    сервером keep-alive соединение переоткрывается, и запрос повторяется один раз.
+    """
+
+    def __init__(self, base_url: str, size: int = 2, timeout: float = 10.0) -> None:
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.opened = 0
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            self.opened += 1
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Mapping[str, str]] = None) -> HttpResponse:
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+                reused = True
+            except queue.Empty:
+                connection, reused = self._connect(), False
+            for attempt in range(2):
+                try:
+                    connection.request(method, self.prefix + path, body, dict(headers or {}))
+                    response = connection.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, ConnectionError) as e:
+                    connection.close()
+                    if not reused or attempt:
+                        raise TradeError(f"Ошибка соединения с {self.host}: {e!r}") from e
+                    connection, reused = self._connect(), False
+                except OSError as e:
+                    connection.close()
+                    raise TradeError(f"Ошибка соединения с {self.host}: {e!r}") from e
+            if response.will_close:
+                connection.close()
+            else:
+                self._idle.put(connection)
+            return HttpResponse(response.status, {name.lower(): value for name, value in response.getheaders()}, data)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class TradeClient:
+    """
+    Клиент сервера торговли: поиск (search) и получение лотов (fetch)
+    через пул keep-alive соединений с ожиданием по RateLimiter.
+    """
+
+    def __init__(self, base_url: str, league: str, pool_size: int = 2, timeout: float = 10.0,
+                 listings: int = FETCH_BATCH, limiter: Optional[RateLimiter] = None) -> None:
+        self.league = league
+        self.listings = listings
+        self.pool = ConnectionPool(base_url, pool_size, timeout)
+        self.limiter = limiter or RateLimiter()
+        self.requests = 0
+
+    def _request(self, policy: str, method: str, path: str, payload: Optional[Any] = None,
+                 cancel_event: Optional[threading.Event] = None) -> Any:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in range(MAX_RETRIES + 1):
+            if self.limiter.acquire(policy, cancel_event) is None:
+                raise TradeCancelledError(f"{method} {path}")
+            response = self.pool.request(method, path, body, headers)
+            self.requests += 1
+            self.limiter.update(policy, response.headers, response.status)
+            if response.status == 429 and attempt < MAX_RETRIES:
+                logger.warning("Сервер торговли ограничил запросы (%s), ожидание %s с.",
+                               policy, response.headers.get("retry-after", "?"))
+                continue
+            if response.status >= 400:
+                raise TradeError(f"{method} {path}: HTTP {response.status} {response.body[:200]!r}")
+            return json.loads(response.body)
+        raise TradeError(f"{method} {path}: превышен лимит запросов")
+
+    def search(self, query: Mapping[str, Any], cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """POST /api/trade2/search/<league>: {'id', 'result': [id лотов], 'total'}."""
+        return self._request(SEARCH, "POST", f"/api/trade2/search/{quote(self.league)}", query, cancel_event)
+
+    def fetch(self, ids: Sequence[str], query_id: str,
+              cancel_event: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """GET /api/trade2/fetch/<ids>?query=<id>: лоты с ценами."""
+        result: List[Dict[str, Any]] = []
+        for start in range(0, len(ids), FETCH_BATCH):
+            batch = ",".join(ids[start:start + FETCH_BATCH])
+            response = self._request(FETCH, "GET", f"/api/trade2/fetch/{batch}?query={quote(query_id)}",
+                                     cancel_event=cancel_event)
+            result.extend(entry for entry in response.get("result") or () if entry)
+        return result
+
+    def price(self, query: Mapping[str, Any], cancel_event: Optional[threading.Event] = None) -> PriceResult:
+        """
+        Поиск и цены первых listings лотов (сортировка по цене).
+        :raises TradeCancelledError: Если cancel_event установлен до отправки очередного запроса.
+        """
+        found = self.search(query, cancel_event)
+        ids = list(found.get("result") or ())[:self.listings]
+        listings = []
+        for entry in self.fetch(ids, found["id"], cancel_event) if ids else ():
+            price = (entry.get("listing") or {}).get("price") or {}
+            if price.get("amount") is not None and price.get("currency"):
+                listings.append(Listing(float(price["amount"]), price["currency"]))
+        return PriceResult(found["id"], int(found.get("total") or 0), tuple(listings))
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+@lru_cache(maxsize=1)
+def get_trade_client() -> TradeClient:
+    """Клиент процесса по настройкам (Settings.trade_*)."""
+    settings = get_settings()
+    return TradeClient(settings.trade_url, settings.trade_league, settings.trade_pool_size,
+                       settings.trade_timeout, settings.trade_listings)
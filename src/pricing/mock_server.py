@@ -0,0 +1,247 @@
+"""
+Локальная замена сервера торговли для бенчмарков и отладки без сети.
+
+Отвечает на search и fetch детерминированными лотами, отдаёт снимок цен
+всех предметов items.ndjson для pricing.bulk (/api/bulk/<league>), держит keep-alive
+(HTTP/1.1), добавляет задержку и ограничивает частоту запросов по правилам
+в стиле сервера торговли: заголовки X-Rate-Limit-*, 429 и Retry-After.
+
+Запуск: python -m pricing.mock_server --port 8080 --latency 0.05
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from logger_config import logger
+from parsing_utils import load_ndjson
+from pricing.rate_limit import RateRule
+
+SEARCH_RULES = (RateRule(5, 10, 60), RateRule(15, 60, 300))
+FETCH_RULES = (RateRule(12, 4, 10), RateRule(16, 12, 300))
+BULK_RULES = (RateRule(10, 60, 60),)
+POLICIES = {"search": "trade-search-request-limit", "fetch": "trade-fetch-request-limit", "bulk": "bulk-prices"}
+# Курсы валют снимка: tradeTag -> (валюта цены, цена)
+BULK_RATES = {"divine": ("exalted", 150.0), "chaos": ("divine", 0.05), "mirror": ("divine", 1200.0),
+              "annul": ("exalted", 3.0), "alch": ("exalted", 0.3), "regal": ("exalted", 0.2)}
+MAX_RESULTS = 100
+CURRENCIES = ("exalted", "exalted", "exalted", "chaos", "divine")
+
+
+def _digest(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class WindowLimiter:
+    """Скользящие окна по правилам одной политики, как их считает сервер."""
+
+    def __init__(self, rules: Sequence[RateRule], clock=time.monotonic) -> None:
+        self.rules = tuple(rules)
+        self._clock = clock
+        self._hits: List[Deque[float]] = [deque() for _ in self.rules]
+        self._restricted: List[float] = [0.0] * len(self.rules)
+        self._lock = threading.Lock()
+
+    def hit(self) -> Optional[float]:
+        """Учитывает запрос. :return: Секунды ограничения, если запрос отклонён, иначе None."""
+        with self._lock:
+            now = self._clock()
+            for hits, rule in zip(self._hits, self.rules):
+                while hits and hits[0] <= now - rule.period:
+                    hits.popleft()
+            restricted = max([until - now for until in self._restricted] + [0.0])
+            if restricted > 0:
+                return restricted
+            for index, (hits, rule) in enumerate(zip(self._hits, self.rules)):
+                hits.append(now)
+                if len(hits) > rule.hits:
+                    self._restricted[index] = now + rule.penalty
+                    restricted = max(restricted, rule.penalty)
+            return restricted or None
+
+    def headers(self) -> Dict[str, str]:
+        with self._lock:
+            now = self._clock()
+            state = ",".join(f"{len(hits)}:{rule.period:g}:{max(0, round(until - now))}"
+                             for hits, rule, until in zip(self._hits, self.rules, self._restricted))
+        return {
+            "X-Rate-Limit-Rules": "Ip",
+            "X-Rate-Limit-Ip": ",".join(f"{rule.hits}:{rule.period:g}:{rule.penalty:g}" for rule in self.rules),
+            "X-Rate-Limit-Ip-State": state,
+        }
+
+
+class MockTradeServer(ThreadingHTTPServer):
+    """
+    Сервер на свободном порту (port=0) в фоновом потоке.
+
+    Счётчики: requests (по типам запросов), connections (открытые TCP-соединения),
+    limited (ответы 429).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 search_rules: Sequence[RateRule] = SEARCH_RULES, fetch_rules: Sequence[RateRule] = FETCH_RULES,
+                 seed: int = 0, items: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.seed = seed
+        self.limiters = {"search": WindowLimiter(search_rules), "fetch": WindowLimiter(fetch_rules),
+                         "bulk": WindowLimiter(BULK_RULES)}
+        self._items = items
+        self.requests: Counter = Counter()
+        self.connections = 0
+        self.limited = 0
+        self._counter_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str, kind: Optional[str] = None) -> None:
+        with self._counter_lock:
+            if name == "requests":
+                self.requests[kind] += 1
+            else:
+                setattr(self, name, getattr(self, name) + 1)
+
+    def search(self, league: str, query: Any) -> Dict[str, Any]:
+        key = json.dumps(query, sort_keys=True)
+        query_id = format(_digest(f"{self.seed}:{league}:{key}"), "x")[:10]
+        total = _digest(query_id) % (MAX_RESULTS * 3)
+        result = [f"{query_id}{index:03d}" for index in range(min(total, MAX_RESULTS))]
+        return {"id": query_id, "complexity": len(key) // 50, "result": result, "total": total}
+
+    def listing(self, listing_id: str) -> Dict[str, Any]:
+        # Цены растут по порядку лотов, как при сортировке по цене
+        digest = _digest(listing_id[:-3])
+        base = 1 + digest % 200
+        amount = base + int(listing_id[-3:]) * (1 + digest % 5)
+        return {"id": listing_id, "listing": {"price": {"type": "~price", "amount": amount,
+                                                        "currency": CURRENCIES[digest % len(CURRENCIES)]}},
+                "item": {}}
+
+    def bulk(self, league: str) -> Dict[str, Any]:
+        """Снимок цен всех предметов каталога; цены меняются с каждым обновлением снимка."""
+        if self._items is None:
+            self._items = load_ndjson("items.ndjson")
+        version = self.requests["bulk"]
+        lines = []
+        for item in self._items:
+            tag = item.get("tradeTag")
+            if tag == "exalted":
+                continue
+            if tag in BULK_RATES:
+                currency, amount = BULK_RATES[tag]
+            else:
+                digest = _digest(f"{self.seed}:{version}:{item['name']}")
+                currency = ("exalted", "exalted", "chaos", "divine")[digest % 4]
+                amount = round((1 + digest % 300) / (20 if currency == "divine" else 1), 2)
+            lines.append({"name": item["name"], "amount": amount, "currency": currency,
+                          "listings": _digest(item["name"]) % 500})
+        return {"league": league, "updated": time.time(), "lines": lines}
+
+    def start(self) -> "MockTradeServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-trade", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockTradeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят отдельными записями: без TCP_NODELAY keep-alive ждёт отложенный ACK
+    disable_nagle_algorithm = True
+    server: MockTradeServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("mock trade: " + format % args)
+
+    def _reply(self, status: int, payload: Any, headers: Dict[str, str]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, kind: str, respond) -> None:
+        self.server.count("requests", kind)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        limiter = self.server.limiters[kind]
+        restricted = limiter.hit()
+        headers = {"X-Rate-Limit-Policy": POLICIES[kind], **limiter.headers()}
+        if restricted is not None:
+            self.server.count("limited")
+            headers["Retry-After"] = str(max(1, round(restricted)))
+            self._reply(429, {"error": {"code": 3, "message": "Rate limit exceeded"}}, headers)
+            return
+        self._reply(200, respond(), headers)
+
+    def do_POST(self) -> None:
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if parts[:3] != ["api", "trade2", "search"] or len(parts) != 4:
+            self._reply(404, {"error": {"code": 1, "message": "Resource not found"}}, {})
+            return
+        query = json.loads(body or b"{}")
+        self._handle("search", lambda: self.server.search(parts[3], query))
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts[:2] == ["api", "bulk"] and len(parts) == 3:
+            self._handle("bulk", lambda: self.server.bulk(parts[2]))
+            return
+        if parts[:3] != ["api", "trade2", "fetch"] or len(parts) != 4:
+            self._reply(404, {"error": {"code": 1, "message": "Resource not found"}}, {})
+            return
+        if not parse_qs(url.query).get("query"):
+            self._reply(400, {"error": {"code": 2, "message": "Invalid query"}}, {})
+            return
+        ids = parts[3].split(",")
+        self._handle("fetch", lambda: {"result": [self.server.listing(listing_id) for listing_id in ids]})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальный сервер торговли для отладки без сети")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа, секунды")
+    args = parser.parse_args()
+    server = MockTradeServer(args.host, args.port, args.latency)
+    logger.info("Локальный сервер торговли: %s (POE2PC_TRADE_URL=%s)", server.url, server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
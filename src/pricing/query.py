@@ -0,0 +1,70 @@
+import math
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+# Допуск значения модификатора в запросе: ищутся предметы со значением не хуже 90% от нашего
+DEFAULT_VALUE_TOLERANCE = 0.1
+# Происхождение строки (ParsedStat.origin) -> раздел trade.ids, если у стата нет своего
+_ORIGIN_FALLBACK = ("explicit", "pseudo")
+
+
+class TradeStatIndex:
+    """Идентификаторы статов торговли (trade.ids из stats.ndjson) по ref стата."""
+
+    def __init__(self, stats: Iterable[Mapping]) -> None:
+        self._ids: Dict[str, Mapping[str, List[str]]] = {}
+        for stat in stats:
+            ids = (stat.get("trade") or {}).get("ids")
+            if ids:
+                self._ids[stat["ref"]] = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def trade_id(self, ref: str, origin: str = "explicit") -> Optional[str]:
+        ids = self._ids.get(ref)
+        if not ids:
+            return None
+        for section in (origin, *_ORIGIN_FALLBACK):
+            if ids.get(section):
+                return ids[section][0]
+        return None
+
+
+def _value_filter(value: float, tolerance: float) -> Dict[str, float]:
+    # Для отрицательных значений ("reduced") лучше — меньше по модулю
+    bound = value * (1 - tolerance)
+    return {"min": math.floor(bound)} if value >= 0 else {"max": math.ceil(bound)}
+
+
+def build_query(item: Mapping[str, Any], trade_stats: TradeStatIndex,
+                value_tolerance: float = DEFAULT_VALUE_TOLERANCE, online: bool = True) -> Dict[str, Any]:
+    """
+    Запрос поиска торговли по предмету в форме ParsedItem.to_dict()
+    (её же показывает и возвращает редактор).
+
+    Уникальный предмет ищется по имени и базе, остальные — по базе, а модификаторы
+    с известным trade id становятся фильтрами со значением не хуже value_tolerance.
+    """
+    query: Dict[str, Any] = {"status": {"option": "online" if online else "any"}}
+    filters: List[Dict[str, Any]] = []
+    if item.get("namespace") == "UNIQUE":
+        query["name"] = item["name"]
+        base = (item.get("unique") or {}).get("base")
+        if base:
+            query["type"] = base
+    else:
+        query["type"] = item["name"]
+        for stat in item.get("stats") or ():
+            trade_id = trade_stats.trade_id(stat.get("ref", ""), stat.get("origin") or "explicit")
+            if trade_id is None:
+                continue
+            stat_filter: Dict[str, Any] = {"id": trade_id}
+            value = stat.get("value")
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stat_filter["value"] = _value_filter(-value if stat.get("negate") else value, value_tolerance)
+            filters.append(stat_filter)
+        rarity = (item.get("rarity") or "").lower()
+        if rarity in ("magic", "rare"):
+            query["filters"] = {"type_filters": {"filters": {"rarity": {"option": "nonunique"}}}}
+    query["stats"] = [{"type": "and", "filters": filters}]
+    return {"query": query, "sort": {"price": "asc"}}
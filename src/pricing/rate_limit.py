@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+# Запас ко времени возврата токена: запрос попадает в окно сервера позже, чем берётся токен
+RETURN_MARGIN = 0.2
+
+
+class RateRule(NamedTuple):
+    """Правило из X-Rate-Limit-<Rule>: не больше hits запросов за period секунд, иначе бан на penalty."""
+    hits: int
+    period: float
+    penalty: float
+
+
+def parse_rules(value: str) -> List[RateRule]:
+    """'8:10:60,15:60:120' -> [RateRule(8, 10, 60), RateRule(15, 60, 120)]."""
+    rules = []
+    for part in value.split(","):
+        fields = part.strip().split(":")
+        if len(fields) == 3:
+            rules.append(RateRule(int(fields[0]), float(fields[1]), float(fields[2])))
+    return rules
+
+
+class TokenBucket:
+    """
+    Ведро на hits токенов; взятый токен возвращается через period секунд.
+
+    Сервер считает запросы в скользящем окне period, поэтому токен возвращается
+    не равномерным пополнением, а ровно когда запрос выходит из окна —
+    иначе пачка после паузы превысила бы лимит окна.
+    """
+
+    def __init__(self, hits: int, period: float) -> None:
+        self.capacity = max(1, hits)
+        self.period = period
+        # Моменты возврата взятых токенов, по возрастанию
+        self._returns: Deque[float] = deque()
+
+    def _expire(self, now: float) -> None:
+        while self._returns and self._returns[0] <= now:
+            self._returns.popleft()
+
+    @property
+    def used(self) -> int:
+        return len(self._returns)
+
+    def resize(self, hits: int) -> None:
+        self.capacity = max(1, hits)
+
+    def sync(self, used: int, now: float) -> None:
+        """Счётчик сервера главнее: недостающие запросы окна считаются сделанными сейчас."""
+        self._expire(now)
+        for _ in range(used - len(self._returns)):
+            self._returns.append(now + self.period)
+
+    def wait_time(self, now: float) -> float:
+        self._expire(now)
+        excess = len(self._returns) - self.capacity
+        return 0.0 if excess < 0 else self._returns[excess] - now
+
+    def take(self, now: float) -> None:
+        self._returns.append(now + self.period + RETURN_MARGIN)
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов по заголовкам сервера торговли.
+
+    Для каждой политики (тип запроса: search, fetch) держится по ведру токенов на
+    каждое правило из X-Rate-Limit-Rules/X-Rate-Limit-<Rule>; состояние
+    X-Rate-Limit-<Rule>-State синхронизирует ведра со счётчиком сервера.
+    acquire() ждёт, пока токен есть во всех ведрах политики, поэтому лимит
+    не превышается и бан не наступает. Активное ограничение (третье поле State)
+    и Retry-After блокируют политику до указанного времени.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str, float], TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self.waited = 0.0
+
+    def _policy_buckets(self, policy: str) -> List[TokenBucket]:
+        return [bucket for (name, _, _), bucket in self._buckets.items() if name == policy]
+
+    def acquire(self, policy: str, cancel_event: Optional[threading.Event] = None) -> Optional[float]:
+        """
+        Ждёт разрешения на запрос и забирает токен.
+        :return: Время ожидания, секунды; None, если ожидание прервано cancel_event (токен не взят).
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                buckets = self._policy_buckets(policy)
+                delay = max([self._blocked_until.get(policy, 0.0) - now] +
+                            [bucket.wait_time(now) for bucket in buckets])
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                if delay <= 0:
+                    for bucket in buckets:
+                        bucket.take(now)
+                    self.waited += waited
+                    return waited
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                self._sleep(delay)
+            waited += delay
+
+    def update(self, policy: str, headers: Mapping[str, str], status: Optional[int] = None) -> None:
+        """Обновляет правила и состояние политики по заголовкам ответа (имена в нижнем регистре)."""
+        with self._lock:
+            now = self._clock()
+            for rule_name in filter(None, (name.strip().lower() for name in headers.get("x-rate-limit-rules", "").split(","))):
+                rules = parse_rules(headers.get(f"x-rate-limit-{rule_name}", ""))
+                states = parse_rules(headers.get(f"x-rate-limit-{rule_name}-state", ""))
+                for rule in rules:
+                    key = (policy, rule_name, rule.period)
+                    bucket = self._buckets.get(key)
+                    if bucket is None:
+                        bucket = self._buckets[key] = TokenBucket(rule.hits, rule.period)
+                    elif bucket.capacity != rule.hits:
+                        bucket.resize(rule.hits)
+                    state = next((state for state in states if state.period == rule.period), None)
+                    if state is not None:
+                        bucket.sync(state.hits, now)
+                        if state.penalty > 0:
+                            self._block(policy, now + state.penalty)
+            retry_after = headers.get("retry-after")
+            if status == 429 and retry_after:
+                self._block(policy, now + float(retry_after))
+
+    def _block(self, policy: str, until: float) -> None:
+        self._blocked_until[policy] = max(self._blocked_until.get(policy, 0.0), until)
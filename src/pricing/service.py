@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Mapping, Optional, Set
+
+from logger_config import logger
+from pricing.bulk import BulkPriceScheduler
+from pricing.cache import PriceCache, price_category, query_key
+from pricing.client import PriceResult, TradeCancelledError, TradeClient, TradeError
+from pricing.query import TradeStatIndex, build_query
+from pricing.singleflight import SingleFlight
+
+
+class PriceService:
+    """
+    Оценка предмета: запрос торговли по разобранному предмету и цены через TradeClient.
+
+    Индекс trade id строится при первой оценке: у ленивых статов каталога
+    раздел trade декодируется из записи только тогда.
+
+    С кэшем (PriceCache) свежая запись возвращается без запроса к серверу,
+    а просроченная — сразу, с обновлением в фоновом потоке (stale-while-revalidate).
+    Предметы из снимка цен (BulkPriceScheduler) оцениваются по нему, без запроса.
+    Одновременные оценки с одинаковым каноническим запросом (coalesce) делят
+    один запрос к серверу и его результат.
+    """
+
+    def __init__(self, client: TradeClient, stats: Iterable[Mapping], cache: Optional[PriceCache] = None,
+                 bulk: Optional[BulkPriceScheduler] = None, coalesce: bool = True) -> None:
+        self.client = client
+        self.cache = cache
+        self.bulk = bulk
+        self.coalesce = coalesce
+        self.flights = SingleFlight()
+        self._stats = stats
+        self._trade_stats: Optional[TradeStatIndex] = None
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-refresh")
+
+    @property
+    def trade_stats(self) -> TradeStatIndex:
+        with self._lock:
+            if self._trade_stats is None:
+                self._trade_stats = TradeStatIndex(self._stats)
+                logger.info("Индекс статов торговли: %d статов.", len(self._trade_stats))
+            return self._trade_stats
+
+    def query_for(self, item: Mapping[str, Any]) -> dict:
+        return build_query(item, self.trade_stats)
+
+    def price_item(self, item: Mapping[str, Any], cancel_event: Optional[threading.Event] = None) -> PriceResult:
+        """
+        :param item: Предмет в форме ParsedItem.to_dict().
+        :param cancel_event: Событие отмены: оценка устарела, неотправленные запросы не отправляются.
+        :raises TradeError: Если сервер торговли недоступен или ответил ошибкой.
+        :raises TradeCancelledError: Если оценка отменена до отправки запроса.
+        """
+        if self.bulk is not None:
+            result = self.bulk.lookup(item)
+            if result is not None:
+                return result
+        if cancel_event is not None and cancel_event.is_set():
+            raise TradeCancelledError("оценка устарела")
+
+        query = self.query_for(item)
+        key = query_key(query, self.client.league)
+        category = price_category(item)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if cached.stale:
+                    self._refresh(key, cached.category, query)
+                return cached.result
+        if not self.coalesce:
+            return self._fetch(key, category, query, cancel_event)
+        return self.flights.do(key, lambda: self._fetch(key, category, query, cancel_event), cancel_event)
+
+    def _fetch(self, key: str, category: str, query: Mapping[str, Any],
+               cancel_event: Optional[threading.Event] = None) -> PriceResult:
+        result = self.client.price(query, cancel_event)
+        if self.cache is not None:
+            self.cache.put(key, category, result)
+        return result
+
+    def _refresh(self, key: str, category: str, query: Mapping[str, Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self.flights.do(key, lambda: self._fetch(key, category, query))
+                logger.debug("Цена %s обновлена в фоне.", key[:12])
+            except TradeError as e:
+                logger.warning("Фоновое обновление цены не удалось: %s", e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(refresh)
+
+    def close(self) -> None:
+        self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+        if self.bulk is not None:
+            self.bulk.stop()
+        self.client.close()
+        if self.cache is not None:
+            self.cache.close()
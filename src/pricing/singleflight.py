@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from pricing.client import TradeCancelledError
+
+T = TypeVar("T")
+# Период проверки отмены ведомым вызовом, секунды
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class SingleFlight:
+    """
+    Совмещение одинаковых одновременных вызовов (singleflight): пока вызов по ключу
+    выполняется, остальные вызовы с тем же ключом ждут его и получают тот же
+    результат или исключение.
+
+    Если ведущий вызов отменён (TradeCancelledError), а ведомый — нет, ведомый
+    повторяет вызов сам. Ведомый со своим cancel_event перестаёт ждать при отмене.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, "Future"] = {}
+        self.calls = 0
+        self.executions = 0
+
+    @property
+    def shared(self) -> int:
+        """Вызовы, получившие результат чужого выполнения."""
+        return self.calls - self.executions
+
+    def do(self, key: Hashable, fn: Callable[[], T], cancel_event: Optional[threading.Event] = None) -> T:
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                future = self._flights.get(key)
+                leader = future is None
+                if leader:
+                    future = self._flights[key] = Future()
+                    self.executions += 1
+            if leader:
+                return self._lead(key, future, fn)
+            try:
+                return self._follow(future, cancel_event)
+            except TradeCancelledError:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise
+
+    def _lead(self, key: Hashable, future: "Future", fn: Callable[[], T]) -> T:
+        # Ключ освобождается до публикации результата: ведомый, повторяющий
+        # вызов после отмены ведущего, не увидит завершённое выполнение снова
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key)
+            future.set_exception(e)
+            raise
+        self._land(key)
+        future.set_result(result)
+        return result
+
+    def _land(self, key: Hashable) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+
+    @staticmethod
+    def _follow(future: "Future", cancel_event: Optional[threading.Event]) -> T:
+        if cancel_event is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(CANCEL_POLL_INTERVAL)
+            except FutureTimeoutError:
+                if cancel_event.is_set():
+                    raise TradeCancelledError("ожидание совмещённого запроса")
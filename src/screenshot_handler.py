@@ -1,12 +1,39 @@
+from typing import Optional
+
 import Quartz.CoreGraphics as CG
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter, ImageDraw
-import tensorflow as tf
+from PIL import Image, ImageFilter
+from config import get_settings
+from frame import Frame
+from frame_recorder import get_frame_recorder
 from logger_config import logger
+from text_region import crop_to_text
+from upscalers import resolve_upscaler
+
+_THRESHOLD = 128
+_THRESHOLD_LUT = [255 if p > _THRESHOLD else 0 for p in range(256)]
+_THRESHOLD_TABLE = np.array(_THRESHOLD_LUT, dtype=np.uint8)
+_CONTRAST = 2.0
+# Строки исходного изображения, которые полоса берёт сверху и снизу:
+# 2 — окно bicubic, ещё 1 строка результата нужна медианному фильтру 3x3
+_STRIP_HALO = 2
+# Оценка байт на пиксель увеличенной полосы: float32-промежуточные буферы
+# бэкенда и копии uint8 для медианного фильтра
+_BYTES_PER_UPSCALED_PIXEL = 16
+
+
+def _contrast_lut(gray: np.ndarray, factor: float) -> np.ndarray:
+    """
+    Таблица 256 значений для повышения контраста относительно среднего,
+    как у PIL ImageEnhance.Contrast.
+    """
+    mean = int(gray.mean() + 0.5)
+    lut = mean + factor * (np.arange(256, dtype=np.float32) - mean)
+    return np.clip(lut, 0, 255).astype(np.uint8)
 
 class ScreenshotHandler:
     """
-    Класс для захвата скриншота, увеличения изображения в 4 раза с помощью TensorFlow,
+    Класс для захвата скриншота, увеличения изображения (бэкенд из upscalers, по умолчанию в 4 раза)
     и дополнительной предобработки для улучшения распознавания текста.
     """
 
@@ -17,14 +44,28 @@ class ScreenshotHandler:
         уже предобработанное PIL.Image (Grayscale, binarized) для лучшего OCR.
 
         Шаги:
-         1) Захват скриншота (RGBA).
-         2) Увеличение в 4 раза (bicubic, TensorFlow).
-         3) Маскирование указанных областей (если задано).
-         4) Предобработка (grayscale, contrast, noise filter, threshold).
+         1) Захват скриншота (BGRA, без копирования).
+         2) Маскирование указанных областей и обрезка до области текста.
+         3) Grayscale и контраст в исходном размере.
+         4) Увеличение в 4 раза (bicubic, бэкенд из настроек), noise filter, threshold — полосами.
 
         :param rect: ((x, y), (width, height)) - координаты области в CoreGraphics.
         :return: PIL.Image (монохромное, бинаризованное), или None при ошибке.
         """
+        frame = ScreenshotHandler.capture_frame(rect)
+        if frame is None:
+            return None
+        return ScreenshotHandler.process_frame(frame)
+
+    @staticmethod
+    def capture_frame(rect) -> Optional[Frame]:
+        """
+        Шаги 1-2 take_screenshot: захват, маскирование и обрезка до области текста.
+        Дешёвая часть конвейера — по её результату проверяется кэш OCR.
+
+        :param rect: ((x, y), (width, height)) - координаты области в CoreGraphics.
+        :return: Frame или None при ошибке.
+        """
         try:
             (x, y), (width, height) = rect
             capture_rect = CG.CGRectMake(x, y, width, height)
@@ -39,37 +80,56 @@ class ScreenshotHandler:
                 logger.error("Не удалось создать CGImage (image_ref == None).")
                 return None
 
-            pil_image = ScreenshotHandler._convert_cgimage_to_pil(image_ref)
-            if pil_image is None:
+            frame = ScreenshotHandler._frame_from_cgimage(image_ref)
+            if frame is None:
                 return None
 
-            pil_image = ScreenshotHandler.mask_regions(pil_image)
-
-            upscaled = ScreenshotHandler.upscale_with_tensorflow(pil_image, scale=4)
-            if upscaled is None:
-                logger.error("Ошибка при апсемплинге через TensorFlow.")
-                return None
+            frame = ScreenshotHandler.mask_regions(frame)
+            recorder = get_frame_recorder()
+            # Преобразование в PIL выполнит поток записи, и только если запись включена
+            recorder.record("capture", frame.to_pil)
 
-            logger.info("Изображение успешно увеличено в 4 раза (bicubic).")
+            settings = get_settings()
+            if settings.text_crop:
+                full_size = frame.width * frame.height
+                frame = crop_to_text(frame, settings.text_crop_padding)
+                logger.info("Область текста: %dx%d (%.0f%% выделения).",
+                            frame.width, frame.height, 100 * frame.width * frame.height / max(1, full_size))
+                recorder.record("text_crop", frame.to_pil)
 
-            processed = ScreenshotHandler.preprocess_for_ocr(upscaled)
+            return frame
 
-            processed.save("screenshot_processed.png")
-            logger.info("Сохранено промежуточное изображение screenshot_processed.png")
+        except Exception as e:
+            logger.error("Ошибка при получении скриншота: %s", e, exc_info=True)
+            return None
 
-            return processed
+    @staticmethod
+    def process_frame(frame: Frame, scale: Optional[int] = None) -> Optional[Image.Image]:
+        """
+        Шаги 3-4 take_screenshot: предобработка захваченного кадра для OCR.
 
-        except Exception as e:
-            logger.error("Ошибка при получении/обработке скриншота: %s", e, exc_info=True)
+        :param frame: Кадр из capture_frame.
+        :param scale: Увеличение (по умолчанию Settings.upscale_factor; уровни каскада OCR задают своё).
+        :return: PIL.Image (монохромное, бинаризованное), или None при ошибке.
+        """
+        # Серый канал до увеличения: апсемплинг и фильтры работают с одним каналом uint8
+        processed = ScreenshotHandler.preprocess_frame(frame, scale)
+        if processed is None:
             return None
 
+        logger.info("Изображение увеличено и обработано: %dx%d.", processed.width, processed.height)
+
+        get_frame_recorder().record("processed", processed)
+
+        return processed
+
     @staticmethod
-    def _convert_cgimage_to_pil(image_ref):
+    def _frame_from_cgimage(image_ref) -> Optional[Frame]:
         """
-        Конвертирует CGImage в PIL.Image.
+        Оборачивает пиксели CGImage в Frame без копирования (BGRA, с выравниванием строк).
 
         :param image_ref: CGImageRef.
-        :return: PIL.Image или None при ошибке.
+        :return: Frame или None при ошибке.
         """
         try:
             w = CG.CGImageGetWidth(image_ref)
@@ -78,105 +138,66 @@ class ScreenshotHandler:
             data_provider = CG.CGImageGetDataProvider(image_ref)
             raw_data = CG.CGDataProviderCopyData(data_provider)
 
-            data = np.frombuffer(raw_data, dtype=np.uint8)
-            total_bytes = len(data)
-            bytes_per_pixel = 4  # BGRA (4 байта на пиксель)
-
-            expected_bytes = bytes_per_row * h
-            if total_bytes < expected_bytes:
-                logger.error("Недостаточно байт для полного изображения.")
-                return None
-
-            out = np.zeros((h, w, 4), dtype=np.uint8)
-            for row_index in range(h):
-                start = row_index * bytes_per_row
-                end = start + (w * bytes_per_pixel)
-                out[row_index, :, :] = data[start:end].reshape((w, 4))
-
-            out = out[:, :, [2, 1, 0, 3]]  # BGRA to RGBA
-            return Image.fromarray(out, "RGBA")
+            return Frame.from_buffer(raw_data, w, h, bytes_per_row, channel_order="BGRA")
 
         except Exception as e:
-            logger.error("Ошибка при конвертации CGImage в PIL.Image: %s", e, exc_info=True)
+            logger.error("Ошибка при конвертации CGImage в Frame: %s", e, exc_info=True)
             return None
 
     @staticmethod
-    def upscale_with_tensorflow(pil_image: Image.Image, scale=4) -> Image.Image:
-        """
-        Увеличивает изображение (RGBA) в `scale` раз с помощью TensorFlow (bicubic resize).
-        Возвращает PIL.Image или None при ошибке.
+    def mask_regions(frame: Frame) -> Frame:
         """
-        try:
-            np_img = np.array(pil_image)  # (H, W, 4)
-            h, w, c = np_img.shape
-            if c != 4:
-                logger.warning("Изображение не RGBA, найдено каналов = %d", c)
-
-            tf_img = tf.convert_to_tensor(np_img, dtype=tf.float32) / 255.0
-            tf_img = tf.expand_dims(tf_img, axis=0)
-
-            new_h = h * scale
-            new_w = w * scale
+        Маскирует указанные области на изображении чёрным цветом.
+        Буфер не копируется: маски применяются при материализации кадра.
 
-            upscaled = tf.image.resize(
-                tf_img,
-                size=[new_h, new_w],
-                method=tf.image.ResizeMethod.BICUBIC
-            )
-
-            upscaled = tf.squeeze(upscaled, axis=0)
-            upscaled_uint8 = tf.clip_by_value(upscaled * 255.0, 0, 255)
-            upscaled_uint8 = tf.cast(upscaled_uint8, tf.uint8)
-            upscaled_np = upscaled_uint8.numpy()
-
-            return Image.fromarray(upscaled_np, "RGBA")
-
-        except Exception as e:
-            logger.error("Ошибка при апсемплинге TensorFlow: %s", e, exc_info=True)
-            return None
+        :param frame: Исходный кадр.
+        :return: Кадр с замаскированными областями.
+        """
+        mask_regions = [
+            (0, 0, 80, 80),  # Левый верхний угол
+            (frame.width - 80, 0, frame.width, 80)  # Правый верхний угол
+        ]
+        return frame.with_masks(mask_regions)
 
     @staticmethod
-    def preprocess_for_ocr(pil_image: Image.Image) -> Image.Image:
+    def preprocess_frame(frame: Frame, scale: Optional[int] = None,
+                         memory_budget: Optional[int] = None) -> Optional[Image.Image]:
         """
-        Дополнительная предобработка изображения для улучшения OCR:
-          - Перевод в Grayscale
-          - Повышение контрастности
-          - Удаление шумов (MedianFilter)
-          - Бинаризация (Threshold)
-        Возвращает итоговое PIL.Image (монохром + бинаризация).
+        Предобработка кадра в порядке «сначала серый»: маски -> luma uint8 -> контраст
+        в исходном размере, затем полосами: увеличение -> MedianFilter -> threshold.
+
+        Увеличивается один канал uint8 вместо RGB(A), а промежуточные буферы
+        ограничены полосой, высота которой подбирается под memory_budget.
+        Полоса захватывает по _STRIP_HALO строк соседей, поэтому швов между полосами нет.
+
+        :param memory_budget: Байт на промежуточные буферы полосы
+                              (по умолчанию Settings.preprocess_memory_budget_mb).
+        :return: PIL.Image "L" (0/255) размером в scale раз больше кадра или None при ошибке.
         """
+        settings = get_settings()
+        scale = scale or settings.upscale_factor
+        memory_budget = memory_budget or settings.preprocess_memory_budget_mb * 2 ** 20
         try:
-            gray = pil_image.convert("L")
-            enhancer = ImageEnhance.Contrast(gray)
-            high_contrast = enhancer.enhance(2.0)
-            filtered = high_contrast.filter(ImageFilter.MedianFilter(size=3))
-            threshold = 128
-            binarized = filtered.point(lambda p: 255 if p > threshold else 0)
-            return binarized
+            upscaler = resolve_upscaler(settings.upscaler)
 
-        except Exception as e:
-            logger.error("Ошибка при предобработке изображения для OCR: %s", e, exc_info=True)
-            return None
+            gray = frame.luma()
+            np.take(_contrast_lut(gray, _CONTRAST), gray, out=gray)
 
-    @staticmethod
-    def mask_regions(pil_image: Image.Image):
-        """
-        Маскирует указанные области на изображении белым цветом.
+            height, width = gray.shape
+            out = np.empty((height * scale, width * scale), dtype=np.uint8)
+            row_cost = width * scale * scale * _BYTES_PER_UPSCALED_PIXEL
+            strip_rows = max(1, memory_budget // row_cost - 2 * _STRIP_HALO)
 
-        :param pil_image: Исходное изображение.
-        :return: Изображение с замаскированными областями.
-        """
-        try:
-            mask_regions = [
-                (0, 0, 80, 80),  # Левый верхний угол
-                (pil_image.width - 80, 0, pil_image.width, 80)  # Правый верхний угол
-            ]
-            draw = ImageDraw.Draw(pil_image)
-            for region in mask_regions:
-                left, top, right, bottom = region
-                draw.rectangle([left, top, right, bottom], fill="black")
-            return pil_image
+            for top in range(0, height, strip_rows):
+                bottom = min(height, top + strip_rows)
+                lo, hi = max(0, top - _STRIP_HALO), min(height, bottom + _STRIP_HALO)
+                upscaled = upscaler.upscale(gray[lo:hi], scale)
+                filtered = np.asarray(Image.fromarray(upscaled, "L").filter(ImageFilter.MedianFilter(size=3)))
+                inner = filtered[(top - lo) * scale:(bottom - lo) * scale]
+                np.take(_THRESHOLD_TABLE, inner, out=out[top * scale:bottom * scale])
+
+            return Image.fromarray(out, "L")
 
         except Exception as e:
-            logger.error("Ошибка при маскировании областей: %s", e, exc_info=True)
-            return pil_image
\ No newline at end of file
+            logger.error("Ошибка при предобработке кадра для OCR: %s", e, exc_info=True)
+            return None
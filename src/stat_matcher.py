@@ -0,0 +1,249 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Число в строке тултипа: знак, целая часть, необязательная дробная часть.
+_NUMBER_RE = re.compile(r"[+-]?\d+(?:[.,]\d+)?")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Нормализованный слот числа в ключе шаблона.
+_SLOT = "#"
+_MISSING = object()
+DEFAULT_CACHE_SIZE = 4096
+
+Number = Union[int, float]
+
+
+class StatMatch(NamedTuple):
+    """Результат сопоставления строки тултипа со статом."""
+    stat: dict
+    matcher: dict
+    values: Tuple[Number, ...]
+    negate: bool
+    alternatives: Tuple[dict, ...] = ()
+
+
+class _Entry(NamedTuple):
+    stat: dict
+    matcher: dict
+    # Для каждого числового слота ключа: None — захват (#), иначе литерал шаблона.
+    slots: Tuple[Optional[str], ...]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class TemplateCache:
+    """
+    Ограниченный LRU-кэш: нормализованная строка ("+#% to fire resistance")
+    -> ключ найденного шаблона (или None, если стат не найден).
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Optional[str]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def _parse_number(token: str) -> Number:
+    token = token.replace(",", ".")
+    return float(token) if "." in token else int(token)
+
+
+def _normalize_spaces(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def normalize_line(line: str) -> Tuple[str, List[str]]:
+    """
+    Заменяет все числа строки на '#' и возвращает нормализованный ключ
+    вместе с исходными числовыми токенами (в порядке следования).
+    """
+    numbers = _NUMBER_RE.findall(line)
+    key = _normalize_spaces(_NUMBER_RE.sub(_SLOT, line))
+    return key, numbers
+
+
+def _compile_template(template: str) -> Tuple[str, Tuple[Optional[str], ...]]:
+    """
+    Приводит шаблон матчера к тому же виду, что и normalize_line:
+    и плейсхолдеры '#', и литеральные числа становятся слотами '#'.
+    """
+    slots: List[Optional[str]] = []
+
+    def _slot(match: "re.Match") -> str:
+        token = match.group(0)
+        slots.append(None if token.endswith("#") else token.lstrip("+"))
+        return _SLOT
+
+    key = re.sub(r"[+-]?(?:#|\d+(?:[.,]\d+)?)", _slot, template)
+    return _normalize_spaces(key), tuple(slots)
+
+
+def _first_word(key: str) -> str:
+    return key.split(" ", 1)[0]
+
+
+class CompiledStatMatcher:
+    """
+    Предкомпилированный индекс матчеров из stats.ndjson.
+
+    Строка тултипа нормализуется за один проход (числа -> '#'), после чего
+    стат находится одним обращением к словарю. Для строк с «хвостом»
+    (например, пометками OCR) используется поиск по префиксу внутри корзины
+    шаблонов с тем же первым словом. Все матчеры сохраняются: если
+    несколько статов имеют одинаковый шаблон, они доступны как alternatives.
+
+    Результат разрешения нормализованной строки запоминается в LRU-кэше,
+    поэтому повторяющиеся модификаторы с другими числами разрешаются
+    одним обращением к словарю и для строк, требующих поиска по префиксу.
+    """
+
+    def __init__(self, stats: List[dict], cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self._cache = TemplateCache(cache_size)
+        self._exact: Dict[str, List[_Entry]] = {}
+        self._buckets: Dict[str, List[Tuple[str, _Entry]]] = {}
+        self.matcher_count = 0
+
+        for stat in stats:
+            for matcher in stat.get("matchers", []):
+                key, slots = _compile_template(matcher["string"])
+                entry = _Entry(stat, matcher, slots)
+                self._exact.setdefault(key, []).append(entry)
+                self._buckets.setdefault(_first_word(key), []).append((key, entry))
+                self.matcher_count += 1
+
+        # Статы с id (торгуемые) приоритетнее псевдо-статов с тем же шаблоном.
+        for entries in self._exact.values():
+            entries.sort(key=lambda e: "id" not in e.stat)
+        # Внутри корзины сначала проверяются самые длинные шаблоны.
+        for bucket in self._buckets.values():
+            bucket.sort(key=lambda pair: len(pair[0]), reverse=True)
+
+    def __len__(self) -> int:
+        return self.matcher_count
+
+    def __getstate__(self):
+        # Кэш (и его блокировка) не попадает в снимок каталога.
+        state = self.__dict__.copy()
+        state["_cache"] = self._cache.maxsize
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        # В снимках до кэша шаблонов поля нет
+        self._cache = TemplateCache(state.get("_cache", DEFAULT_CACHE_SIZE))
+
+    def cache_info(self) -> CacheInfo:
+        """Счётчики попаданий, промахов и вытеснений кэша шаблонов."""
+        return self._cache.info()
+
+    def cache_clear(self) -> None:
+        """Очищает кэш шаблонов (например, при перезагрузке каталога)."""
+        self._cache.clear()
+
+    def match(self, line: str) -> Optional[StatMatch]:
+        """
+        Сопоставляет строку тултипа со статом.
+
+        :param line: Строка тултипа (например, "+25% to Fire Resistance").
+        :return: StatMatch со статом, всеми захваченными числами и флагом negate или None.
+        """
+        key, numbers = normalize_line(line)
+        if not key:
+            return None
+
+        cached = self._cache.get(key)
+        if cached is not _MISSING:
+            if cached is None:
+                return None
+            found = self._select(self._exact[cached], numbers)
+            if found:
+                return found
+            # Литеральные числа шаблона не совпали — разрешаем строку заново
+
+        template_key, found, cacheable = self._resolve(key, numbers)
+        if cacheable:
+            self._cache.put(key, template_key)
+        return found
+
+    def _resolve(self, key: str, numbers: List[str]) -> Tuple[Optional[str], Optional[StatMatch], bool]:
+        """
+        Полное разрешение строки: точный шаблон, затем поиск по префиксу.
+        Промах кэшируется, только если он не вызван несовпадением литеральных чисел.
+        """
+        cacheable = True
+        entries = self._exact.get(key)
+        if entries:
+            found = self._select(entries, numbers)
+            if found:
+                return key, found, True
+            cacheable = False
+
+        for template_key, entry in self._buckets.get(_first_word(key), ()):
+            if len(template_key) < len(key) and key.startswith(template_key) \
+                    and key[len(template_key)] == " ":
+                found = self._select(self._exact[template_key], numbers)
+                if found:
+                    return template_key, found, True
+                cacheable = False
+        return None, None, cacheable
+
+    @staticmethod
+    def _select(entries: List[_Entry], numbers: List[str]) -> Optional[StatMatch]:
+        """Выбирает первый матчер, литеральные числа которого совпадают со строкой."""
+        matched = [e for e in entries if CompiledStatMatcher._literals_match(e.slots, numbers)]
+        if not matched:
+            return None
+        best = matched[0]
+        values = tuple(
+            _parse_number(numbers[i]) for i, literal in enumerate(best.slots) if literal is None
+        )
+        return StatMatch(
+            stat=best.stat,
+            matcher=best.matcher,
+            values=values,
+            negate=bool(best.matcher.get("negate", False)),
+            alternatives=tuple(e.stat for e in matched[1:]),
+        )
+
+    @staticmethod
+    def _literals_match(slots: Tuple[Optional[str], ...], numbers: List[str]) -> bool:
+        if len(numbers) < len(slots):
+            return False
+        for literal, token in zip(slots, numbers):
+            if literal is not None and token.lstrip("+").replace(",", ".") != literal.replace(",", "."):
+                return False
+        return True
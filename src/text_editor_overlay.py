@@ -1,5 +1,4 @@
 import objc
-import json
 from AppKit import (
     NSPanel, NSColor, NSScreen, NSTextView, NSScrollView, NSButton,
     NSMakeRect, NSPoint, NSSize, NSView, NSWindowStyleMaskBorderless,
@@ -13,6 +12,8 @@ from AppKit import (
 from Quartz import CGRectMake
 from typing import Optional, Tuple, Callable
 
+from parsed_item import ParsedItem
+
 # Константы для размеров и отступов
 PANEL_WIDTH = 400
 PANEL_HEIGHT = 400
@@ -34,18 +35,14 @@ class TextEditorOverlay(NSPanel):
     """
 
     @classmethod
-    def create_panel(cls, json_text: str, on_save_callback: Optional[Callable] = None, on_close_callback: Optional[Callable] = None) -> 'TextEditorOverlay':
+    def create_panel(cls, item: ParsedItem, on_save_callback: Optional[Callable] = None, on_close_callback: Optional[Callable] = None) -> 'TextEditorOverlay':
         """
         Создаёт панель TextEditorOverlay с хедером предмета.
-        Принимает JSON строку с данными предмета.
+        Принимает ParsedItem; в JSON он сериализуется только для текстового поля.
         """
-        try:
-            item_data = json.loads(json_text)
-            item_name = item_data.get("name", "Unknown Item")
-            unique_base = item_data.get("unique", {}).get("base", "Unknown Base")
-        except json.JSONDecodeError:
-            item_name = "Invalid JSON"
-            unique_base = "Unknown Base"
+        item_name = item.name or "Unknown Item"
+        unique_base = item.unique_base or "Unknown Base"
+        json_text = item.to_json()
 
         screen = NSScreen.mainScreen()
         screen_frame = screen.frame() if screen else CGRectMake(0, 0, PANEL_WIDTH, PANEL_HEIGHT)
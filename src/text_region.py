@@ -0,0 +1,70 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from frame import Frame, rgb_to_luma
+
+# Шаг прореживания: профиль строится по каждому DOWNSAMPLE-му пикселю по обеим осям
+DOWNSAMPLE = 4
+# Перепад яркости соседних (прореженных) пикселей, считающийся краем глифа
+EDGE_THRESHOLD = 40
+# Минимум краёв в строке/столбце профиля, чтобы считать его текстовым
+MIN_EDGES = 2
+
+# (left, top, right, bottom), right/bottom не включительно
+Box = Tuple[int, int, int, int]
+
+
+def _samples(first: int, last: int, step: int) -> slice:
+    # Отсчёты прореженного изображения, попадающие в [first, last] (включительно) кадра
+    return slice(-(-max(first, 0) // step), max(last, -1) // step + 1)
+
+
+def _active_span(profile: np.ndarray, min_edges: int) -> Optional[Tuple[int, int]]:
+    active = np.flatnonzero(profile >= min_edges)
+    if active.size == 0:
+        return None
+    return int(active[0]), int(active[-1]) + 1
+
+
+def find_text_bbox(frame: Frame, downsample: int = DOWNSAMPLE, padding: int = 0,
+                   edge_threshold: int = EDGE_THRESHOLD, min_edges: int = MIN_EDGES) -> Optional[Box]:
+    """
+    Находит область текста по проекционным профилям краёв на прореженной яркости.
+
+    Читается только каждый downsample-й пиксель кадра, поэтому проход в downsample²
+    раз дешевле полного. Замаскированные области считаются фоном.
+
+    :param padding: Отступ вокруг найденной области (в пикселях кадра).
+    :return: (left, top, right, bottom) в координатах кадра или None, если текста нет.
+    """
+    step = max(1, downsample)
+    small = rgb_to_luma(frame.channels("RGB")[::step, ::step]).astype(np.int16)
+    if small.shape[0] < 2 or small.shape[1] < 2:
+        return None
+    # Границы масок — не края текста: отсчёты внутри масок исключаются
+    valid = np.ones(small.shape, dtype=bool)
+    for left, top, right, bottom in frame.masks:
+        valid[_samples(top, bottom, step), _samples(left, right, step)] = False
+
+    edges_x = (np.abs(np.diff(small, axis=1)) > edge_threshold) & valid[:, 1:] & valid[:, :-1]
+    edges_y = (np.abs(np.diff(small, axis=0)) > edge_threshold) & valid[1:] & valid[:-1]
+    rows = _active_span(edges_x.sum(axis=1) + np.pad(edges_y.sum(axis=1), (0, 1)), min_edges)
+    cols = _active_span(edges_y.sum(axis=0) + np.pad(edges_x.sum(axis=0), (0, 1)), min_edges)
+    if rows is None or cols is None:
+        return None
+
+    # Индексы прореженного изображения -> пиксели кадра; край захватывает и следующий отсчёт
+    left = max(0, cols[0] * step - padding)
+    top = max(0, rows[0] * step - padding)
+    right = min(frame.width, (cols[1] + 1) * step + padding)
+    bottom = min(frame.height, (rows[1] + 1) * step + padding)
+    return left, top, right, bottom
+
+
+def crop_to_text(frame: Frame, padding: int = 0, downsample: int = DOWNSAMPLE) -> Frame:
+    """Кадр, обрезанный до области текста (без копирования); без текста — исходный кадр."""
+    box = find_text_bbox(frame, downsample, padding)
+    if box is None:
+        return frame
+    return frame.crop(*box)
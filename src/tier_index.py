@@ -0,0 +1,146 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# Теги tiers.explicit/tiers.implicit из stats.ndjson для каждой категории предмета
+# (craftable.category или значение ItemCategory). Первый тег — самый специфичный.
+_WEAPON_1H = ("weapon", "one_hand_weapon")
+_WEAPON_2H = ("weapon", "two_hand_weapon")
+_CATEGORY_TAGS: Dict[str, Tuple[str, ...]] = {
+    "ring": ("ring",),
+    "amulet": ("amulet",),
+    "belt": ("belt",),
+    "body armour": ("body_armour", "bodyarmour", "armour"),
+    "helmet": ("helmet", "armour"),
+    "gloves": ("gloves", "armour"),
+    "boots": ("boots", "armour"),
+    "shield": ("shield", "str_shield", "str_dex_shield", "str_int_shield"),
+    "focus": ("focus",),
+    "quiver": ("quiver",),
+    "charm": ("charm",),
+    "jewel": ("jewel",),
+    "traptool": ("trap",),
+    "wand": ("wand",) + _WEAPON_1H,
+    "sceptre": ("sceptre",) + _WEAPON_1H,
+    "dagger": ("dagger",) + _WEAPON_1H,
+    "claw": ("claw",) + _WEAPON_1H,
+    "flail": ("flail",) + _WEAPON_1H,
+    "spear": ("spear",) + _WEAPON_1H,
+    "one hand mace": ("mace",) + _WEAPON_1H,
+    "one hand sword": ("sword",) + _WEAPON_1H,
+    "one hand axe": ("axe",) + _WEAPON_1H,
+    "staff": ("staff",) + _WEAPON_2H,
+    "warstaff": ("warstaff", "quarterstaff") + _WEAPON_2H,
+    "two hand mace": ("mace",) + _WEAPON_2H,
+    "two hand sword": ("sword",) + _WEAPON_2H,
+    "two hand axe": ("axe",) + _WEAPON_2H,
+    "bow": ("bow", "ranged") + _WEAPON_2H,
+    "crossbow": ("crossbow", "ranged") + _WEAPON_2H,
+}
+
+EXPLICIT = "explicit"
+IMPLICIT = "implicit"
+
+
+class TierInfo(NamedTuple):
+    """Тир модификатора (1 — лучший) и положение значения внутри диапазона тира."""
+    tier: int
+    tier_count: int
+    mod_id: str
+    min: float
+    max: float
+    percentile: float
+
+
+class _TierTable(NamedTuple):
+    # Нижние границы диапазонов по возрастанию — для bisect
+    lows: Tuple[float, ...]
+    # (min, max, tier, mod_id) в том же порядке
+    ranges: Tuple[Tuple[float, float, int, str], ...]
+
+
+def category_tags(category: Optional[str]) -> Tuple[str, ...]:
+    """Теги тиров для категории предмета ("One Hand Mace", "One-Handed Mace", "Ring", ...)."""
+    if not category:
+        return ()
+    key = category.lower().replace("-handed", " hand")
+    return _CATEGORY_TAGS.get(key, (key.replace(" ", "_"),))
+
+
+def _table(mods: List[Mapping]) -> Optional[_TierTable]:
+    # Моды в stats.ndjson упорядочены по ilvl: последний — тир 1
+    count = len(mods)
+    ranges = []
+    for position, mod in enumerate(mods):
+        values = mod.get("values") or []
+        if not values:
+            continue
+        low, high = values[0]
+        ranges.append((min(low, high), max(low, high), count - position, mod["id"]))
+    if not ranges:
+        return None
+    ranges.sort()
+    return _TierTable(tuple(r[0] for r in ranges), tuple(ranges))
+
+
+class TierIndex:
+    """
+    Индекс тиров по (id стата, тег категории предмета, explicit/implicit)
+    с отсортированными диапазонами значений: поиск тира — один bisect.
+    """
+
+    def __init__(self, stats: Iterable[Mapping] = ()) -> None:
+        self._tables: Dict[Tuple[str, str, str], _TierTable] = {}
+        for stat in stats:
+            self.add_stat(stat)
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def add_stat(self, stat: Mapping) -> None:
+        """Добавляет в индекс таблицы тиров полной записи стата."""
+        stat_id = stat.get("id")
+        tiers = stat.get("tiers") if stat_id else None
+        if not tiers:
+            return
+
+        per_tag: Dict[str, List[Mapping]] = {}
+        for group in tiers.get(EXPLICIT) or []:
+            for tag in group.get("items", {}):
+                per_tag.setdefault(tag, []).extend(m for m in group["mods"] if tag in m.get("items", ()))
+        for tag, mods in per_tag.items():
+            mods.sort(key=lambda m: m.get("ilvl", 0))
+            table = _table(mods)
+            if table:
+                self._tables[(stat_id, tag, EXPLICIT)] = table
+
+        for tag, group in (tiers.get(IMPLICIT) or {}).items():
+            table = _table(group.get("mods", []))
+            if table:
+                self._tables[(stat_id, tag, IMPLICIT)] = table
+
+    def lookup(self, stat_id: Optional[str], category: Optional[str], value: float,
+               kind: str = EXPLICIT) -> Optional[TierInfo]:
+        """
+        Находит тир значения стата для категории предмета.
+
+        :param kind: EXPLICIT или IMPLICIT.
+        :return: TierInfo или None, если тиров нет или значение вне диапазонов.
+        """
+        if not stat_id:
+            return None
+        for tag in category_tags(category):
+            table = self._tables.get((stat_id, tag, kind))
+            if table is None:
+                continue
+            position = bisect_right(table.lows, value) - 1
+            # Диапазоны соседних тиров могут перекрываться: берём лучший подходящий
+            while position >= 0:
+                low, high, tier, mod_id = table.ranges[position]
+                if value <= high:
+                    percentile = 1.0 if high == low else (value - low) / (high - low)
+                    return TierInfo(tier, len(table.ranges), mod_id, low, high, percentile)
+                if position == 0 or table.ranges[position - 1][1] < value:
+                    break
+                position -= 1
+            return None
+        return None
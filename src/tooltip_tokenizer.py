@@ -0,0 +1,200 @@
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from enums.item_category import ItemCategory
+from enums.tooltip_section import TooltipSection, MODIFIER_SECTIONS
+
+# Разделитель секций тултипа ("--------"); OCR может превратить дефисы в тире.
+_SEPARATOR_RE = re.compile(r"^[-—–_]{4,}$")
+_ITEM_CLASS_RE = re.compile(r"^(?:Item Class|Класс предмета)\s*:\s*(.+)$", re.IGNORECASE)
+_RARITY_RE = re.compile(r"^(?:Rarity|Редкость)\s*:\s*(.+)$", re.IGNORECASE)
+_REQUIREMENTS_RE = re.compile(r"^(?:Requires\b|Requirements\s*:|(?:Level|Str|Dex|Int)\s*:)", re.IGNORECASE)
+# "Ключ: значение" — свойства предмета (Quality, Armour, Item Level, Stack Size, ...).
+_PROPERTY_RE = re.compile(r"^[A-Z][A-Za-z' ]{1,40}:\s*\S")
+# Пометка происхождения модификатора в конце строки: "(implicit)", "(rune)", ...
+_ORIGIN_TAG_RE = re.compile(r"\s*\((implicit|enchant|rune|crafted|fractured|desecrated)\)\s*$", re.IGNORECASE)
+_FLAVOUR_RE = re.compile(r"^(?:Right click|Place into|Travel to|Can be used|Shift click|\")", re.IGNORECASE)
+_STATUS_LINES = frozenset({"corrupted", "unidentified", "mirrored", "split", "unmodifiable"})
+
+_ORIGIN_SECTIONS = {
+    "implicit": TooltipSection.Implicit,
+    "enchant": TooltipSection.Enchant,
+    "rune": TooltipSection.Rune,
+    "crafted": TooltipSection.Crafted,
+    "fractured": TooltipSection.Explicit,
+    "desecrated": TooltipSection.Explicit,
+}
+
+# Сколько строк названия идёт после "Rarity:" (редкие и уникальные — имя и база).
+_NAME_LINES_BY_RARITY = {"rare": 2, "unique": 2, "magic": 1, "normal": 1}
+_MAX_NAME_LINES = max(_NAME_LINES_BY_RARITY.values())
+# Числа вне скобок ("Waystone (Tier 10)" — название) бывают только в модификаторах и свойствах
+_PARENTHESIZED_RE = re.compile(r"\([^)]*\)")
+
+
+class TooltipLine(NamedTuple):
+    """Строка тултипа с типом секции, к которой она относится."""
+    text: str
+    section: TooltipSection
+    index: int
+
+
+class Tooltip(NamedTuple):
+    """Разобранный на секции тултип."""
+    lines: List[TooltipLine]
+    item_class: Optional[ItemCategory]
+    item_class_text: Optional[str]
+    rarity: Optional[str]
+
+    @property
+    def name_lines(self) -> List[str]:
+        return [line.text for line in self.lines if line.section is TooltipSection.Header]
+
+    @property
+    def modifier_lines(self) -> List[TooltipLine]:
+        return [line for line in self.lines if line.section in MODIFIER_SECTIONS]
+
+
+def _build_item_class_lookup() -> Dict[str, ItemCategory]:
+    lookup = {}
+    for category in ItemCategory:
+        for variant in {category.value, category.value.replace("-Handed", " Hand")}:
+            key = variant.lower()
+            lookup[key] = category
+            lookup[key + "s"] = category
+            lookup[key + "es"] = category
+    return lookup
+
+
+_ITEM_CLASS_LOOKUP = _build_item_class_lookup()
+
+
+def item_category_from_class(item_class: str) -> Optional[ItemCategory]:
+    """
+    Переводит значение строки "Item Class:" (например, "Rings", "One Hand Maces") в ItemCategory.
+    """
+    return _ITEM_CLASS_LOOKUP.get(item_class.strip().lower())
+
+
+def strip_origin_tag(line: str) -> str:
+    """Убирает пометку происхождения "(implicit)" и т.п. из строки модификатора."""
+    return _ORIGIN_TAG_RE.sub("", line)
+
+
+def _is_name_line(line: str) -> bool:
+    """Строка может быть продолжением названия в заголовке без "Rarity:" (текст OCR)."""
+    if _classify_line(line, TooltipSection.Header) is not TooltipSection.Header:
+        return False
+    return not any(char.isdigit() or char == "%" for char in _PARENTHESIZED_RE.sub("", line))
+
+
+def _classify_line(line: str, default: TooltipSection) -> TooltipSection:
+    tag = _ORIGIN_TAG_RE.search(line)
+    if tag:
+        return _ORIGIN_SECTIONS[tag.group(1).lower()]
+    if line.lower() in _STATUS_LINES:
+        return TooltipSection.Status
+    if _REQUIREMENTS_RE.match(line):
+        return TooltipSection.Requirements
+    if _PROPERTY_RE.match(line):
+        return TooltipSection.Properties
+    if _FLAVOUR_RE.match(line):
+        return TooltipSection.Flavour
+    return default
+
+
+class TooltipTokenizer:
+    """
+    Потоковый токенизатор тултипа: делит текст на секции по разделителям
+    "--------" и классифицирует строки (заголовок, свойства, требования,
+    implicit/explicit/enchant/rune-модификаторы, flavour-текст).
+
+    Если разделителей нет (типичный результат OCR), строки после заголовка
+    классифицируются по одной. На экране нет строк "Item Class:" и "Rarity:",
+    поэтому тогда заголовком считаются начальные строки (не больше двух: имя
+    и база) до первого свойства, требования или модификатора.
+    """
+
+    def __init__(self) -> None:
+        self.item_class: Optional[ItemCategory] = None
+        self.item_class_text: Optional[str] = None
+        self.rarity: Optional[str] = None
+        self._section_index = 0
+        self._line_index = 0
+        self._seen_modifiers = False
+
+    def feed(self, lines: Iterable[str]) -> Iterator[TooltipLine]:
+        """Выдаёт классифицированные строки по мере завершения секций."""
+        section: List[str] = []
+        for raw_line in lines:
+            line = raw_line.strip()
+            if not line:
+                continue
+            if _SEPARATOR_RE.match(line):
+                yield from self._flush(section)
+                section = []
+                continue
+            section.append(line)
+        yield from self._flush(section)
+
+    def _flush(self, section: List[str]) -> Iterator[TooltipLine]:
+        if not section:
+            return
+        if self._section_index == 0:
+            kinds = self._classify_header(section)
+        else:
+            kinds = self._classify_section(section)
+        self._section_index += 1
+        for line, kind in zip(section, kinds):
+            if kind in MODIFIER_SECTIONS:
+                self._seen_modifiers = True
+            yield TooltipLine(strip_origin_tag(line), kind, self._line_index)
+            self._line_index += 1
+
+    def _classify_header(self, section: List[str]) -> List[TooltipSection]:
+        kinds: List[TooltipSection] = []
+        name_lines = None
+        header_open = True
+        for line in section:
+            item_class = _ITEM_CLASS_RE.match(line)
+            rarity = _RARITY_RE.match(line)
+            if item_class and not kinds:
+                self.item_class_text = item_class.group(1).strip()
+                self.item_class = item_category_from_class(self.item_class_text)
+                kinds.append(TooltipSection.Properties)
+            elif rarity and name_lines is None:
+                self.rarity = rarity.group(1).strip()
+                name_lines = _NAME_LINES_BY_RARITY.get(self.rarity.lower(), 1)
+                kinds.append(TooltipSection.Properties)
+            elif name_lines is not None and name_lines > 0:
+                kinds.append(TooltipSection.Header)
+                name_lines -= 1
+            elif name_lines is None and header_open:
+                # Без "Rarity:" (OCR): первая строка — название, следующая — база,
+                # если не похожа на свойство, требование или модификатор
+                headers = kinds.count(TooltipSection.Header)
+                header_open = headers == 0 or (headers < _MAX_NAME_LINES and _is_name_line(line))
+                kinds.append(TooltipSection.Header if header_open else _classify_line(line, TooltipSection.Explicit))
+            else:
+                # Заголовок без разделителей: остальное классифицируется построчно
+                kinds.append(_classify_line(line, TooltipSection.Explicit))
+        return kinds
+
+    def _classify_section(self, section: List[str]) -> List[TooltipSection]:
+        line_kinds = [_classify_line(line, TooltipSection.Explicit) for line in section]
+        if any(kind is TooltipSection.Requirements for kind in line_kinds[:1]):
+            return [TooltipSection.Requirements] * len(section)
+        if all(kind is TooltipSection.Explicit for kind in line_kinds) and self._seen_modifiers \
+                and (self.rarity or "").lower() == "unique" and not any(c.isdigit() for c in "".join(section)):
+            # Секция без чисел после модификаторов уникального предмета — flavour-текст
+            return [TooltipSection.Flavour] * len(section)
+        return line_kinds
+
+
+def tokenize_tooltip(text: str) -> Tooltip:
+    """
+    Делит текст тултипа на секции и классифицирует каждую строку.
+    """
+    tokenizer = TooltipTokenizer()
+    lines = list(tokenizer.feed(text.split("\n")))
+    return Tooltip(lines, tokenizer.item_class, tokenizer.item_class_text, tokenizer.rarity)
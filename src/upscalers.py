@@ -0,0 +1,167 @@
+import importlib.util
+import threading
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+
+from logger_config import logger
+
+DEFAULT_UPSCALER = "pillow"
+
+
+class Upscaler:
+    """
+    Бэкенд увеличения изображения. Принимает uint8 (H, W) или (H, W, C)
+    и возвращает uint8 (H * scale, W * scale[, C]).
+    """
+    name = ""
+    # Модуль, без которого бэкенд недоступен (проверяется без импорта)
+    requires: Optional[str] = None
+
+    def upscale(self, pixels: np.ndarray, scale: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+_REGISTRY: Dict[str, Type[Upscaler]] = {}
+_INSTANCES: Dict[str, Upscaler] = {}
+_LOCK = threading.Lock()
+
+
+def register_upscaler(cls: Type[Upscaler]) -> Type[Upscaler]:
+    """Декоратор регистрации бэкенда по его имени."""
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+def available_upscalers() -> List[str]:
+    """Имена бэкендов, зависимости которых установлены (модули при этом не импортируются)."""
+    return [name for name, cls in _REGISTRY.items()
+            if cls.requires is None or importlib.util.find_spec(cls.requires) is not None]
+
+
+def get_upscaler(name: str) -> Upscaler:
+    """
+    Экземпляр бэкенда по имени; тяжёлые зависимости импортируются при первом обращении.
+
+    :raises KeyError: Неизвестный бэкенд.
+    :raises ImportError: Зависимость бэкенда не установлена.
+    """
+    upscaler = _INSTANCES.get(name)
+    if upscaler is not None:
+        return upscaler
+    with _LOCK:
+        if name not in _INSTANCES:
+            _INSTANCES[name] = _REGISTRY[name]()
+        return _INSTANCES[name]
+
+
+def resolve_upscaler(name: str) -> Upscaler:
+    """То же, что get_upscaler, но с откатом на DEFAULT_UPSCALER, если бэкенд недоступен."""
+    try:
+        return get_upscaler(name)
+    except (KeyError, ImportError) as e:
+        logger.warning("Бэкенд апсемплинга %r недоступен (%s), используется %s.", name, e, DEFAULT_UPSCALER)
+        return get_upscaler(DEFAULT_UPSCALER)
+
+
+@register_upscaler
+class PillowUpscaler(Upscaler):
+    """Bicubic из Pillow (уже в зависимостях приложения)."""
+    name = "pillow"
+
+    def __init__(self) -> None:
+        from PIL import Image
+        self._image = Image
+
+    def upscale(self, pixels: np.ndarray, scale: int) -> np.ndarray:
+        h, w = pixels.shape[:2]
+        image = self._image.fromarray(np.ascontiguousarray(pixels))
+        return np.asarray(image.resize((w * scale, h * scale), self._image.Resampling.BICUBIC))
+
+
+def _cubic_weights(t: np.ndarray, a: float = -0.5) -> np.ndarray:
+    # Ядро Keys для отсчётов -1, 0, 1, 2 относительно floor(x); t — дробная часть
+    def kernel(x):
+        x = np.abs(x)
+        return np.where(
+            x <= 1, ((a + 2) * x - (a + 3)) * x * x + 1,
+            np.where(x < 2, ((x - 5) * x + 8) * x * a - 4 * a, 0.0),
+        )
+    return np.stack([kernel(t + 1), kernel(t), kernel(1 - t), kernel(2 - t)], axis=-1).astype(np.float32)
+
+
+def _upscale_axis(array: np.ndarray, scale: int, axis: int) -> np.ndarray:
+    """
+    Целочисленное bicubic-увеличение вдоль одной оси (центры пикселей со сдвигом 0.5,
+    края дублируются). Веса периодичны с периодом scale: по 4 сдвинутых среза на фазу.
+    """
+    size = array.shape[axis]
+    padded = np.pad(array, [(2, 2) if i == axis else (0, 0) for i in range(array.ndim)], mode="edge")
+    shape = list(array.shape)
+    shape[axis] = size * scale
+    out = np.empty(shape, dtype=np.float32)
+
+    positions = (np.arange(scale, dtype=np.float64) + 0.5) / scale - 0.5
+    bases = np.floor(positions).astype(int)
+    weights = _cubic_weights(positions - bases)
+    for phase in range(scale):
+        acc = None
+        for tap in range(4):
+            start = bases[phase] + tap + 1
+            taps = [slice(None)] * array.ndim
+            taps[axis] = slice(start, start + size)
+            source = padded[tuple(taps)]
+            term = weights[phase, tap] * source.astype(np.float32, copy=False)
+            acc = term if acc is None else acc + term
+        index = [slice(None)] * array.ndim
+        index[axis] = slice(phase, None, scale)
+        out[tuple(index)] = acc
+    return out
+
+
+@register_upscaler
+class NumpyUpscaler(Upscaler):
+    """Раздельный bicubic на чистом numpy (как TensorFlow: a = -0.5, половинные центры пикселей)."""
+    name = "numpy"
+
+    def upscale(self, pixels: np.ndarray, scale: int) -> np.ndarray:
+        rows = _upscale_axis(pixels, scale, axis=0)
+        result = _upscale_axis(rows, scale, axis=1)
+        np.rint(result, out=result)
+        return np.clip(result, 0, 255).astype(np.uint8)
+
+
+@register_upscaler
+class TensorflowUpscaler(Upscaler):
+    """tf.image.resize (bicubic). Импорт TensorFlow занимает секунды и сотни МБ памяти."""
+    name = "tensorflow"
+    requires = "tensorflow"
+
+    def __init__(self) -> None:
+        import tensorflow as tf
+        self._tf = tf
+
+    def upscale(self, pixels: np.ndarray, scale: int) -> np.ndarray:
+        tf = self._tf
+        h, w = pixels.shape[:2]
+        batch = pixels[np.newaxis] if pixels.ndim == 3 else pixels[np.newaxis, ..., np.newaxis]
+        # resize принимает uint8 и возвращает float32 в том же диапазоне 0..255
+        upscaled = tf.image.resize(batch, size=[h * scale, w * scale], method=tf.image.ResizeMethod.BICUBIC)
+        upscaled = tf.cast(tf.clip_by_value(tf.round(upscaled), 0, 255), tf.uint8).numpy()[0]
+        return upscaled if pixels.ndim == 3 else upscaled[..., 0]
+
+
+@register_upscaler
+class OpencvUpscaler(Upscaler):
+    """cv2.resize (INTER_CUBIC), если OpenCV установлен."""
+    name = "opencv"
+    requires = "cv2"
+
+    def __init__(self) -> None:
+        import cv2
+        self._cv2 = cv2
+
+    def upscale(self, pixels: np.ndarray, scale: int) -> np.ndarray:
+        h, w = pixels.shape[:2]
+        return self._cv2.resize(np.ascontiguousarray(pixels), (w * scale, h * scale),
+                                interpolation=self._cv2.INTER_CUBIC)